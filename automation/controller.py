@@ -3,7 +3,7 @@ Game controller for automating mouse and keyboard input
 """
 import time
 import platform
-from typing import Tuple, Optional, List
+from typing import Tuple, Optional, List, Callable
 from dataclasses import dataclass
 from enum import Enum
 import threading
@@ -34,6 +34,19 @@ class InputMode(Enum):
     """Input mode for the controller"""
     PYAUTOGUI = "pyautogui"  # Works everywhere but may not work in games
     DIRECTINPUT = "directinput"  # Windows only, better for games
+    DRY_RUN = "dry_run"  # Record actions without sending input, e.g. for replays
+
+
+class DryRunInput:
+    """Stands in for the input library and records the calls instead"""
+    
+    def __init__(self):
+        self.calls: List[Tuple[str, tuple, dict]] = []
+        
+    def __getattr__(self, name: str):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return record
 
 
 @dataclass
@@ -73,12 +86,16 @@ class GameController:
     def __init__(
         self, 
         action_delay_ms: int = 100,
-        prefer_directinput: bool = True
+        prefer_directinput: bool = True,
+        dry_run: bool = False
     ):
         self.action_delay = action_delay_ms / 1000.0  # Convert to seconds
         
         # Determine input mode
-        if prefer_directinput and DIRECTINPUT_AVAILABLE:
+        if dry_run:
+            self.mode = InputMode.DRY_RUN
+            self._input = DryRunInput()
+        elif prefer_directinput and DIRECTINPUT_AVAILABLE:
             self.mode = InputMode.DIRECTINPUT
             self._input = pydirectinput
         elif PYAUTOGUI_AVAILABLE:
@@ -92,6 +109,9 @@ class GameController:
         self.is_emergency_stopped = False
         self._pressed_keys = set()
         
+        # Maps coordinates of captured images to screen coordinates
+        self.coordinate_mapper: Optional[Callable[[int, int], Tuple[int, int]]] = None
+        
         # Action queue for async operations
         self._action_queue = Queue()
         self._worker_thread = None
@@ -100,6 +120,16 @@ class GameController:
         """Apply action delay"""
         time.sleep(self.action_delay)
         
+    def set_coordinate_mapper(self, mapper: Optional[Callable[[int, int], Tuple[int, int]]]):
+        """Set how image coordinates map to the screen (e.g. WindowTracker.to_screen)"""
+        self.coordinate_mapper = mapper
+        
+    def _to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        """Map image coordinates to screen coordinates"""
+        if self.coordinate_mapper:
+            return self.coordinate_mapper(x, y)
+        return x, y
+        
     def is_available(self) -> bool:
         """Check if controller is available"""
         return self._input is not None
@@ -107,10 +137,11 @@ class GameController:
     # ================== Mouse Control ==================
     
     def move_mouse(self, x: int, y: int, duration: float = 0.1) -> ActionResult:
-        """Move mouse to absolute position"""
+        """Move mouse to a position in image coordinates (absolute if no mapper is set)"""
         if self.is_paused or self.is_emergency_stopped:
             return ActionResult(False, "Controller is paused or stopped")
             
+        x, y = self._to_screen(x, y)
         try:
             if self.mode == InputMode.DIRECTINPUT:
                 # pydirectinput doesn't support duration, move instantly
@@ -177,7 +208,7 @@ class GameController:
                 # Manual drag for directinput
                 self._input.mouseDown()
                 time.sleep(0.05)
-                self._input.moveTo(end_x, end_y)
+                self._input.moveTo(*self._to_screen(end_x, end_y))
                 time.sleep(0.05)
                 self._input.mouseUp()
             self._delay()
@@ -2,13 +2,21 @@
 Game navigator for high-level navigation actions
 """
 import time
-from typing import Optional, Tuple, List
+from typing import Iterable, Optional, Tuple, List, Union
 from dataclasses import dataclass
 from enum import Enum
 
 from .controller import GameController, ActionResult
 from screen.capture import ScreenCapture
+from screen.capture_service import CaptureService
 from screen.detector import GameDetector, GameState, DetectedObject
+from screen.frame import Frame
+from screen.capture_plan import CapturePlan, PlanCapture
+from screen.window_tracker import WindowTracker
+from screen.change_detector import ChangeDetector, ChangeKind, PerceptionMemo
+from screen.state_watcher import GameStateWatcher
+from screen.localization import Location, load_localizer
+from screen.tracker import ObjectTracker
 from screen.template_matcher import TemplateMatcher
 from screen.ai_vision import AIVisualAnalyzer
 
@@ -49,10 +57,18 @@ class Navigator:
         controller: Optional[GameController] = None,
         screen_capture: Optional[ScreenCapture] = None,
         detector: Optional[GameDetector] = None,
-        log_callback=None
+        log_callback=None,
+        capture_service: Optional[CaptureService] = None,
+        window_tracker: Optional[WindowTracker] = None
     ):
         self.controller = controller or GameController()
         self.screen = screen_capture or ScreenCapture()
+        self.capture_service = capture_service
+        
+        # Captures cover the game's client area; clicks are mapped back to the screen
+        self.window = window_tracker or WindowTracker()
+        if self.controller.coordinate_mapper is None:
+            self.controller.set_coordinate_mapper(self.window.to_screen)
         self.detector = detector or GameDetector()
         self.log_callback = log_callback
         
@@ -60,32 +76,163 @@ class Navigator:
         self.template_matcher = TemplateMatcher()
         self.ai_vision = AIVisualAnalyzer(log_callback=log_callback)
         
+        # Absolute position from the minimap (None without a prebuilt map index)
+        self.localizer = load_localizer(log_callback)
+        
+        # Regions for checks that do not need the whole screen
+        self._state_plan = self.detector.game_state_plan()
+        self._prompt_plan = CapturePlan(self.detector.resolution).add(
+            "prompt", GameDetector.PROMPT_SEARCH_REGION
+        )
+        
+        # State polling reuses its last result while the screen stands still
+        self._state_regions = {
+            "center": GameDetector.CENTER_REGION,
+            "dialog": GameDetector.DIALOG_REGION,
+            "minimap": GameDetector.MINIMAP_REGION,
+        }
+        self._state_changes = ChangeDetector(self._state_regions)
+        self._perception = PerceptionMemo()
+        
+        # Debounced state published from the capture stream, see start_state_watcher()
+        self.state_watcher: Optional[GameStateWatcher] = None
+        
         self.state = NavigationState.IDLE
         self.is_running = False
         
-    def get_current_screen(self):
-        """Get current game screen"""
-        return self.screen.capture_full_screen(monitor=1)
+    def _service_running(self) -> bool:
+        return self.capture_service is not None and self.capture_service.is_running
+        
+    def get_current_screen(self) -> Frame:
+        """Get current game screen (shared by all detectors that look at it)"""
+        # Read the background capture when it runs, capturing here is slower
+        if self._service_running():
+            screen = self.capture_service.get_screen()
+            if screen is not None:
+                return screen
+        return self.screen.capture_frame(region=self.window.region())
+        
+    def _watcher_running(self) -> bool:
+        return self.state_watcher is not None and self.state_watcher.is_running
         
     def check_game_state(self) -> GameState:
         """Check current game state"""
-        screen = self.get_current_screen()
-        return self.detector.detect_game_state(screen)
+        # The watcher already checks every captured frame
+        if self._watcher_running() and self.state_watcher.state is not None:
+            return self.state_watcher.state
+            
+        if self._service_running():
+            screen = self.get_current_screen()
+        else:
+            # Only grab the regions the state check looks at
+            screen = self.screen.capture_plan(self._state_plan, area=self.window.region())
+            
+        change = self._state_changes.update(screen)
+        # A full frame is classified from whole-screen statistics too (loading, pause);
+        # a plan capture from all its regions, including the overview strips
+        regions = list(self._state_plan.regions) if isinstance(screen, PlanCapture) else None
+        return self._perception.get(
+            "game_state", change, lambda: self.detector.detect_game_state(screen), regions
+        )
+        
+    def perception_stats(self) -> dict:
+        """Frame change counts and how often perception was skipped"""
+        counts = self._state_changes.counts
+        return {
+            'frames': self._state_changes.frames,
+            'unchanged': counts[ChangeKind.UNCHANGED],
+            'roi_changed': counts[ChangeKind.ROI],
+            'global_changed': counts[ChangeKind.GLOBAL],
+            'skip_rate': self._perception.skip_rate,
+        }
+        
+    # ================== State Waiting ==================
+    
+    def start_state_watcher(self, confirm_frames: Optional[int] = None):
+        """Check the game state on every captured frame in the background"""
+        if self.state_watcher is None:
+            self.state_watcher = GameStateWatcher(
+                self.detector,
+                capture_service=self.capture_service,
+                screen_capture=self.screen,
+                window_tracker=self.window,
+                confirm_frames=confirm_frames,
+                log_callback=self.log_callback
+            )
+        self.state_watcher.reset()
+        self.state_watcher.start()
+        
+    def stop_state_watcher(self):
+        """Stop the background state checks"""
+        if self.state_watcher is not None:
+            self.state_watcher.stop()
+            
+    def wait_for_state(
+        self,
+        states: Union[GameState, Iterable[GameState]],
+        timeout: float,
+        since: Optional[float] = None,
+        poll_interval: float = 0.3
+    ) -> Optional[GameState]:
+        """
+        Wait until the game is in one of the given states
+        
+        With the state watcher running this wakes on the frame that confirms
+        the state; otherwise the state is polled every poll_interval.
+        
+        Args:
+            states: State or states to wait for
+            timeout: Maximum time to wait in seconds
+            since: time.monotonic() value; with the watcher, only a transition
+                after it counts (see GameStateWatcher.wait_for)
+            poll_interval: Seconds between checks without the watcher
+            
+        Returns:
+            The state reached, or None on timeout
+        """
+        wanted = {states} if isinstance(states, GameState) else set(states)
+        if self._watcher_running():
+            transition = self.state_watcher.wait_for(wanted, timeout, since)
+            return transition.state if transition else None
+            
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self.check_game_state()
+            if state in wanted:
+                return state
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(poll_interval, remaining))
+            
+    def wait_while_state(
+        self,
+        states: Union[GameState, Iterable[GameState]],
+        timeout: float,
+        poll_interval: float = 0.3
+    ) -> Optional[GameState]:
+        """Wait until the game leaves the given states, returns the new state or None"""
+        left = {states} if isinstance(states, GameState) else set(states)
+        return self.wait_for_state(set(GameState) - left, timeout, poll_interval=poll_interval)
         
     # ================== Basic Navigation ==================
     
     def turn_to_direction(
         self, 
         target_direction: float,
-        current_direction: float = 0
+        current_direction: Optional[float] = None
     ) -> ActionResult:
         """
         Turn camera to face a direction
         
         Args:
             target_direction: Target angle in degrees (0 = north)
-            current_direction: Current facing (if known)
+            current_direction: Current facing, read from the minimap arrow if not given
         """
+        if current_direction is None:
+            info = self.detector.detect_minimap_info(self.get_current_screen())
+            current_direction = info.player_direction if info else 0
+            
         # Calculate turn amount
         diff = target_direction - current_direction
         
@@ -146,14 +293,21 @@ class Navigator:
         self,
         target_x: int,
         target_y: int,
-        max_attempts: int = 5
+        max_attempts: int = 5,
+        tracker: Optional[ObjectTracker] = None
     ) -> ActionResult:
         """
         Move towards a target and interact with it
+        
+        With a tracker the target is followed as the camera turns and the
+        character moves, instead of steering at where it was first seen.
         """
         for attempt in range(max_attempts):
             # Check if interaction prompt is visible
-            screen = self.get_current_screen()
+            if self._service_running():
+                screen = self.get_current_screen()
+            else:
+                screen = self.screen.capture_plan(self._prompt_plan, area=self.window.region())
             prompt = self.detector.detect_interaction_prompt(screen)
             
             if prompt:
@@ -164,32 +318,42 @@ class Navigator:
                 self.state = NavigationState.IDLE
                 return result
                 
+            if tracker is not None:
+                if not self._service_running():
+                    screen = self.get_current_screen()
+                tracker = self._follow_target(tracker, screen)
+                target_x, target_y = (int(v) for v in tracker.position)
+                
             # Move closer
             self.move_towards_screen_point(target_x, target_y, duration=0.5)
             time.sleep(0.3)
             
         return ActionResult(False, "Could not reach interaction point")
         
+    def _follow_target(self, tracker: ObjectTracker, screen: Frame) -> ObjectTracker:
+        """Update a tracker, detecting again only once its track is lost"""
+        if tracker.update(screen) is not None or not tracker.lost:
+            return tracker
+            
+        # Re-acquire the object of the same type nearest to where it was predicted
+        objects = self.detector.detect_collectibles(screen, (tracker.object_type,))
+        if not objects:
+            return tracker
+        px, py = tracker.position
+        nearest = min(objects, key=lambda o: (o.x - px)**2 + (o.y - py)**2)
+        return ObjectTracker(nearest, screen)
+        
     # ================== Map Navigation ==================
     
     def open_map_and_wait(self, timeout: float = 3.0) -> bool:
         """Open map and wait for it to load"""
         self.controller.open_map()
-        
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            state = self.check_game_state()
-            if state == GameState.MAP:
-                return True
-            time.sleep(0.2)
-            
-        return False
+        return self.wait_for_state(GameState.MAP, timeout, poll_interval=0.2) is not None
         
     def close_map(self) -> bool:
         """Close the map"""
         self.controller.escape()
-        time.sleep(0.5)
-        return self.check_game_state() != GameState.MAP
+        return self.wait_while_state(GameState.MAP, timeout=0.5) is not None
         
     def teleport_to_waypoint(
         self,
@@ -221,10 +385,8 @@ class Navigator:
                 h, w = screen.shape[:2]
                 self.controller.click_at(int(w * 0.85), int(h * 0.75))
                 
-        time.sleep(0.5)
-        
         # Wait for teleport (loading screen)
-        return self._wait_for_teleport_complete()
+        return self._wait_for_teleport_complete(since=time.monotonic())
         
     def teleport_to_location(
         self,
@@ -346,26 +508,29 @@ class Navigator:
         
         return self.teleport_to_waypoint(closest[0], closest[1])
         
-    def _wait_for_teleport_complete(self, timeout: float = 15.0) -> ActionResult:
-        """Wait for teleport to complete"""
-        start_time = time.time()
-        loading_started = False
+    def _wait_for_teleport_complete(
+        self,
+        timeout: float = 15.0,
+        since: Optional[float] = None
+    ) -> ActionResult:
+        """
+        Wait for teleport to complete
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+            since: time.monotonic() of the teleport click, so a loading
+                screen that already ended still counts
+        """
+        deadline = time.monotonic() + timeout
         
-        while time.time() - start_time < timeout:
-            state = self.check_game_state()
+        # The world only counts once a loading screen was seen
+        if self.wait_for_state(GameState.LOADING, timeout, since=since) is None:
+            return ActionResult(False, "Teleport timeout")
             
-            if state == GameState.LOADING:
-                loading_started = True
-                time.sleep(0.5)
-            elif state == GameState.WORLD:
-                if loading_started:
-                    return ActionResult(True, "Teleport successful")
-                # Might still be waiting for loading to start
-                time.sleep(0.3)
-            else:
-                time.sleep(0.3)
-                
-        return ActionResult(False, "Teleport timeout")
+        loaded = self.state_watcher.last_entered(GameState.LOADING) if self._watcher_running() else None
+        if self.wait_for_state(GameState.WORLD, deadline - time.monotonic(), since=loaded) is None:
+            return ActionResult(False, "Teleport timeout")
+        return ActionResult(True, "Teleport successful")
         
     def _try_adjust_map_view(self, target_location: str):
         """Try to adjust map view to find the target location"""
@@ -389,12 +554,10 @@ class Navigator:
         """
         screen = self.get_current_screen()
         
-        objects = []
-        if item_type in ("any", "chest"):
-            objects.extend(self.detector.detect_chests(screen))
-        if item_type in ("any", "oculus"):
-            objects.extend(self.detector.detect_oculi(screen))
-            
+        # All collectible classes in one pass over the screen
+        kinds = None if item_type == "any" else (item_type,)
+        objects = self.detector.detect_collectibles(screen, kinds)
+        
         if not objects:
             return ActionResult(False, "No collectible objects found")
             
@@ -405,7 +568,9 @@ class Navigator:
             key=lambda o: (o.x - center[0])**2 + (o.y - center[1])**2
         )
         
-        return self.approach_and_interact(closest.x, closest.y)
+        # Follow it between frames rather than detecting again every step
+        tracker = ObjectTracker(closest, screen)
+        return self.approach_and_interact(closest.x, closest.y, tracker=tracker)
         
     # ================== Dialog Handling ==================
     
@@ -413,45 +578,37 @@ class Navigator:
         """
         Skip through dialog by clicking
         """
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
         
-        while time.time() - start_time < timeout:
+        while time.monotonic() < deadline:
             state = self.check_game_state()
             
             if state != GameState.DIALOG:
                 return ActionResult(True, "Dialog ended")
                 
-            # Click to advance
+            # Click to advance, then wait until the next line could be clicked
             self.controller.click()
-            time.sleep(0.3)
-            
+            if self.wait_while_state(GameState.DIALOG, min(0.3, deadline - time.monotonic())) is not None:
+                return ActionResult(True, "Dialog ended")
+                
         return ActionResult(False, "Dialog timeout")
         
     def wait_for_dialog_end(self, timeout: float = 30.0) -> bool:
         """Wait for dialog to end naturally"""
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            state = self.check_game_state()
-            if state != GameState.DIALOG:
-                return True
-            time.sleep(0.5)
-            
-        return False
+        return self.wait_while_state(GameState.DIALOG, timeout, poll_interval=0.5) is not None
         
     # ================== Utility Methods ==================
     
+    def locate_player(self) -> Optional[Location]:
+        """Player position on the world map, None if unknown or no index is configured"""
+        if self.localizer is None:
+            return None
+        screen = self.get_current_screen()
+        return self.localizer.locate(screen.crop(*self.detector.minimap_region()))
+        
     def wait_for_game_ready(self, timeout: float = 30.0) -> bool:
         """Wait for game to be in playable state"""
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            state = self.check_game_state()
-            if state == GameState.WORLD:
-                return True
-            time.sleep(0.5)
-            
-        return False
+        return self.wait_for_state(GameState.WORLD, timeout, poll_interval=0.5) is not None
         
     def stop(self):
         """Stop navigation"""
@@ -0,0 +1,70 @@
+"""
+Benchmark screen capture throughput
+
+Compares opening a new mss instance per screenshot (the old behaviour)
+with the persistent per-thread sessions of ScreenCapture.
+
+Usage:
+    python benchmarks/bench_capture.py [--seconds 3] [--region 0 0 400 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mss
+import numpy as np
+
+from screen.capture import ScreenCapture
+
+
+def per_call_full_screen():
+    """Old behaviour: a new mss instance for every screenshot"""
+    with mss.mss() as sct:
+        return np.array(sct.grab(sct.monitors[1]))[:, :, :3][:, :, ::-1]
+
+
+def per_call_region(left, top, width, height):
+    """Old behaviour for region captures"""
+    with mss.mss() as sct:
+        region = {'left': left, 'top': top, 'width': width, 'height': height}
+        return np.array(sct.grab(region))[:, :, :3][:, :, ::-1]
+
+
+def measure(name: str, func, seconds: float) -> float:
+    """Call func repeatedly for a number of seconds, returns calls per second"""
+    func()  # Warm up
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        func()
+        count += 1
+    rate = count / (time.perf_counter() - start)
+    print(f"{name:<32} {rate:8.1f} captures/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark screen capture throughput")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each measurement")
+    parser.add_argument("--region", type=int, nargs=4, default=[0, 0, 400, 300],
+                        metavar=("LEFT", "TOP", "WIDTH", "HEIGHT"), help="Region for region captures")
+    args = parser.parse_args()
+
+    capture = ScreenCapture()
+    try:
+        before = measure("full screen, mss per call", per_call_full_screen, args.seconds)
+        after = measure("full screen, persistent session", capture.capture_full_screen, args.seconds)
+        print(f"{'speedup':<32} {after / before:8.2f}x")
+
+        before = measure("region, mss per call", lambda: per_call_region(*args.region), args.seconds)
+        after = measure("region, persistent session", lambda: capture.capture_region(*args.region), args.seconds)
+        print(f"{'speedup':<32} {after / before:8.2f}x")
+    finally:
+        capture.close()
+
+
+if __name__ == "__main__":
+    main()
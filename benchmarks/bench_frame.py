@@ -0,0 +1,135 @@
+"""
+Benchmark the perception path of one captured frame
+
+Compares the colour conversions of the old path (copy the BGRA screenshot
+with np.array, take a strided RGB view, every check converts on its own)
+with the Frame path (zero-copy view over the BGRA buffer, one conversion
+per colour space) for the detector calls made on one frame. The old path
+only replays the conversions, so its time excludes contour search.
+Synthetic screenshots are used, so no display is needed.
+
+Usage:
+    python benchmarks/bench_frame.py [--frames 50] [--width 1920 --height 1080]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from screen.detector import GameDetector
+from screen.frame import Frame
+
+
+class FakeScreenshot:
+    """Stand-in for mss.ScreenShot: a raw BGRA bytearray"""
+    
+    def __init__(self, width: int, height: int, seed: int):
+        # Smooth random colours, noise at full resolution is unlike a game screen
+        rng = np.random.default_rng(seed)
+        coarse = rng.integers(0, 256, (height // 60, width // 60, 3), dtype=np.uint8)
+        image = cv2.cvtColor(cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC), cv2.COLOR_BGR2BGRA)
+        self.width, self.height = width, height
+        self.raw = bytearray(image.tobytes())
+        
+    def __array__(self, dtype=None, copy=None):
+        # Same as mss: np.array(screenshot) copies the buffer
+        return np.frombuffer(self.raw, dtype=np.uint8).reshape(self.height, self.width, 4).copy()
+
+
+class ConversionCounter:
+    """Counts cv2.cvtColor calls while active"""
+    
+    def __init__(self):
+        self.count = 0
+        self._original = cv2.cvtColor
+        
+    def __enter__(self):
+        def counting(*args, **kwargs):
+            self.count += 1
+            return self._original(*args, **kwargs)
+        cv2.cvtColor = counting
+        return self
+        
+    def __exit__(self, *exc):
+        cv2.cvtColor = self._original
+
+
+def old_path(detector: GameDetector, shot: FakeScreenshot):
+    """The previous capture and detector code: copy, strided RGB view, a conversion per check"""
+    screen = np.array(shot)[:, :, :3][:, :, ::-1]
+    h, w = screen.shape[:2]
+    
+    # detect_game_state
+    cv2.cvtColor(screen, cv2.COLOR_RGB2GRAY)  # Loading screen
+    x, y, rw, rh = detector._scale_region(detector.DIALOG_REGION)
+    cv2.cvtColor(screen[y:y + rh, x:x + rw], cv2.COLOR_RGB2GRAY)  # Dialog
+    cv2.cvtColor(screen[h // 3:2 * h // 3, w // 3:2 * w // 3], cv2.COLOR_RGB2HSV)  # Map
+    cv2.cvtColor(screen, cv2.COLOR_RGB2GRAY)  # Pause menu
+    
+    # detect_interaction_prompt, detect_chests, detect_oculi
+    sx, sy = int(w * 0.45), int(h * 0.35)
+    cv2.cvtColor(screen[sy:sy + int(h * 0.3), sx:sx + int(w * 0.2)], cv2.COLOR_RGB2HSV)
+    cv2.cvtColor(screen, cv2.COLOR_RGB2HSV)
+    cv2.cvtColor(screen, cv2.COLOR_RGB2HSV)
+
+
+def new_path(detector: GameDetector, shot: FakeScreenshot):
+    """Zero-copy Frame shared by all detector calls"""
+    frame = Frame.from_screenshot(shot)
+    detector.detect_game_state(frame)
+    detector.detect_interaction_prompt(frame)
+    detector.detect_chests(frame)
+    detector.detect_oculi(frame)
+
+
+def measure(name: str, func, detector: GameDetector, shots) -> dict:
+    """Run a path over all screenshots, collect time, memory and conversions"""
+    func(detector, shots[0])  # Warm up
+    
+    tracemalloc.start()
+    with ConversionCounter() as counter:
+        start = time.perf_counter()
+        for shot in shots:
+            func(detector, shot)
+        elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    stats = {
+        'ms': elapsed * 1000 / len(shots),
+        'conversions': counter.count / len(shots),
+        'peak_mb': peak / 1e6,
+    }
+    print(f"{name:<10} {stats['ms']:8.2f} ms/frame  {stats['conversions']:5.1f} conversions/frame  "
+          f"{stats['peak_mb']:7.1f} MB peak")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-frame perception path")
+    parser.add_argument("--frames", type=int, default=50, help="Number of synthetic frames")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+    
+    detector = GameDetector(resolution=(args.width, args.height))
+    shots = [FakeScreenshot(args.width, args.height, seed) for seed in range(min(args.frames, 8))]
+    shots = [shots[i % len(shots)] for i in range(args.frames)]
+    
+    old = measure("old", old_path, detector, shots)
+    new = measure("frame", new_path, detector, shots)
+    
+    frame_mb = args.width * args.height * 4 / 1e6
+    print(f"\nFull-frame copies saved per frame: 1 (np.array of the {frame_mb:.1f} MB BGRA buffer)")
+    print(f"Colour conversions saved per frame: {old['conversions'] - new['conversions']:.1f}")
+    print(f"Speedup: {old['ms'] / new['ms']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark and check the minimap heading estimator
+
+Draws the player arrow at random headings, sizes and sub-pixel offsets onto
+noisy synthetic minimap backgrounds of a full screen, then times
+detect_minimap_info and compares the estimated heading with the drawn one.
+Exits with status 1 if the error limits are exceeded, so it doubles as an
+accuracy test.
+
+Usage:
+    python benchmarks/bench_heading.py [--frames 500] [--max-error 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from screen.detector import GameDetector
+from screen.frame import Frame
+from screen.heading import HeadingEstimator, draw_player_arrow
+
+
+def synthetic_screen(rng, detector: GameDetector, width: int, height: int):
+    """BGRA screen with a rotated arrow at the minimap centre, and its heading"""
+    coarse = rng.integers(20, 140, (height // 60, width // 60, 3), dtype=np.uint8)
+    image = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC)
+    image = cv2.add(image, rng.integers(0, 24, image.shape, dtype=np.uint8))
+    
+    heading = rng.uniform(0, 360)
+    x, y, w, h = detector._scale_region(detector.MINIMAP_REGION)
+    center = (x + w // 2 + rng.uniform(-1.5, 1.5), y + h // 2 + rng.uniform(-1.5, 1.5))
+    size = HeadingEstimator.ARROW_SIZE * detector.scale_y * rng.uniform(0.85, 1.15)
+    draw_player_arrow(image, center, heading, size)
+    return Frame(cv2.cvtColor(image, cv2.COLOR_BGR2BGRA), 'BGRA'), heading
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the minimap heading estimator")
+    parser.add_argument("--frames", type=int, default=500, help="Synthetic arrows to test")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--max-error", type=float, default=3.0, help="Allowed 95th percentile error in degrees")
+    parser.add_argument("--max-ms", type=float, default=1.0, help="Allowed median time per frame")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    detector = GameDetector((args.width, args.height))
+    screens = [synthetic_screen(rng, detector, args.width, args.height) for _ in range(args.frames)]
+    
+    errors, times, missed = [], [], 0
+    for frame, heading in screens:
+        start = time.perf_counter()
+        info = detector.detect_minimap_info(frame)
+        times.append(time.perf_counter() - start)
+        
+        if info is None or info.direction_confidence == 0:
+            missed += 1
+            continue
+        errors.append(abs((info.player_direction - heading + 180) % 360 - 180))
+        
+    errors = np.array(errors)
+    median_ms = np.median(times) * 1000
+    p95 = np.percentile(errors, 95) if len(errors) else float('inf')
+    print(f"{args.frames} arrows at {args.width}x{args.height}, {missed} not found")
+    print(f"error: mean {errors.mean():.2f}°  p95 {p95:.2f}°  max {errors.max():.2f}°")
+    print(f"time:  median {median_ms:.3f} ms  p95 {np.percentile(times, 95) * 1000:.3f} ms")
+    
+    if missed or p95 > args.max_error or median_ms > args.max_ms:
+        print("FAILED")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
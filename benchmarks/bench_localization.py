@@ -0,0 +1,116 @@
+"""
+Benchmark minimap localization on a synthetic world map
+
+Builds a feature index of a generated world map (terrain noise with roads,
+buildings and landmarks) in a temporary directory, then walks a path across
+it, cutting a round minimap around the player at every step. Reports the
+query rate while tracking, the time of the initial whole-map search and the
+position error.
+
+Usage:
+    python benchmarks/bench_localization.py [--size 6144] [--steps 300]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from screen.frame import Frame
+from screen.localization import FeatureIndex, MinimapLocalizer
+
+
+def synthetic_world_map(size: int, seed: int = 0) -> np.ndarray:
+    """Terrain noise with roads, buildings and landmarks, BGR"""
+    rng = np.random.default_rng(seed)
+    image = np.zeros((size, size, 3), dtype=np.float32)
+    for cells in (8, 32, 128):
+        coarse = rng.uniform(0, 255, (cells, cells, 3)).astype(np.float32)
+        image += cv2.resize(coarse, (size, size), interpolation=cv2.INTER_CUBIC) / 3
+    image = np.clip(image, 0, 255).astype(np.uint8)
+    
+    for _ in range(size * size // 1500):
+        x, y = rng.integers(0, size, 2)
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        kind = rng.integers(3)
+        if kind == 0:
+            w, h = rng.integers(6, 30, 2)
+            cv2.rectangle(image, (x, y), (x + w, y + h), color, -1)
+        elif kind == 1:
+            cv2.circle(image, (x, y), int(rng.integers(3, 12)), color, -1)
+        else:
+            dx, dy = rng.integers(-60, 60, 2)
+            cv2.line(image, (x, y), (x + dx, y + dy), color, int(rng.integers(1, 4)))
+    return image
+
+
+def minimap_at(world_map: np.ndarray, x: float, y: float, size: int, rng) -> Frame:
+    """Round minimap centred on a map position, with the player arrow and noise"""
+    matrix = np.float32([[1, 0, size / 2 - x], [0, 1, size / 2 - y]])
+    crop = cv2.warpAffine(world_map, matrix, (size, size), flags=cv2.INTER_LINEAR)
+    crop = cv2.add(crop, rng.integers(0, 12, crop.shape, dtype=np.uint8))
+    
+    mask = np.zeros((size, size), dtype=np.uint8)
+    cv2.circle(mask, (size // 2, size // 2), size // 2 - 2, 255, -1)
+    crop[mask == 0] = 30
+    cv2.circle(crop, (size // 2, size // 2), 8, (120, 230, 255), -1)
+    return Frame(crop, 'BGR')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark minimap localization")
+    parser.add_argument("--size", type=int, default=6144, help="Side of the synthetic world map")
+    parser.add_argument("--steps", type=int, default=300, help="Positions along the walk")
+    parser.add_argument("--minimap", type=int, default=200, help="Side of the minimap crop")
+    parser.add_argument("--speed", type=float, default=6.0, help="Map pixels moved per step")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(1)
+    world_map = synthetic_world_map(args.size)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        index = FeatureIndex.build(world_map, tmp, log_callback=None)
+        print(f"Index: {len(index)} features in {index.rows}x{index.columns} tiles, "
+              f"built in {time.perf_counter() - start:.1f} s")
+              
+        localizer = MinimapLocalizer(FeatureIndex(tmp))
+        
+        # A wandering walk that stays clear of the map border
+        x, y = args.size / 2, args.size / 2
+        heading = rng.uniform(0, 2 * np.pi)
+        errors, times, failed = [], [], 0
+        for step in range(args.steps):
+            heading += rng.normal(0, 0.15)
+            x = float(np.clip(x + args.speed * np.cos(heading), args.minimap, args.size - args.minimap))
+            y = float(np.clip(y + args.speed * np.sin(heading), args.minimap, args.size - args.minimap))
+            minimap = minimap_at(world_map, x, y, args.minimap, rng)
+            
+            start = time.perf_counter()
+            location = localizer.locate(minimap)
+            elapsed = time.perf_counter() - start
+            
+            if step == 0:
+                print(f"Initial whole-map search: {elapsed * 1000:.0f} ms")
+            else:
+                times.append(elapsed)
+            if location is None:
+                failed += 1
+            else:
+                errors.append(np.hypot(location.x - x, location.y - y))
+                
+    errors = np.array(errors)
+    median = np.median(times)
+    print(f"Tracking: median {median * 1000:.1f} ms ({1 / median:.0f} Hz), "
+          f"p95 {np.percentile(times, 95) * 1000:.1f} ms")
+    print(f"Error: median {np.median(errors):.2f} px, p95 {np.percentile(errors, 95):.2f} px, "
+          f"{failed}/{args.steps} queries failed")
+
+
+if __name__ == "__main__":
+    main()
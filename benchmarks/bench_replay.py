@@ -0,0 +1,103 @@
+"""
+Benchmark perception offline on a recorded capture session
+
+Replays a recording with the virtual clock, so every run sees the same
+frames, and times the navigator's game state check and the object
+detectors per frame. The resulting state sequence is printed as a digest
+so runs can be compared for regressions. Without --recording a synthetic
+session is recorded to a temporary directory first, so no display is needed.
+
+Record a real session by setting capture_recording_dir in the config and
+running a guide.
+
+Usage:
+    python benchmarks/bench_replay.py [--recording DIR] [--runs 2]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from automation.controller import GameController
+from automation.navigator import Navigator
+from screen.frame import Frame
+from screen.recording import CaptureRecorder, ReplayCapture, ReplayWindowTracker
+
+
+def record_synthetic(path: str, frames: int, width: int, height: int):
+    """Record a session of smooth random screens, each shown for a few frames"""
+    rng = np.random.default_rng(0)
+    region = {'left': 100, 'top': 50, 'width': width, 'height': height}
+    with CaptureRecorder(path) as recorder:
+        image = None
+        for i in range(frames):
+            if i % 5 == 0:
+                coarse = rng.integers(0, 256, (height // 60, width // 60, 3), dtype=np.uint8)
+                image = cv2.cvtColor(cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC), cv2.COLOR_BGR2BGRA)
+            recorder.write(Frame(image, 'BGRA', i / 15), region)
+    return recorder
+
+
+def replay(path: str) -> dict:
+    """Run the perception path over every recorded frame once"""
+    capture = ReplayCapture(path, clock='virtual')
+    navigator = Navigator(
+        controller=GameController(dry_run=True),
+        screen_capture=capture,
+        window_tracker=ReplayWindowTracker(capture),
+        log_callback=lambda message: None
+    )
+    
+    states = []
+    start = time.perf_counter()
+    for _ in range(len(capture.reader)):
+        # One recorded frame per iteration, shared by all checks
+        with capture.hold():
+            states.append(navigator.check_game_state().value)
+            frame = capture.capture_frame(region=navigator.window.region())
+            navigator.detector.detect_collectibles(frame)
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'ms': elapsed * 1000 / len(states),
+        'digest': hashlib.sha1(','.join(states).encode()).hexdigest()[:12],
+        'skip_rate': navigator.perception_stats()['skip_rate'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark perception on a recorded session")
+    parser.add_argument("--recording", help="Recording directory (default: record a synthetic one)")
+    parser.add_argument("--runs", type=int, default=2, help="Replays to time and compare")
+    parser.add_argument("--frames", type=int, default=60, help="Frames of the synthetic session")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.recording
+        if path is None:
+            path = os.path.join(tmp, "synthetic")
+            recorder = record_synthetic(path, args.frames, args.width, args.height)
+            print(f"Recorded {recorder.frame_count} synthetic frames: "
+                  f"{recorder.bytes_written / 1e6:.1f} MB of {recorder.raw_bytes / 1e6:.1f} MB raw")
+                  
+        digests = set()
+        for run in range(args.runs):
+            stats = replay(path)
+            digests.add(stats['digest'])
+            print(f"run {run + 1}: {stats['ms']:8.2f} ms/frame  states {stats['digest']}  "
+                  f"skip rate {stats['skip_rate']:.0%}")
+                  
+    print("\nDeterministic: " + ("yes" if len(digests) == 1 else "NO, state sequences differ"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark one detect_game_state call
+
+Compares the original predicate chain (full-resolution RGB array, each
+predicate converting and reducing on its own: gray for loading, gray for
+the dialog, HSV for the centre, gray again for the pause menu, std of the
+minimap) with the StateFeatures path (one Frame, downscaled levels, every
+statistic computed once). Synthetic screens cover the loading, dialog, map
+and world states, plus world screens whose fine minimap texture puts them
+close to the WORLD/UNKNOWN boundary; the states of both paths are compared. Loading screens
+are also timed on their own: most are decided by the sparse probe grid,
+those close to the brightness threshold fall back to the level mean.
+
+Usage:
+    python benchmarks/bench_state.py [--frames 200] [--width 1920 --height 1080]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from screen.detector import GameDetector, GameState
+from screen.frame import Frame
+
+
+def synthetic_screens(width: int, height: int, count: int):
+    """Smooth random BGRA screens at different brightness levels"""
+    rng = np.random.default_rng(0)
+    screens = []
+    for i in range(count):
+        coarse = rng.integers(0, 256, (height // 60, width // 60, 3), dtype=np.uint8)
+        coarse = (coarse * rng.uniform(0.05, 1.0)).astype(np.uint8)
+        image = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC)
+        screens.append(cv2.cvtColor(image, cv2.COLOR_BGR2BGRA))
+    return screens
+
+
+def boundary_screens(detector: GameDetector, width: int, height: int, count: int):
+    """Plain BGRA screens whose minimap has 3 px stripes with a std around the WORLD threshold"""
+    screens = []
+    x, y, mw, mh = detector._scale_region(detector.MINIMAP_REGION)
+    for amplitude in np.linspace(22, 38, count):
+        image = np.full((height, width, 3), 130, dtype=np.uint8)
+        stripes = np.where((np.arange(mw) // 3) % 2 == 0, 130 + amplitude, 130 - amplitude)
+        image[y:y + mh, x:x + mw] = np.round(stripes).astype(np.uint8)[None, :, None]
+        screens.append(cv2.cvtColor(image, cv2.COLOR_BGR2BGRA))
+    return screens
+
+
+def original_state(detector: GameDetector, screen: np.ndarray) -> GameState:
+    """The predicate chain before feature extraction, on an RGB array"""
+    h, w = screen.shape[:2]
+    if np.mean(cv2.cvtColor(screen, cv2.COLOR_RGB2GRAY)) < 30:
+        return GameState.LOADING
+        
+    x, y, rw, rh = detector._scale_region(detector.DIALOG_REGION)
+    if 20 < np.mean(cv2.cvtColor(screen[y:y + rh, x:x + rw], cv2.COLOR_RGB2GRAY)) < 80:
+        return GameState.DIALOG
+        
+    hsv = cv2.cvtColor(screen[h // 3:2 * h // 3, w // 3:2 * w // 3], cv2.COLOR_RGB2HSV)
+    mask = cv2.inRange(hsv, np.array([90, 50, 50]), np.array([130, 255, 255]))
+    if np.sum(mask > 0) / mask.size > 0.15:
+        return GameState.MAP
+        
+    if 40 < np.mean(cv2.cvtColor(screen, cv2.COLOR_RGB2GRAY)) < 70:
+        return GameState.PAUSE_MENU
+        
+    x, y, mw, mh = detector._scale_region(detector.MINIMAP_REGION)
+    if np.std(screen[y:y + mh, x:x + mw]) > 30:
+        return GameState.WORLD
+    return GameState.UNKNOWN
+
+
+def measure(name: str, func, inputs) -> tuple:
+    """Time func over all inputs, return (ms per call, results)"""
+    func(inputs[0])  # Warm up
+    start = time.perf_counter()
+    results = [func(item) for item in inputs]
+    ms = (time.perf_counter() - start) * 1000 / len(inputs)
+    print(f"{name:<10} {ms:8.3f} ms/call")
+    return ms, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detect_game_state")
+    parser.add_argument("--frames", type=int, default=200, help="Number of calls")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+    
+    detector = GameDetector(resolution=(args.width, args.height))
+    screens = synthetic_screens(args.width, args.height, 16) + boundary_screens(detector, args.width, args.height, 8)
+    screens = [screens[i % len(screens)] for i in range(args.frames)]
+    
+    # Old callers passed RGB arrays; the conversion is not part of the call
+    rgb = [cv2.cvtColor(screen, cv2.COLOR_BGRA2RGB) for screen in screens]
+    old_ms, old_states = measure("original", lambda image: original_state(detector, image), rgb)
+    
+    # A fresh Frame per call, so no conversion is reused between calls
+    new_ms, new_states = measure(
+        "features", lambda screen: detector.detect_game_state(Frame(screen)), screens
+    )
+    
+    same = sum(a == b for a, b in zip(old_states, new_states))
+    print(f"\nSpeedup: {old_ms / new_ms:.2f}x")
+    print(f"Same state: {same}/{len(screens)} "
+          f"({', '.join(sorted({state.value for state in old_states}))})")
+          
+    # Loading screens are usually decided by the probe grid alone
+    dark = [i for i, state in enumerate(new_states) if state == GameState.LOADING]
+    if dark:
+        print("\nLoading screens only:")
+        old_ms, _ = measure("original", lambda image: original_state(detector, image), [rgb[i] for i in dark])
+        new_ms, _ = measure("probes", lambda screen: detector.detect_game_state(Frame(screen)), [screens[i] for i in dark])
+        print(f"Speedup: {old_ms / new_ms:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark following a chest between frames
+
+Renders a sequence of screens in which the camera pans across terrain with a
+chest standing on it, which slowly grows (the character approaching). Compares
+running detect_collectibles on every frame with an ObjectTracker started
+from the first detection, which only detects again once its track is lost.
+Reports the per-frame perception cost and the position error of both.
+
+Usage:
+    python benchmarks/bench_tracking.py [--frames 300] [--width 1920 --height 1080]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from screen.detector import GameDetector
+from screen.frame import Frame
+from screen.tracker import ObjectTracker
+
+
+def synthetic_sequence(rng, frames: int, width: int, height: int):
+    """BGRA screens with one chest standing on panning terrain, and the chest centres"""
+    # Terrain larger than the screen, so the camera can pan across it
+    margin = frames * 8
+    # Muted, so accidental blobs of the chest colour stay rare
+    cells = ((height + margin) // 40, (width + margin) // 40)
+    gray = rng.integers(40, 180, (*cells, 1))
+    coarse = np.clip(gray + rng.integers(-20, 20, (*cells, 3)), 0, 255).astype(np.uint8)
+    terrain = cv2.resize(coarse, (width + margin, height + margin), interpolation=cv2.INTER_CUBIC)
+    terrain = cv2.add(terrain, rng.integers(0, 30, terrain.shape, dtype=np.uint8))
+    
+    # The chest stays put on the terrain while the camera turns, so both move on screen
+    ox, oy = margin / 2, margin / 2
+    wx, wy = ox + width * 0.3, oy + height * 0.4
+    vx, vy = -3.0, -1.5
+    w, h = 48.0, 36.0
+    for i in range(frames):
+        # Smoothly varying camera motion, with an occasional jolt
+        vx += rng.normal(0, 0.3)
+        vy += rng.normal(0, 0.3)
+        if rng.random() < 0.02:
+            vx += rng.normal(0, 15)
+        # Keep the chest on screen and the view inside the terrain
+        ox = float(np.clip(ox + vx, max(0, wx - width + 100), min(margin, wx - 100)))
+        oy = float(np.clip(oy + vy, max(0, wy - height + 100), min(margin, wy - 100)))
+        w, h = w * 1.002, h * 1.002
+        
+        left, top = int(ox), int(oy)
+        image = np.ascontiguousarray(terrain[top:top + height, left:left + width])
+        x, y = wx - left, wy - top
+        x0, y0 = int(round(x - w / 2)), int(round(y - h / 2))
+        x1, y1 = int(round(x + w / 2)), int(round(y + h / 2))
+        cv2.rectangle(image, (x0, y0), (x1, y1), (30, 200, 230), -1)  # Gold
+        cv2.rectangle(image, (x0 + 6, (y0 + y1) // 2 - 2), (x1 - 6, (y0 + y1) // 2 + 2), (20, 60, 90), -1)  # Lid
+        yield Frame(cv2.cvtColor(image, cv2.COLOR_BGR2BGRA), 'BGRA', i / 30), ((x0 + x1) / 2, (y0 + y1) / 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark following a chest between frames")
+    parser.add_argument("--frames", type=int, default=300, help="Frames in the sequence")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    detector = GameDetector((args.width, args.height))
+    sequence = list(synthetic_sequence(rng, args.frames, args.width, args.height))
+    
+    # Detection on every frame
+    start = time.perf_counter()
+    detected = [detector.detect_collectibles(frame, ("chest",)) for frame, _ in sequence]
+    detect_ms = (time.perf_counter() - start) * 1000 / len(sequence)
+    detect_errors = [
+        min(np.hypot(o.x - cx, o.y - cy) for o in objects) if objects else np.inf
+        for objects, (_, (cx, cy)) in zip(detected, sequence)
+    ]
+    
+    # Tracking from the first detection, detecting again when lost
+    first, _ = sequence[0]
+    tracker = ObjectTracker(detected[0][0], first)
+    errors, redetections = [], 0
+    start = time.perf_counter()
+    for frame, _ in sequence[1:]:
+        if tracker.update(frame) is None and tracker.lost:
+            redetections += 1
+            objects = detector.detect_collectibles(frame, ("chest",))
+            if objects:
+                px, py = tracker.position
+                tracker = ObjectTracker(min(objects, key=lambda o: (o.x - px)**2 + (o.y - py)**2), frame)
+        errors.append(tracker.position)
+    track_ms = (time.perf_counter() - start) * 1000 / (len(sequence) - 1)
+    track_errors = [np.hypot(x - cx, y - cy) for (x, y), (_, (cx, cy)) in zip(errors, sequence[1:])]
+    
+    print(f"{args.frames} frames at {args.width}x{args.height}")
+    print(f"detect every frame: {detect_ms:6.3f} ms/frame  "
+          f"error median {np.median(detect_errors):.2f} px, p95 {np.percentile(detect_errors, 95):.2f} px")
+    print(f"track:              {track_ms:6.3f} ms/frame  "
+          f"error median {np.median(track_errors):.2f} px, p95 {np.percentile(track_errors, 95):.2f} px  "
+          f"({detect_ms / track_ms:.0f}x, {redetections} re-detections)")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,12 @@ class Config:
     openai_model: str = "gpt-4o"
     openai_base_url: str = "https://api.openai.com/v1"
     
+    # Model routing: try the fast model first, escalate on low confidence
+    model_routing_enabled: bool = True
+    fast_model: str = "gpt-4o-mini"
+    strong_model: str = ""  # Empty = use openai_model
+    routing_confidence_threshold: float = 0.6
+    
     # Game settings
     game_window_title: str = "原神"
     game_resolution_width: int = 1920
@@ -25,11 +31,30 @@ class Config:
     # Automation settings
     action_delay_ms: int = 100  # Delay between actions in milliseconds
     screenshot_interval_ms: int = 500  # Screen capture interval
+    capture_fps: float = 15.0  # Frames per second of the background capture thread
+    capture_buffer_size: int = 8  # Frames kept in the capture ring buffer
+    capture_recording_dir: str = ""  # Record the capture stream of each run here (empty = off)
+    instrumentation_enabled: bool = True  # Record capture/recognition latencies
+    state_classifier_path: str = ""  # Trained game state model (.npz), empty = rules only
+    state_classifier_min_confidence: float = 0.6  # Use the rules below this probability
+    state_watcher_enabled: bool = True  # Check the game state on every captured frame in the background
+    state_watcher_confirm_frames: int = 2  # Consecutive frames needed to accept a new state
+    localization_index_dir: str = ""  # World map feature index for minimap localization (empty = off)
     movement_speed: float = 1.0  # Movement speed multiplier
     
     # Video analysis settings
     frame_sample_interval: float = 1.0  # Extract frame every N seconds
     max_frames_per_analysis: int = 10  # Max frames to send per API call
+    motion_analysis_enabled: bool = True  # Measure movement with local optical flow
+    motion_sample_fps: float = 10.0  # Frames per second used for motion analysis
+    trajectory_enabled: bool = True  # Reconstruct the route from the minimap
+    trajectory_sample_fps: float = 15.0  # Frames per second used for route tracking
+    leg_segmentation_enabled: bool = True  # Split videos at teleports / map openings
+    max_parallel_legs: int = 3  # Legs analyzed at the same time
+    leg_cache_enabled: bool = True  # Reuse results of unchanged legs
+    use_proxy: bool = True  # Play and sample videos from a low-resolution proxy
+    proxy_width: int = 960  # Width of proxy videos in pixels
+    analysis_workers: int = 2  # Videos analyzed at the same time by the job queue
     
     # Safety settings
     emergency_stop_key: str = "F12"  # Key to emergency stop
@@ -87,6 +112,9 @@ class Config:
         if self.frame_sample_interval <= 0:
             errors.append("Frame sample interval must be positive")
         
+        if not 0 <= self.routing_confidence_threshold <= 1:
+            errors.append("Routing confidence threshold must be between 0 and 1")
+            
         return len(errors) == 0, errors
 
 
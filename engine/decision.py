@@ -6,14 +6,20 @@ from typing import Optional, List, Callable
 from dataclasses import dataclass
 from enum import Enum
 import threading
+from pathlib import Path
 
 from video.analyzer import GuideStep, AnalysisResult, ActionType, VideoAnalyzer
 from video.extractor import VideoFrame
 from screen.capture import ScreenCapture
+from screen.capture_service import CaptureService
+from screen.window_tracker import WindowTracker
+from screen.recording import CaptureRecorder, ReplayCapture
+from screen.state_classifier import load_state_classifier
 from screen.detector import GameDetector, GameState
 from automation.controller import GameController
 from automation.navigator import Navigator
-from config import get_config
+from config import get_config, Config
+from instrumentation import get_metrics
 
 
 class ExecutionState(Enum):
@@ -53,26 +59,45 @@ class DecisionEngine:
     - AI vision (real-time decision making)
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        screen_capture: Optional[ScreenCapture] = None,
+        window_tracker: Optional[WindowTracker] = None,
+        controller: Optional[GameController] = None
+    ):
+        """
+        Args:
+            screen_capture: Capture backend, e.g. a ReplayCapture for offline runs
+            window_tracker: Game window tracker, e.g. a ReplayWindowTracker
+            controller: Input controller, e.g. GameController(dry_run=True)
+        """
         self.config = get_config()
         
         # Components
         self.analyzer = VideoAnalyzer()
-        self.screen = ScreenCapture()
+        self.screen = screen_capture or ScreenCapture()
+        self.window_tracker = window_tracker or WindowTracker(self.config.game_window_title)
+        self.capture_service = CaptureService(
+            self.screen, log_callback=self.log, window_tracker=self.window_tracker
+        )
         self.detector = GameDetector(
             resolution=(
                 self.config.game_resolution_width,
                 self.config.game_resolution_height
             )
         )
-        self.controller = GameController(
+        self.detector.state_classifier = load_state_classifier(self.detector, self.log)
+        self.controller = controller or GameController(
             action_delay_ms=self.config.action_delay_ms
         )
+        self.controller.set_coordinate_mapper(self.window_tracker.to_screen)
         self.navigator = Navigator(
             controller=self.controller,
             screen_capture=self.screen,
             detector=self.detector,
-            log_callback=self.log
+            log_callback=self.log,
+            capture_service=self.capture_service,
+            window_tracker=self.window_tracker
         )
         
         # State
@@ -204,6 +229,12 @@ class DecisionEngine:
     
     def _execution_loop(self):
         """Main execution loop (runs in thread)"""
+        recorder = self._start_recording()
+        metrics = get_metrics()
+        metrics.reset()
+        self.capture_service.start()
+        if self.config.state_watcher_enabled:
+            self.navigator.start_state_watcher(self.config.state_watcher_confirm_frames)
         try:
             # Wait for game to be ready
             if not self._wait_for_game():
@@ -218,7 +249,7 @@ class DecisionEngine:
                     self.log(f"🚀 准备执行初始传送: {first_step.description}")
                     
                     # Ensure we are in a state to teleport
-                    screen = self.screen.capture_full_screen(monitor=1)
+                    screen = self.navigator.get_current_screen()
                     state = self.detector.detect_game_state(screen)
                     
                     if state == GameState.WORLD:
@@ -239,6 +270,7 @@ class DecisionEngine:
                 # Execute current step
                 step = self.guide_steps[self.current_step]
                 self.log(f"📍 步骤 {self.current_step + 1}: {step.description}")
+                metrics.set_step(f"{self.current_step + 1}. {step.description}")
                 self.update_progress()
                 
                 success = self._execute_step(step)
@@ -262,18 +294,56 @@ class DecisionEngine:
         except Exception as e:
             self.state = ExecutionState.ERROR
             self.log(f"❌ 执行出错: {str(e)}")
+        finally:
+            self.navigator.stop_state_watcher()
+            self.capture_service.stop()
+            if recorder:
+                self.capture_service.recorder = None
+                recorder.close()
+                self.log(f"💾 已录制 {recorder.frame_count} 帧: {recorder.path}")
+            metrics.set_step("")
+            self._export_metrics()
+            stats = self.navigator.perception_stats()
+            if stats['frames']:
+                self.log(f"👁️ 画面未变化 {stats['unchanged']}/{stats['frames']} 帧，感知跳过率 {stats['skip_rate']:.0%}")
+            # Capture sessions belong to this thread
+            self.screen.release_thread()
+            
+    def _start_recording(self) -> Optional[CaptureRecorder]:
+        """Record the capture stream of this run if a recording directory is set"""
+        if not self.config.capture_recording_dir or isinstance(self.screen, ReplayCapture):
+            return None
+        path = Path(self.config.capture_recording_dir) / time.strftime('%Y%m%d_%H%M%S')
+        recorder = CaptureRecorder(path)
+        self.capture_service.recorder = recorder
+        self.log(f"⏺️ 录制画面到: {path}")
+        return recorder
+        
+    def _export_metrics(self):
+        """Write the latencies of this run next to the config file"""
+        metrics = get_metrics()
+        if not metrics.enabled or not metrics.snapshot()['overall']:
+            return
+        try:
+            metrics_dir = Config.get_config_path().parent / 'metrics'
+            metrics_dir.mkdir(parents=True, exist_ok=True)
+            path = metrics_dir / f"run_{time.strftime('%Y%m%d_%H%M%S')}.json"
+            metrics.export_json(str(path))
+            self.log(f"⏱️ 耗时统计已导出: {path}")
+        except OSError as e:
+            self.log(f"⚠️ 耗时统计导出失败: {e}")
             
     def _wait_for_game(self, timeout: float = 10) -> bool:
         """Wait for game to be ready"""
         self.log("🔍 检测游戏窗口...")
         
-        # Try to find and focus game window first
-        game_window = self.screen.find_game_window()
+        # Try to find and focus game window first; captures follow its client area
+        game_window = self.window_tracker.refresh(force=True)
         if game_window:
             self.log(f"📺 找到游戏窗口: {game_window.title}")
             self.screen.bring_window_to_front(game_window)
-            import time as t
-            t.sleep(0.5)  # Wait for window to come to front
+            time.sleep(0.5)  # Wait for window to come to front
+            self.window_tracker.invalidate()
         else:
             self.log("⚠️ 未找到原神窗口，尝试全屏截图...")
         
@@ -284,10 +354,7 @@ class DecisionEngine:
                 
             try:
                 # Capture screen
-                if game_window:
-                    screen = self.screen.capture_window(game_window)
-                else:
-                    screen = self.screen.capture_full_screen(monitor=1)
+                screen = self.navigator.get_current_screen()
                     
                 if screen is None:
                     self.log("⚠️ 截图失败")
@@ -363,7 +430,8 @@ class DecisionEngine:
     def _handle_move(self, step: GuideStep) -> bool:
         """Handle movement action"""
         direction = step.direction or "forward"
-        duration = step.duration or 2.0
+        # Prefer the duration measured from the video over the model's estimate
+        duration = step.measured_duration or step.duration or 2.0
         
         result = self.controller.move_direction(direction, duration)
         return result.success
@@ -382,7 +450,7 @@ class DecisionEngine:
         
     def _handle_climb(self, step: GuideStep) -> bool:
         """Handle climb action"""
-        duration = step.duration or 3.0
+        duration = step.measured_duration or step.duration or 3.0
         
         # Jump to start climbing, then move forward
         self.controller.jump()
@@ -392,7 +460,7 @@ class DecisionEngine:
         
     def _handle_glide(self, step: GuideStep) -> bool:
         """Handle glide action"""
-        duration = step.duration or 5.0
+        duration = step.measured_duration or step.duration or 5.0
         
         # Jump and hold to glide
         self.controller.jump()
@@ -404,7 +472,7 @@ class DecisionEngine:
         
     def _handle_swim(self, step: GuideStep) -> bool:
         """Handle swim action"""
-        duration = step.duration or 3.0
+        duration = step.measured_duration or step.duration or 3.0
         
         # Sprint to swim faster
         self.controller.sprint_start()
@@ -465,7 +533,7 @@ class DecisionEngine:
         
     def _handle_sprint(self, step: GuideStep) -> bool:
         """Handle sprint action"""
-        duration = step.duration or 2.0
+        duration = step.measured_duration or step.duration or 2.0
         direction = step.direction or "forward"
         
         self.controller.sprint_start()
@@ -526,7 +594,7 @@ class DecisionEngine:
         # This would need screen coordinates - use AI to find target
         if step.target:
             self.log(f"🖱️ 点击: {step.target}")
-            screen = self.screen.capture_full_screen(monitor=1)
+            screen = self.navigator.get_current_screen()
             click_pos = self.navigator.ai_vision.find_click_target(screen, step.target)
             if click_pos:
                 self.controller.click_at(click_pos[0], click_pos[1])
@@ -547,14 +615,14 @@ class DecisionEngine:
         """Use AI to decide what action to take"""
         try:
             # Capture current screen
-            screen = self.screen.capture_full_screen(monitor=1)
+            screen = self.navigator.get_current_screen()
             
             # Create a video frame for analysis
             from video.extractor import VideoFrame
             frame = VideoFrame(
                 frame_number=0,
                 timestamp=0,
-                image=screen
+                image=screen.rgb
             )
             
             # Ask AI what to do
@@ -577,7 +645,7 @@ class DecisionEngine:
         
         try:
             # Analyze current state
-            screen = self.screen.capture_full_screen(monitor=1)
+            screen = self.navigator.get_current_screen()
             state = self.detector.detect_game_state(screen)
             
             if state == GameState.DIALOG:
@@ -0,0 +1,182 @@
+"""
+Latency instrumentation for capture and perception
+
+Entry points of the capture and recognition modules are wrapped with
+@timed. Each call adds its duration to a log-bucketed histogram, kept both
+overall and per guide step, so p50/p95/p99 can be read at any time for
+about a microsecond of overhead per call.
+"""
+import bisect
+import functools
+import json
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from config import get_config
+
+
+# Upper bounds of the histogram buckets: 10 µs to 2 min, 10% apart
+_BUCKET_BOUNDS: List[float] = [1e-5 * 1.1 ** i for i in range(int(math.log(120 / 1e-5, 1.1)) + 2)]
+
+
+class LatencyHistogram:
+    """Call count and latency distribution with ~5% bucket resolution"""
+    
+    BOUNDS = _BUCKET_BOUNDS
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        
+    def add(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+            
+    def percentile(self, q: float) -> float:
+        """Latency in seconds below which q percent of the calls fall"""
+        if not self.calls:
+            return 0.0
+        rank = q / 100 * self.calls
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                # Geometric middle of the bucket, capped by the slowest call
+                lower = self.BOUNDS[i - 1] if i > 0 else 0.0
+                upper = self.BOUNDS[i] if i < len(self.BOUNDS) else self.max
+                return min(math.sqrt(lower * upper) if lower else upper, self.max)
+        return self.max
+        
+    def summary(self) -> Dict[str, float]:
+        """Calls and latencies in milliseconds"""
+        return {
+            'calls': self.calls,
+            'mean_ms': self.total / self.calls * 1000 if self.calls else 0.0,
+            'p50_ms': self.percentile(50) * 1000,
+            'p95_ms': self.percentile(95) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+class Instrumentation:
+    """
+    Latency histograms per operation, overall and per step
+
+    Usage:
+        metrics = get_metrics()
+        metrics.set_step("步骤 3")
+        with metrics.measure("detector.game_state"):
+            ...
+        metrics.export_json("metrics.json")
+    """
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.step = ""  # Label of the step calls are attributed to
+        self._overall: Dict[str, LatencyHistogram] = {}
+        self._steps: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._lock = threading.Lock()
+        
+    def set_step(self, label: str):
+        """Attribute following calls to a step (empty = outside any step)"""
+        self.step = label
+        
+    def record(self, name: str, seconds: float):
+        """Add one call of an operation"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._overall.get(name)
+            if histogram is None:
+                histogram = self._overall[name] = LatencyHistogram()
+            histogram.add(seconds)
+            
+            if self.step:
+                step = self._steps.setdefault(self.step, {})
+                histogram = step.get(name)
+                if histogram is None:
+                    histogram = step[name] = LatencyHistogram()
+                histogram.add(seconds)
+                
+    def measure(self, name: str) -> '_Measurement':
+        """Context manager timing a block"""
+        return _Measurement(self, name)
+        
+    def reset(self):
+        """Drop all recorded calls"""
+        with self._lock:
+            self._overall.clear()
+            self._steps.clear()
+        self.step = ""
+        
+    def snapshot(self) -> Dict[str, Dict]:
+        """Summaries of all operations: {'overall': {name: ...}, 'steps': {step: {name: ...}}}"""
+        with self._lock:
+            return {
+                'overall': {name: h.summary() for name, h in sorted(self._overall.items())},
+                'steps': {
+                    step: {name: h.summary() for name, h in sorted(ops.items())}
+                    for step, ops in self._steps.items()
+                },
+            }
+            
+    def export_json(self, filepath: str):
+        """Write the snapshot to a JSON file"""
+        data = self.snapshot()
+        data['exported_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+class _Measurement:
+    """Times a with-block into an Instrumentation"""
+    
+    __slots__ = ('metrics', 'name', 'start')
+    
+    def __init__(self, metrics: Instrumentation, name: str):
+        self.metrics = metrics
+        self.name = name
+        
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+
+
+# Global instance
+_metrics: Optional[Instrumentation] = None
+
+
+def get_metrics() -> Instrumentation:
+    """Get global instrumentation"""
+    global _metrics
+    if _metrics is None:
+        _metrics = Instrumentation(enabled=get_config().instrumentation_enabled)
+    return _metrics
+
+
+def timed(name: str) -> Callable:
+    """Decorator recording the latency of every call (failed calls included)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = get_metrics()
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,185 @@
+"""
+Model routing for AI calls
+
+Sends each request to a fast, cheap model first and escalates to the
+strong model only when the call fails or the parsed result looks unreliable.
+"""
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+
+from config import get_config
+
+
+@dataclass
+class ModelTier:
+    """A model tier used by the router"""
+    name: str  # "fast" or "strong"
+    model: str
+
+
+@dataclass
+class RoutingDecision:
+    """Outcome of a single routed tier attempt"""
+    label: str
+    tier: str
+    model: str
+    confidence: float
+    latency: float  # in seconds
+    accepted: bool
+    error: str = ""
+
+
+class ModelRouter:
+    """
+    Routes AI requests across model tiers
+
+    Usage:
+        router = ModelRouter(log_callback=print)
+        result = router.route(
+            lambda model: call_api(model),     # returns raw response text
+            lambda text: (parse(text), score)  # returns (result, confidence 0-1)
+        )
+    """
+    
+    def __init__(self, log_callback=None):
+        self.log_callback = log_callback
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, float]] = {}
+        
+    def set_log_callback(self, callback):
+        """Set logger callback"""
+        self.log_callback = callback
+        
+    def _log(self, message: str, log_callback=None):
+        """Log message via callback, falling back to stdout"""
+        callback = log_callback or self.log_callback
+        if callback:
+            callback(message)
+        else:
+            print(message)
+            
+    def get_tiers(self) -> List[ModelTier]:
+        """Get the configured tiers, cheapest first"""
+        config = get_config()
+        strong_model = config.strong_model or config.openai_model
+        
+        tiers = []
+        if config.model_routing_enabled and config.fast_model and config.fast_model != strong_model:
+            tiers.append(ModelTier("fast", config.fast_model))
+        tiers.append(ModelTier("strong", strong_model))
+        return tiers
+        
+    def route(
+        self,
+        call: Callable[[str], str],
+        score: Callable[[str], Tuple[Any, float]],
+        label: str = "",
+        log_callback=None
+    ) -> Any:
+        """
+        Run a request through the tiers
+
+        Args:
+            call: Function(model) -> raw response text
+            score: Function(text) -> (parsed result, confidence 0-1)
+            label: Short name of the request for logging
+            log_callback: Optional callback(message) overriding the router's logger
+
+        Returns:
+            The parsed result of the first tier that is confident enough,
+            or the most confident result if no tier passes the threshold.
+        """
+        config = get_config()
+        threshold = config.routing_confidence_threshold
+        tiers = self.get_tiers()
+        
+        best: Optional[Tuple[Any, float]] = None
+        last_error: Optional[Exception] = None
+        
+        for i, tier in enumerate(tiers):
+            is_last = i == len(tiers) - 1
+            start = time.perf_counter()
+            
+            try:
+                text = call(tier.model)
+                result, confidence = score(text)
+            except Exception as e:
+                latency = time.perf_counter() - start
+                last_error = e
+                self._record(RoutingDecision(
+                    label, tier.name, tier.model, 0.0, latency, False, str(e)
+                ), log_callback)
+                continue
+                
+            latency = time.perf_counter() - start
+            accepted = confidence >= threshold or is_last
+            self._record(RoutingDecision(
+                label, tier.name, tier.model, confidence, latency, accepted
+            ), log_callback)
+            
+            if best is None or confidence > best[1]:
+                best = (result, confidence)
+            if confidence >= threshold:
+                return result
+                
+        if best is not None:
+            return best[0]
+        raise last_error
+        
+    def _record(self, decision: RoutingDecision, log_callback=None):
+        """Log a routing decision and update per-tier statistics"""
+        with self._lock:
+            tier_stats = self.stats.setdefault(decision.tier, {
+                'calls': 0, 'accepted': 0, 'errors': 0, 'total_latency': 0.0
+            })
+            tier_stats['calls'] += 1
+            tier_stats['total_latency'] += decision.latency
+            if decision.error:
+                tier_stats['errors'] += 1
+            elif decision.accepted:
+                tier_stats['accepted'] += 1
+                
+        prefix = f"[{decision.label}] " if decision.label else ""
+        if decision.error:
+            self._log(
+                f"🔀 {prefix}{decision.tier}({decision.model}) 调用失败 "
+                f"{decision.latency:.2f}s: {decision.error[:80]}，升级模型",
+                log_callback
+            )
+        elif decision.accepted:
+            self._log(
+                f"🔀 {prefix}{decision.tier}({decision.model}) 置信度 "
+                f"{decision.confidence:.2f}，耗时 {decision.latency:.2f}s，采用",
+                log_callback
+            )
+        else:
+            self._log(
+                f"🔀 {prefix}{decision.tier}({decision.model}) 置信度 "
+                f"{decision.confidence:.2f} 过低，耗时 {decision.latency:.2f}s，升级模型",
+                log_callback
+            )
+            
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """Get per-tier call counts and average latency"""
+        with self._lock:
+            summary = {}
+            for tier, s in self.stats.items():
+                summary[tier] = dict(s)
+                summary[tier]['avg_latency'] = (
+                    s['total_latency'] / s['calls'] if s['calls'] else 0.0
+                )
+            return summary
+
+
+def confidence_from_label(value: Any, default: float = 1.0) -> float:
+    """Convert a model-reported confidence (number or high/medium/low) to 0-1"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        # Accept both 0-1 and 0-100 scales
+        return max(0.0, min(1.0, value / 100 if value > 1 else float(value)))
+        
+    labels = {'high': 1.0, 'medium': 0.7, 'low': 0.4}
+    return labels.get(str(value).strip().lower(), default)
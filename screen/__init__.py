@@ -2,6 +2,7 @@
 Screen capture and recognition module for Genshin Auto-Guide Helper
 """
 from .capture import ScreenCapture
+from .frame import Frame
 from .detector import GameDetector, GameState, DetectedObject
 from .template_matcher import TemplateMatcher, MatchResult
 from .ocr import GameOCR, TextRegion
@@ -5,11 +5,14 @@ Uses GPT-4 Vision for complex visual understanding
 import base64
 import cv2
 import numpy as np
-from typing import Optional, Tuple, List, Dict, Any
+from typing import Optional, Tuple, List, Dict, Any, Union
 from dataclasses import dataclass
 from openai import OpenAI
 
 from config import get_config
+from model_router import ModelRouter, confidence_from_label
+from .frame import Frame, as_frame
+from instrumentation import timed
 
 
 @dataclass
@@ -96,10 +99,12 @@ class AIVisualAnalyzer:
         self.client: Optional[OpenAI] = None
         self._last_api_key = None
         self.log_callback = log_callback
+        self.router = ModelRouter(log_callback=log_callback)
         
     def set_log_callback(self, callback):
         """Set logger callback"""
         self.log_callback = callback
+        self.router.set_log_callback(callback)
         
     def _log(self, message: str):
         """Log message if callback is set"""
@@ -124,7 +129,13 @@ class AIVisualAnalyzer:
             
         return config
         
-    def _call_api_with_retry(self, messages: List[Dict], max_tokens: int = 800, temperature: float = 0.3) -> str:
+    def _call_api_with_retry(
+        self,
+        messages: List[Dict],
+        max_tokens: int = 800,
+        temperature: float = 0.3,
+        model: Optional[str] = None
+    ) -> str:
         """Call OpenAI API with retry logic"""
         config = self._ensure_client()
         max_retries = 3
@@ -133,7 +144,7 @@ class AIVisualAnalyzer:
         for attempt in range(max_retries):
             try:
                 response = self.client.chat.completions.create(
-                    model=config.openai_model,
+                    model=model or config.openai_model,
                     messages=messages,
                     max_tokens=max_tokens,
                     temperature=temperature
@@ -149,15 +160,70 @@ class AIVisualAnalyzer:
                     
         self._log(f"❌ AI分析最终失败: {str(last_error)}")
         raise last_error
+        
+    def _call_routed(
+        self,
+        messages: List[Dict],
+        required_keys: Tuple[str, ...],
+        max_tokens: int = 800,
+        temperature: float = 0.3,
+        label: str = ""
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Call the API through the model router
+        
+        The fast model is tried once; the strong model is called with
+        retries when the fast answer is missing or unsure.
+        
+        Returns:
+            (parsed JSON dict, raw response text)
+        """
+        self._ensure_client()
+        tiers = self.router.get_tiers()
+        
+        def call(model: str) -> str:
+            if model == tiers[-1].model:
+                return self._call_api_with_retry(messages, max_tokens, temperature, model)
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return response.choices[0].message.content
+            
+        def score(text: str) -> Tuple[Tuple[Dict[str, Any], str], float]:
+            data = self._parse_json_response(text)
+            return (data, text), self._score_response(data, required_keys)
+            
+        return self.router.route(call, score, label=label)
+        
+    def _score_response(self, data: Dict[str, Any], required_keys: Tuple[str, ...]) -> float:
+        """Heuristic confidence of a parsed JSON response (0-1)"""
+        if 'raw_text' in data:
+            return 0.0
+            
+        score = 1.0
+        if required_keys:
+            present = sum(1 for k in required_keys if data.get(k) is not None)
+            score = present / len(required_keys)
+            
+        # Negative answers from the cheap model deserve a second opinion
+        for key in ('found', 'target_found'):
+            if key in data and not data[key]:
+                score = min(score, 0.5)
+                
+        return min(score, confidence_from_label(data.get('confidence')))
 
-    def _image_to_base64(self, image: np.ndarray) -> str:
-        """Convert numpy image to base64"""
-        _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    def _image_to_base64(self, image: Union[Frame, np.ndarray]) -> str:
+        """Convert a Frame or BGR numpy image to base64"""
+        _, buffer = cv2.imencode('.jpg', as_frame(image, 'BGR').bgr, [cv2.IMWRITE_JPEG_QUALITY, 85])
         return base64.b64encode(buffer).decode('utf-8')
         
+    @timed("ai.map_teleport")
     def analyze_map_for_teleport(
         self, 
-        map_image: np.ndarray,
+        map_image: Union[Frame, np.ndarray],
         target_location: str
     ) -> Dict[str, Any]:
         """
@@ -188,10 +254,16 @@ class AIVisualAnalyzer:
             }
         ]
         
-        result_text = self._call_api_with_retry(messages, max_tokens=1000)
-        return self._parse_json_response(result_text)
+        data, _ = self._call_routed(
+            messages,
+            required_keys=('target_found', 'click_position'),
+            max_tokens=1000,
+            label="地图传送"
+        )
+        return data
         
-    def analyze_scene(self, screen: np.ndarray) -> VisualAnalysis:
+    @timed("ai.scene")
+    def analyze_scene(self, screen: Union[Frame, np.ndarray]) -> VisualAnalysis:
         """
         Analyze current game scene
         """
@@ -211,8 +283,12 @@ class AIVisualAnalyzer:
             }
         ]
         
-        result_text = self._call_api_with_retry(messages, max_tokens=800)
-        data = self._parse_json_response(result_text)
+        data, result_text = self._call_routed(
+            messages,
+            required_keys=('scene_type', 'location_description'),
+            max_tokens=800,
+            label="场景分析"
+        )
         
         return VisualAnalysis(
             description=data.get('location_description', ''),
@@ -225,10 +301,11 @@ class AIVisualAnalyzer:
             raw_response=result_text
         )
         
+    @timed("ai.compare")
     def compare_with_reference(
         self, 
-        reference_frame: np.ndarray,
-        current_screen: np.ndarray
+        reference_frame: Union[Frame, np.ndarray],
+        current_screen: Union[Frame, np.ndarray]
     ) -> Dict[str, Any]:
         """
         Compare current screen with a reference frame from guide video
@@ -258,12 +335,18 @@ class AIVisualAnalyzer:
             }
         ]
         
-        result_text = self._call_api_with_retry(messages, max_tokens=800)
-        return self._parse_json_response(result_text)
+        data, _ = self._call_routed(
+            messages,
+            required_keys=('same_location', 'move_direction'),
+            max_tokens=800,
+            label="画面对比"
+        )
+        return data
         
+    @timed("ai.click_target")
     def find_click_target(
         self, 
-        screen: np.ndarray,
+        screen: Union[Frame, np.ndarray],
         target_description: str
     ) -> Optional[Tuple[int, int]]:
         """
@@ -310,8 +393,13 @@ class AIVisualAnalyzer:
             }
         ]
         
-        result_text = self._call_api_with_retry(messages, max_tokens=300, temperature=0.2)
-        data = self._parse_json_response(result_text)
+        data, _ = self._call_routed(
+            messages,
+            required_keys=('found', 'x_percent', 'y_percent'),
+            max_tokens=300,
+            temperature=0.2,
+            label="点击定位"
+        )
         
         if data.get('found'):
             x_pct = data.get('x_percent', 50)
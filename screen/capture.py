@@ -2,11 +2,17 @@
 Screen capture module for capturing game screenshots
 """
 import numpy as np
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict
 import platform
+import threading
+import time
 from dataclasses import dataclass
 from PIL import Image
 
+from .frame import Frame
+from .capture_plan import CapturePlan, PlanCapture
+from instrumentation import timed
+
 # Import mss for cross-platform screen capture
 try:
     import mss
@@ -50,42 +56,183 @@ class WindowInfo:
         return (self.x + self.width // 2, self.y + self.height // 2)
 
 
-class ScreenCapture:
-    """Handles screen and window capture"""
+class CaptureSessions:
+    """
+    Keeps one persistent mss instance per thread
+
+    mss handles (display connection, device contexts, buffers) must not be
+    shared between threads, but opening them for every screenshot is slow.
+    Each thread gets its own instance on first use, which is reused until
+    the thread releases it or the sessions are closed.
+    """
     
     def __init__(self):
-        # We don't initialize persistent mss here anymore to avoid threading issues
-        # on macOS. Instead we create a new instance for each capture.
-        pass
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sessions: Dict[int, Tuple[threading.Thread, object]] = {}  # thread id -> (thread, mss)
+        self._generation = 0
+        
+    def get(self):
+        """Get the mss instance of the calling thread"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is not None and self._local.generation == self._generation:
+            return sct
             
-    def capture_full_screen(self, monitor: int = 1) -> np.ndarray:
+        # Sessions were closed since this instance was opened
+        self.release_thread()
+        
+        sct = _open_mss()
+        with self._lock:
+            self._close_dead_locked()
+            self._sessions[threading.get_ident()] = (threading.current_thread(), sct)
+            self._local.generation = self._generation
+        self._local.sct = sct
+        return sct
+        
+    def release_thread(self):
+        """Close the mss instance of the calling thread"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            return
+            
+        self._local.sct = None
+        with self._lock:
+            self._sessions.pop(threading.get_ident(), None)
+        sct.close()
+        
+    def close(self):
         """
-        Capture full screen
+        Close all sessions
+
+        Instances of finished threads are closed here; live threads close
+        their own on their next capture, since the handles belong to them.
+        """
+        with self._lock:
+            self._generation += 1
+            self._close_dead_locked()
+        self.release_thread()
         
+    def _close_dead_locked(self):
+        """Close instances whose thread has exited (caller holds the lock)"""
+        for ident, (thread, sct) in list(self._sessions.items()):
+            if not thread.is_alive():
+                del self._sessions[ident]
+                try:
+                    sct.close()
+                except Exception:
+                    pass
+                    
+    @property
+    def active_count(self) -> int:
+        """Number of open instances"""
+        with self._lock:
+            return len(self._sessions)
+
+
+def _open_mss():
+    """Open an mss instance, asking for the XShm backend on Linux (mss >= 10.2)"""
+    if platform.system() == 'Linux':
+        try:
+            return mss.mss(backend='xshmgetimage')
+        except TypeError:
+            pass  # Older mss without backend selection
+    return mss.mss()
+
+
+# Shared sessions for the static helpers
+_shared_sessions = CaptureSessions()
+
+
+class ScreenCapture:
+    """Handles screen and window capture"""
+    
+    def __init__(self):
+        # One persistent mss instance per thread; sharing a single instance
+        # across threads breaks on macOS and Windows
+        self._sessions = CaptureSessions()
+        
+    def _session(self):
+        """Get the mss instance of the calling thread"""
+        if not MSS_AVAILABLE:
+            raise RuntimeError("MSS not available for screen capture")
+        return self._sessions.get()
+        
+    @timed("capture.frame")
+    def capture_frame(self, monitor: int = 1, region: Optional[Dict[str, int]] = None) -> Frame:
+        """
+        Capture the screen as a Frame without copying or converting
+
         Args:
             monitor: Monitor index (1 = first monitor)
-            
+            region: Optional {'left', 'top', 'width', 'height'} to capture instead
+
         Returns:
-            RGB numpy array
+            Frame over the screenshot's BGRA buffer
         """
-        if not MSS_AVAILABLE:
-            raise RuntimeError("MSS not available for screen capture")
-            
-        with mss.mss() as sct:
+        sct = self._session()
+        
+        if region is None:
             # Get monitor info (handle case where monitor index out of range)
             if monitor >= len(sct.monitors):
                 monitor = 1  # Fallback to primary
+            region = sct.monitors[monitor]
             
-            mon = sct.monitors[monitor]
+        return Frame.from_screenshot(sct.grab(region), time.monotonic())
+        
+    @timed("capture.plan")
+    def capture_plan(
+        self,
+        plan: CapturePlan,
+        monitor: int = 1,
+        mode: Optional[str] = None,
+        area: Optional[Dict[str, int]] = None
+    ) -> PlanCapture:
+        """
+        Capture only the regions of a plan
+        
+        Args:
+            plan: Regions to capture, relative to the area
+            monitor: Monitor index (1 = first monitor), used when no area is given
+            mode: 'union' grabs the bounding box once, 'regions' grabs each
+                region; None picks whichever moves fewer pixels
+            area: Screen area the plan is relative to, e.g. the game window's client area
+        """
+        mon = area or self.get_monitor(monitor)
+        # Regions follow the size of the captured area, e.g. a resized game window
+        plan = plan.resized((mon['width'], mon['height']))
+        mode = mode or plan.choose_mode()
+        
+        def grab(x: int, y: int, w: int, h: int) -> Frame:
+            return self.capture_frame(region={
+                'left': mon['left'] + x, 'top': mon['top'] + y, 'width': w, 'height': h
+            })
             
-            # Capture
-            screenshot = sct.grab(mon)
+        frames = {}
+        if mode == 'union':
+            bx, by, bw, bh = plan.bounding_box()
+            union = grab(bx, by, bw, bh)
+            for region in plan:
+                frames[region.name] = union.crop(region.x - bx, region.y - by, region.width, region.height)
+            pixels = bw * bh
+        else:
+            for region in plan:
+                frames[region.name] = grab(region.x, region.y, region.width, region.height)
+            pixels = plan.region_pixels
             
-            # Convert to numpy array (BGRA format)
-            img = np.array(screenshot)
+        return PlanCapture(plan, frames, pixels, time.monotonic())
+        
+    def capture_full_screen(self, monitor: int = 1) -> np.ndarray:
+        """
+        Capture full screen
+        
+        Args:
+            monitor: Monitor index (1 = first monitor)
             
-            # Convert BGRA to RGB
-            return img[:, :, :3][:, :, ::-1]
+        Returns:
+            RGB numpy array
+        """
+        # One conversion straight from the BGRA buffer, no intermediate copy
+        return self._writable(self.capture_frame(monitor).rgb)
         
     def capture_region(
         self, 
@@ -100,20 +247,19 @@ class ScreenCapture:
         Returns:
             RGB numpy array
         """
-        if not MSS_AVAILABLE:
-            raise RuntimeError("MSS not available for screen capture")
-            
-        with mss.mss() as sct:
-            region = {
-                'left': int(left),
-                'top': int(top),
-                'width': int(width),
-                'height': int(height)
-            }
-            
-            screenshot = sct.grab(region)
-            img = np.array(screenshot)
-            return img[:, :, :3][:, :, ::-1]
+        region = {
+            'left': int(left),
+            'top': int(top),
+            'width': int(width),
+            'height': int(height)
+        }
+        return self._writable(self.capture_frame(region=region).rgb)
+        
+    @staticmethod
+    def _writable(image: np.ndarray) -> np.ndarray:
+        """Make a conversion of an unshared frame writable again for the caller"""
+        image.flags.writeable = True
+        return image
         
     def capture_window(self, window_info: WindowInfo) -> Optional[np.ndarray]:
         """
@@ -167,11 +313,15 @@ class ScreenCapture:
                 return True
                 
             win32gui.EnumWindows(enum_callback, windows)
-        else:
-            # For non-Windows platforms, we can use wmctrl or xdotool on Linux
-            # For macOS, we would need Quartz
-            # For now, return empty list
-            pass
+        elif platform.system() == 'Linux':
+            from .x11_backend import get_backend
+            backend = get_backend()
+            if backend is not None:
+                try:
+                    windows = backend.find_windows(title_contains)
+                except RuntimeError:
+                    pass
+        # macOS would need Quartz; no windows are listed there
             
         return windows
         
@@ -209,15 +359,31 @@ class ScreenCapture:
                 return True
             except:
                 pass
+        elif platform.system() == 'Linux':
+            from .x11_backend import get_backend
+            backend = get_backend()
+            if backend is not None:
+                try:
+                    return backend.activate(window_info)
+                except RuntimeError:
+                    pass
         return False
         
+    @staticmethod
+    def get_monitor(monitor: int = 1) -> Dict[str, int]:
+        """Get the geometry (left, top, width, height) of a monitor"""
+        if MSS_AVAILABLE:
+            monitors = _shared_sessions.get().monitors
+            mon = monitors[monitor] if monitor < len(monitors) else monitors[1]
+            return {key: mon[key] for key in ('left', 'top', 'width', 'height')}
+        return {'left': 0, 'top': 0, 'width': 1920, 'height': 1080}
+        
     @staticmethod
     def get_screen_size() -> Tuple[int, int]:
         """Get primary screen size"""
         if MSS_AVAILABLE:
-            with mss.mss() as sct:
-                mon = sct.monitors[1]  # Primary monitor
-                return mon['width'], mon['height']
+            mon = _shared_sessions.get().monitors[1]  # Primary monitor
+            return mon['width'], mon['height']
         return (1920, 1080)  # Default fallback
         
     def to_pil_image(self, img_array: np.ndarray) -> Image.Image:
@@ -229,11 +395,14 @@ class ScreenCapture:
         img = Image.fromarray(img_array)
         img.save(filepath)
         
+    def release_thread(self):
+        """Release the capture session of the calling thread (call before a worker thread exits)"""
+        self._sessions.release_thread()
+        _shared_sessions.release_thread()
+        
     def close(self):
         """Clean up resources"""
-        if self.sct:
-            self.sct.close()
-            self.sct = None
+        self._sessions.close()
             
     def __enter__(self):
         return self
@@ -0,0 +1,139 @@
+"""
+Capture plans: named screen regions captured instead of the whole monitor
+
+Most checks only look at fixed UI regions. A plan lists those regions,
+scaled from the 1920x1080 layout constants, and the capture layer grabs
+either their union bounding box or each region separately, whichever
+moves fewer pixels.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Tuple
+
+from .frame import Frame
+
+
+@dataclass
+class PlanRegion:
+    """A named region in monitor pixels"""
+    name: str
+    x: int
+    y: int
+    width: int
+    height: int
+    
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+class CapturePlan:
+    """
+    A set of named regions to capture
+
+    Usage:
+        plan = CapturePlan((2560, 1440))
+        plan.add("minimap", GameDetector.MINIMAP_REGION)
+        capture = screen_capture.capture_plan(plan)
+        minimap = capture["minimap"]  # Frame
+    """
+    
+    # Grab the union box unless it is this much larger than the regions
+    UNION_OVERHEAD = 1.5
+    
+    def __init__(self, resolution: Tuple[int, int] = (1920, 1080)):
+        self.resolution = resolution
+        self.scale_x = resolution[0] / 1920
+        self.scale_y = resolution[1] / 1080
+        self.regions: Dict[str, PlanRegion] = {}
+        self._layout: Dict[str, Tuple[int, int, int, int]] = {}  # 1920x1080 regions
+        self._resized: Dict[Tuple[int, int], 'CapturePlan'] = {}
+        
+    def add(self, name: str, region: Tuple[int, int, int, int]) -> 'CapturePlan':
+        """Register a region given in 1920x1080 coordinates (x, y, w, h)"""
+        self._layout[name] = region
+        self._resized.clear()
+        x, y, w, h = region
+        self.regions[name] = PlanRegion(
+            name,
+            int(x * self.scale_x),
+            int(y * self.scale_y),
+            int(w * self.scale_x),
+            int(h * self.scale_y)
+        )
+        return self
+        
+    def resized(self, resolution: Tuple[int, int]) -> 'CapturePlan':
+        """Get the same plan for another capture size (cached)"""
+        resolution = tuple(resolution)
+        if resolution == tuple(self.resolution):
+            return self
+        plan = self._resized.get(resolution)
+        if plan is None:
+            plan = CapturePlan(resolution)
+            for name, region in self._layout.items():
+                plan.add(name, region)
+            self._resized[resolution] = plan
+        return plan
+        
+    def __iter__(self) -> Iterator[PlanRegion]:
+        return iter(self.regions.values())
+        
+    def __len__(self) -> int:
+        return len(self.regions)
+        
+    def bounding_box(self) -> Tuple[int, int, int, int]:
+        """Get the union bounding box (x, y, w, h) of all regions"""
+        if not self.regions:
+            return (0, 0, 0, 0)
+        left = min(r.x for r in self)
+        top = min(r.y for r in self)
+        right = max(r.x + r.width for r in self)
+        bottom = max(r.y + r.height for r in self)
+        return (left, top, right - left, bottom - top)
+        
+    @property
+    def region_pixels(self) -> int:
+        """Pixels when each region is grabbed separately"""
+        return sum(r.pixels for r in self)
+        
+    @property
+    def union_pixels(self) -> int:
+        """Pixels when the bounding box is grabbed"""
+        _, _, w, h = self.bounding_box()
+        return w * h
+        
+    def choose_mode(self) -> str:
+        """Pick 'union' (one grab) or 'regions' (one grab per region)"""
+        if self.union_pixels <= self.region_pixels * self.UNION_OVERHEAD:
+            return 'union'
+        return 'regions'
+
+
+class PlanCapture:
+    """Frames captured for the regions of a plan"""
+    
+    def __init__(self, plan: CapturePlan, frames: Dict[str, Frame], pixels: int, timestamp: float = 0.0):
+        self.plan = plan
+        self.frames = frames
+        self.pixels = pixels  # Pixels actually grabbed
+        self.timestamp = timestamp
+        
+    def __getitem__(self, name: str) -> Frame:
+        return self.frames[name]
+        
+    def __contains__(self, name: str) -> bool:
+        return name in self.frames
+        
+    def get(self, name: str) -> Optional[Frame]:
+        return self.frames.get(name)
+        
+    def origin(self, name: str) -> Tuple[int, int]:
+        """Monitor position of a region's top-left corner"""
+        region = self.plan.regions[name]
+        return (region.x, region.y)
+        
+    @property
+    def pixel_fraction(self) -> float:
+        """Grabbed pixels as a fraction of the full screen"""
+        width, height = self.plan.resolution
+        return self.pixels / (width * height)
@@ -0,0 +1,208 @@
+"""
+Background screen capture service
+
+A single thread captures the screen at a fixed rate into a ring buffer of
+timestamped frames. Consumers read the latest frame instead of capturing
+themselves, so the capture cost is paid once per tick no matter how many
+detectors look at the screen. Frames wrap the screenshot buffers without
+copying, and their colour conversions are shared by all consumers.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .capture import ScreenCapture
+from .frame import Frame
+from config import get_config
+
+
+@dataclass
+class CapturedFrame:
+    """A frame in the ring buffer"""
+    index: int  # Sequence number, increases by one per capture
+    timestamp: float  # time.monotonic() when the capture finished
+    frame: Frame  # BGRA screenshot with cached conversions
+    
+    @property
+    def age(self) -> float:
+        """Seconds since the frame was captured"""
+        return time.monotonic() - self.timestamp
+
+
+class CaptureService:
+    """
+    Captures the screen on its own thread at a configurable FPS
+
+    The ring holds the last buffer_size frames; older frames stay valid as
+    long as a consumer keeps a reference.
+
+    Usage:
+        service = CaptureService()
+        service.start()
+        frame = service.latest()
+        newer = service.wait_for_newer(frame.timestamp)
+        service.stop()
+    """
+    
+    def __init__(
+        self,
+        screen_capture: Optional[ScreenCapture] = None,
+        fps: Optional[float] = None,
+        buffer_size: Optional[int] = None,
+        monitor: int = 1,
+        log_callback=None,
+        window_tracker=None,
+        recorder=None
+    ):
+        config = get_config()
+        self.screen = screen_capture or ScreenCapture()
+        self.fps = fps or config.capture_fps
+        self.buffer_size = max(2, buffer_size or config.capture_buffer_size)
+        self.monitor = monitor
+        self.log_callback = log_callback
+        self.window_tracker = window_tracker  # Capture only the game window when set
+        self.recorder = recorder  # CaptureRecorder that gets every captured frame
+        
+        self._frames: List[Optional[Frame]] = [None] * self.buffer_size
+        self._count = 0  # Frames captured so far
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+    def log(self, message: str):
+        """Log a message"""
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+            
+    @property
+    def interval(self) -> float:
+        """Seconds between two captures"""
+        return 1.0 / self.fps
+        
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+        
+    @property
+    def frame_count(self) -> int:
+        """Number of frames captured since start"""
+        return self._count
+        
+    # ================== Lifecycle ==================
+    
+    def start(self):
+        """Start the capture thread"""
+        if self.is_running:
+            return
+            
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._capture_loop, name="CaptureService", daemon=True)
+        self._thread.start()
+        
+    def stop(self, timeout: float = 1.0):
+        """Stop the capture thread"""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+            
+    def _capture_loop(self):
+        """Capture loop (runs in thread)"""
+        next_tick = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self._capture_one()
+                except Exception as e:
+                    self.log(f"⚠️ 后台截图失败: {str(e)[:50]}")
+                    self._stop_event.wait(0.5)
+                    
+                # Fixed schedule; ticks missed while capturing are skipped, not queued
+                next_tick += self.interval
+                now = time.monotonic()
+                if next_tick < now:
+                    next_tick = now
+                self._stop_event.wait(next_tick - now)
+        finally:
+            # The mss session belongs to this thread
+            self.screen.release_thread()
+            
+    def _capture_one(self):
+        """Capture one frame into the next ring buffer slot"""
+        region = self.window_tracker.region() if self.window_tracker else None
+        frame = self.screen.capture_frame(self.monitor, region)
+        if self.recorder:
+            self.recorder.write(frame, region or self.screen.get_monitor(self.monitor))
+            
+        with self._condition:
+            self._frames[self._count % self.buffer_size] = frame
+            self._count += 1
+            self._condition.notify_all()
+            
+    # ================== Consumers ==================
+    
+    def _frame_locked(self, index: int) -> CapturedFrame:
+        """Build the frame of a sequence number (caller holds the lock)"""
+        frame = self._frames[index % self.buffer_size]
+        return CapturedFrame(index, frame.timestamp, frame)
+        
+    def latest(self, max_age: Optional[float] = None) -> Optional[CapturedFrame]:
+        """
+        Get the most recent frame
+
+        Args:
+            max_age: Return None if the latest frame is older than this (seconds)
+        """
+        with self._condition:
+            if self._count == 0:
+                return None
+            frame = self._frame_locked(self._count - 1)
+            
+        if max_age is not None and frame.age > max_age:
+            return None
+        return frame
+        
+    def wait_for_newer(self, timestamp: float, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        """
+        Wait for a frame captured after a timestamp
+
+        Args:
+            timestamp: time.monotonic() value, e.g. of the previous frame
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            The newest frame, or None on timeout or when stopped
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not self._stop_event.is_set():
+                if self._count:
+                    frame = self._frame_locked(self._count - 1)
+                    if frame.timestamp > timestamp:
+                        return frame
+                        
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+        return None
+        
+    def get_screen(self, max_age: Optional[float] = None) -> Optional[Frame]:
+        """
+        Get a current screen frame
+
+        Uses the latest frame if it is at most max_age old (default two
+        capture intervals), otherwise waits for the next capture.
+        """
+        if max_age is None:
+            max_age = 2 * self.interval
+            
+        frame = self.latest(max_age)
+        if frame is None:
+            frame = self.wait_for_newer(time.monotonic() - max_age, timeout=max(1.0, 4 * self.interval))
+        return frame.frame if frame else None
@@ -0,0 +1,192 @@
+"""
+Cheap frame change detection
+
+Compares a sparse grid of pixel probes with their values at the last
+reported change to tag each frame as unchanged, changed in some regions, or
+globally changed. Slow fades add up until they count as a change. Polling
+loops use this to reuse perception results while the screen stands still
+(menus, dialog, loading screens, the map).
+"""
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .frame import Frame, as_frame
+from .capture_plan import PlanCapture
+
+
+class ChangeKind(Enum):
+    """How a frame differs from the reference"""
+    UNCHANGED = "unchanged"
+    ROI = "roi"  # Local change, see FrameChange.regions
+    GLOBAL = "global"
+
+
+@dataclass
+class FrameChange:
+    """Change of a frame against the reference"""
+    kind: ChangeKind
+    regions: List[str] = field(default_factory=list)  # Named regions with changed probes
+    changed_fraction: float = 0.0  # Fraction of probes that changed
+    
+    def affects(self, regions: Optional[Iterable[str]] = None) -> bool:
+        """Check if a result depending on these regions (None = whole screen) may differ"""
+        if self.kind == ChangeKind.UNCHANGED:
+            return False
+        if self.kind == ChangeKind.GLOBAL or regions is None:
+            return True
+        return any(name in self.regions for name in regions)
+
+
+class ChangeDetector:
+    """
+    Tags frames by comparing sparse pixel probes with a reference
+
+    A probe's reference is its value when it last counted as changed, so a
+    change spread over many frames is reported once it adds up past the
+    threshold, instead of never.
+
+    Usage:
+        detector = ChangeDetector({"minimap": GameDetector.MINIMAP_REGION})
+        change = detector.update(frame)
+        if change.affects(["minimap"]):
+            ...
+    """
+    
+    GRID = (64, 36)  # Probes across a full frame (columns, rows)
+    REGION_GRID = (16, 16)  # Probes per region of a plan capture
+    PIXEL_THRESHOLD = 24  # Change of a probe's channel sum that counts
+    GLOBAL_FRACTION = 0.3  # More changed probes than this is a global change
+    
+    def __init__(self, regions: Optional[Dict[str, Tuple[int, int, int, int]]] = None):
+        # Named regions in 1920x1080 coordinates, used for full frames
+        self.regions = regions or {}
+        
+        self._reference: Optional[Dict[str, np.ndarray]] = None
+        self._region_masks: Dict[Tuple[int, int], Dict[str, np.ndarray]] = {}
+        
+        self.frames = 0
+        self.counts = {kind: 0 for kind in ChangeKind}
+        
+    def reset(self):
+        """Forget the reference frame"""
+        self._reference = None
+        
+    def update(self, screen: Union[Frame, np.ndarray, PlanCapture]) -> FrameChange:
+        """Compare a frame with the reference and move the changed probes' reference to it"""
+        if isinstance(screen, PlanCapture):
+            probes = {name: self._probe(frame, self.REGION_GRID) for name, frame in screen.frames.items()}
+        else:
+            frame = as_frame(screen)
+            probes = {'': self._probe(frame, self.GRID)}
+            
+        change, changed = self._compare(self._reference, probes, screen)
+        if changed is None:
+            self._reference = probes
+        else:
+            # Unchanged probes keep their reference, so slow drift accumulates
+            for name, mask in changed.items():
+                self._reference[name] = np.where(mask, probes[name], self._reference[name])
+        
+        self.frames += 1
+        self.counts[change.kind] += 1
+        return change
+        
+    def _compare(self, reference, probes, screen) -> Tuple[FrameChange, Optional[Dict[str, np.ndarray]]]:
+        """Classify the difference between two probe sets, also returns the changed probe masks"""
+        if reference is None or reference.keys() != probes.keys() or any(
+            reference[name].shape != probes[name].shape for name in probes
+        ):
+            return FrameChange(ChangeKind.GLOBAL, list(probes), 1.0), None
+            
+        changed = {
+            name: np.abs(probes[name] - reference[name]) > self.PIXEL_THRESHOLD
+            for name in probes
+        }
+        total = sum(mask.size for mask in changed.values())
+        fraction = sum(int(mask.sum()) for mask in changed.values()) / total
+        
+        if fraction == 0:
+            return FrameChange(ChangeKind.UNCHANGED), changed
+            
+        if isinstance(screen, PlanCapture):
+            regions = [name for name, mask in changed.items() if mask.any()]
+        else:
+            height, width = as_frame(screen).shape[:2]
+            masks = self._masks_for((width, height))
+            regions = [name for name, mask in masks.items() if (changed[''] & mask).any()]
+            
+        kind = ChangeKind.GLOBAL if fraction > self.GLOBAL_FRACTION else ChangeKind.ROI
+        return FrameChange(kind, regions, fraction), changed
+        
+    @staticmethod
+    def _probe(frame: Frame, grid: Tuple[int, int]) -> np.ndarray:
+        """Sample a grid of pixels, summing the colour channels (no conversion)"""
+        height, width = frame.shape[:2]
+        xs = np.linspace(0, width - 1, min(grid[0], width)).astype(np.intp)
+        ys = np.linspace(0, height - 1, min(grid[1], height)).astype(np.intp)
+        samples = frame.color[np.ix_(ys, xs)].astype(np.int16)
+        return samples.sum(axis=2) if samples.ndim == 3 else samples * 3
+        
+    def _masks_for(self, size: Tuple[int, int]) -> Dict[str, np.ndarray]:
+        """Probe masks of the named regions for a frame size (cached)"""
+        masks = self._region_masks.get(size)
+        if masks is not None:
+            return masks
+            
+        width, height = size
+        sx, sy = width / 1920, height / 1080
+        xs = np.linspace(0, width - 1, min(self.GRID[0], width))
+        ys = np.linspace(0, height - 1, min(self.GRID[1], height))
+        
+        masks = {}
+        for name, (x, y, w, h) in self.regions.items():
+            in_x = (xs >= x * sx) & (xs < (x + w) * sx)
+            in_y = (ys >= y * sy) & (ys < (y + h) * sy)
+            masks[name] = np.outer(in_y, in_x)
+        self._region_masks[size] = masks
+        return masks
+
+
+class PerceptionMemo:
+    """
+    Reuses perception results while the regions they depend on are unchanged
+
+    Usage:
+        memo = PerceptionMemo()
+        state = memo.get("state", change, lambda: detector.detect_game_state(frame))
+    """
+    
+    def __init__(self):
+        self._results: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        
+    def get(
+        self,
+        key: str,
+        change: FrameChange,
+        compute: Callable[[], Any],
+        regions: Optional[Iterable[str]] = None
+    ) -> Any:
+        """Return the cached result unless the change affects its regions"""
+        if key in self._results and not change.affects(regions):
+            self.hits += 1
+            return self._results[key]
+            
+        self.misses += 1
+        result = compute()
+        self._results[key] = result
+        return result
+        
+    def clear(self):
+        """Drop all cached results"""
+        self._results.clear()
+        
+    @property
+    def skip_rate(self) -> float:
+        """Fraction of lookups answered from the cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
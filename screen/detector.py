@@ -4,8 +4,14 @@ Game state detector using screen recognition
 import cv2
 import numpy as np
 from enum import Enum
-from typing import Optional, Tuple, List, Dict
+from typing import Optional, Tuple, List, Dict, Iterable, Union
 from dataclasses import dataclass
+from functools import cached_property
+
+from .frame import Frame, as_frame
+from .capture_plan import CapturePlan, PlanCapture
+from .heading import HeadingEstimator
+from instrumentation import timed
 
 
 class GameState(Enum):
@@ -50,16 +56,141 @@ class DetectedObject:
         )
 
 
+class StateFeatures:
+    """
+    Statistics the game state predicates look at, each computed once per frame
+
+    Features are computed on first access, so a state decided early (e.g.
+    loading) never pays for the later ones. Each region is read at the
+    pyramid level in LEVELS; brightness comes from the channel means, so no
+    gray image is built. Brightness thresholds are first decided from a
+    sparse probe grid of the full-resolution screen and only fall back to
+    the level mean when the probes are too close to the threshold.
+    """
+    
+    LEVELS = {'overview': 2, 'dialog': 2, 'center': 2, 'minimap': 0}  # Downscaling would lower the minimap std
+    PROBE_GRID = (24, 16)  # Columns and rows of pixels sampled for the fast path
+    PROBE_MARGIN = 8  # Gray levels around a threshold where the probes are not trusted
+    
+    # Map colours (light blues) in OpenCV HSV
+    MAP_HSV_LOWER = np.array([90, 50, 50])
+    MAP_HSV_UPPER = np.array([130, 255, 255])
+    
+    # Luma weights as used by cv2's gray conversion
+    _LUMA = {'BGR': (0.114, 0.587, 0.299), 'RGB': (0.299, 0.587, 0.114)}
+    
+    def __init__(self, overview: Frame, dialog: Frame, center: Frame, minimap: Optional[Frame]):
+        # Full resolution regions; levels are only built for the features that need them
+        self._sources = {'overview': overview, 'dialog': dialog, 'center': center, 'minimap': minimap}
+        
+    def _level(self, name: str) -> Optional[Frame]:
+        source = self._sources[name]
+        return source.level(self.LEVELS[name]) if source is not None else None
+        
+    @cached_property
+    def overview(self) -> Frame:
+        return self._level('overview')
+        
+    @cached_property
+    def dialog(self) -> Frame:
+        return self._level('dialog')
+        
+    @cached_property
+    def center(self) -> Frame:
+        return self._level('center')
+        
+    @cached_property
+    def minimap(self) -> Optional[Frame]:
+        return self._level('minimap')
+        
+    @staticmethod
+    def _brightness(frame: Frame) -> float:
+        """Mean gray value, from the channel means"""
+        if frame.order == 'GRAY':
+            return cv2.mean(frame.data)[0]
+        weights = StateFeatures._LUMA['BGR' if frame.order == 'BGRA' else frame.order]
+        # Native data: a 3-of-4 channel view would make cv2 copy the image
+        means = cv2.mean(frame.data)
+        return sum(w * m for w, m in zip(weights, means))
+        
+    @cached_property
+    def brightness(self) -> float:
+        """Mean brightness of the whole screen"""
+        return self._brightness(self.overview)
+        
+    @cached_property
+    def probe_brightness(self) -> float:
+        """Mean brightness of a sparse pixel grid of the whole screen"""
+        source = self._sources['overview']
+        samples = source.sample(*self.PROBE_GRID)
+        if source.order == 'GRAY':
+            return float(samples.mean())
+        weights = self._LUMA['BGR' if source.order == 'BGRA' else source.order]
+        means = samples.reshape(-1, samples.shape[-1]).mean(axis=0)
+        return float(sum(w * m for w, m in zip(weights, means)))
+        
+    def brightness_below(self, threshold: float) -> bool:
+        """Check brightness < threshold, from the probes unless they are too close to call"""
+        probe = self.probe_brightness
+        if probe < threshold - self.PROBE_MARGIN:
+            return True
+        if probe >= threshold + self.PROBE_MARGIN:
+            return False
+        return self.brightness < threshold
+        
+    @cached_property
+    def dialog_brightness(self) -> float:
+        """Mean brightness of the dialog box area"""
+        return self._brightness(self.dialog)
+        
+    @cached_property
+    def map_color_ratio(self) -> float:
+        """Fraction of map-coloured pixels in the screen centre"""
+        mask = cv2.inRange(self.center.hsv, self.MAP_HSV_LOWER, self.MAP_HSV_UPPER)
+        return cv2.countNonZero(mask) / mask.size
+        
+    @cached_property
+    def minimap_std(self) -> Optional[float]:
+        """Standard deviation over all colour values of the minimap"""
+        if self.minimap is None:
+            return None
+        # Pooled over channels from per-channel statistics, equal to np.std of all values
+        data = self.minimap.data
+        channels = 1 if data.ndim == 2 else min(data.shape[2], 3)  # Without alpha
+        means, stds = cv2.meanStdDev(data)
+        means, stds = means.ravel()[:channels], stds.ravel()[:channels]
+        variance = np.mean(stds ** 2 + means ** 2) - np.mean(means) ** 2
+        return float(np.sqrt(max(variance, 0.0)))
+
+
+@dataclass(frozen=True)
+class CollectibleClass:
+    """Colour blob class found by GameDetector.detect_collectibles"""
+    name: str  # object_type of the detections
+    lower_hsv: Tuple[int, int, int]
+    upper_hsv: Tuple[int, int, int]
+    min_area: int  # Blob pixels at full resolution
+    confidence: float
+    aspect_range: Optional[Tuple[float, float]] = None  # Allowed width / height
+
+
 @dataclass
 class MinimapInfo:
     """Information extracted from the minimap"""
     player_direction: float  # Angle in degrees (0 = north)
     has_waypoint: bool
     waypoint_direction: Optional[float] = None  # Direction to waypoint
+    direction_confidence: float = 0.0  # Match of the player arrow, 0 = not found
     
     
 class GameDetector:
-    """Detects game state and objects from screenshots"""
+    """
+    Detects game state and objects from screenshots
+
+    Methods take a Frame or an RGB numpy array. Pass the same Frame to
+    several methods to share its gray/HSV conversions. State checks read
+    a StateFeatures computed once per frame on downscaled copies.
+    """
     
     # UI element positions (relative to 1920x1080 resolution)
     # These need calibration for different resolutions
@@ -67,12 +198,30 @@ class GameDetector:
     HEALTH_BAR_REGION = (85, 200, 150, 20)  # HP bar
     INTERACTION_PROMPT_REGION = (900, 500, 120, 50)  # "F" prompt area
     DIALOG_REGION = (300, 650, 1320, 150)  # Dialog text area
+    CENTER_REGION = (640, 360, 640, 360)  # Middle third, where the map shows
+    PROMPT_SEARCH_REGION = (864, 378, 384, 324)  # Area searched for the "F" prompt
+    # Thin full-width rows across the screen; in plan captures they stand in
+    # for the whole screen's brightness at a few percent of its pixels
+    OVERVIEW_STRIPS = tuple((0, y, 1920, 8) for y in (131, 401, 671, 941))
+    
+    # Collectibles found by colour; basic detection, hence the low confidence
+    COLLECTIBLES = (
+        CollectibleClass("chest", (15, 100, 100), (30, 255, 255), 500, 0.5, (0.5, 2.0)),  # Golden/brown
+        CollectibleClass("oculus", (85, 150, 150), (100, 255, 255), 200, 0.4),  # Cyan glow (Anemo)
+    )
+    COLLECTIBLE_LEVEL = 1  # Pyramid level the blobs are searched on
     
     def __init__(self, resolution: Tuple[int, int] = (1920, 1080)):
         self.resolution = resolution
         self.scale_x = resolution[0] / 1920
         self.scale_y = resolution[1] / 1080
         
+        # Trained model used before the rules (screen.state_classifier.StateClassifier)
+        self.state_classifier = None
+        
+        # Rotation lookup for the minimap arrow, built once
+        self.heading_estimator = HeadingEstimator(scale=self.scale_y)
+        
     def _scale_region(self, region: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
         """Scale a region to current resolution"""
         x, y, w, h = region
@@ -83,131 +232,161 @@ class GameDetector:
             int(h * self.scale_y)
         )
         
-    def detect_game_state(self, screen: np.ndarray) -> GameState:
+    def minimap_region(self) -> Tuple[int, int, int, int]:
+        """Minimap region (x, y, w, h) at the current resolution"""
+        return self._scale_region(self.MINIMAP_REGION)
+        
+    def game_state_plan(self) -> CapturePlan:
+        """Capture plan with the regions detect_game_state needs"""
+        plan = (CapturePlan(self.resolution)
+                .add("center", self.CENTER_REGION)
+                .add("dialog", self.DIALOG_REGION)
+                .add("minimap", self.MINIMAP_REGION))
+        for i, strip in enumerate(self.OVERVIEW_STRIPS):
+            plan.add(f"overview_{i}", strip)
+        return plan
+        
+    def _plan_overview(self, capture: PlanCapture) -> Frame:
+        """Whole-screen stand-in of a plan capture: its overview strips stacked"""
+        strips = [capture.get(f"overview_{i}") for i in range(len(self.OVERVIEW_STRIPS))]
+        if any(strip is None for strip in strips):
+            return capture["center"]  # Plan without strips
+        data = np.vstack([strip.data for strip in strips])
+        return Frame(data, strips[0].order, capture.timestamp)
+                
+    @timed("detector.game_state")
+    def detect_game_state(self, screen: Union[Frame, np.ndarray, PlanCapture]) -> GameState:
         """
         Detect the current game state from screenshot
         
         Args:
-            screen: RGB numpy array of the game screen
+            screen: Frame or RGB numpy array of the game screen, or a
+                capture of game_state_plan()
         """
+        if self.state_classifier is not None:
+            state, confidence = self.state_classifier.predict(screen)
+            if confidence >= self.state_classifier.min_confidence:
+                return state
+                
+        if isinstance(screen, PlanCapture):
+            overview = self._plan_overview(screen)
+            return self._classify_state(overview, screen["dialog"], screen["center"], screen["minimap"])
+            
+        screen = as_frame(screen)
+        h, w = screen.shape[:2]
+        center = screen.crop(w//3, h//3, 2*w//3 - w//3, 2*h//3 - h//3)
+        
+        x, y, mw, mh = self._scale_region(self.MINIMAP_REGION)
+        minimap = None
+        if y + mh <= h and x + mw <= w:
+            minimap = screen.crop(x, y, mw, mh)
+            
+        dialog = screen.crop(*self._scale_region(self.DIALOG_REGION))
+        return self._classify_state(screen, dialog, center, minimap)
+        
+    def _classify_state(
+        self,
+        overview: Frame,
+        dialog: Frame,
+        center: Frame,
+        minimap: Optional[Frame]
+    ) -> GameState:
+        """Decide the game state from the regions it depends on"""
+        features = StateFeatures(overview, dialog, center, minimap)
+        
         # Check if loading (mostly black with loading indicator)
-        if self._is_loading_screen(screen):
+        if self._is_loading_screen(features):
             return GameState.LOADING
             
         # Check if in dialog (dialog UI at bottom)
-        if self._has_dialog_ui(screen):
+        if self._has_dialog_ui(features):
             return GameState.DIALOG
             
         # Check if map is open (large map UI)
-        if self._is_map_open(screen):
+        if self._is_map_open(features):
             return GameState.MAP
             
         # Check if in pause menu
-        if self._is_pause_menu(screen):
+        if self._is_pause_menu(features):
             return GameState.PAUSE_MENU
             
         # Check if in main menu
-        if self._is_main_menu(screen):
+        if self._is_main_menu(features):
             return GameState.MAIN_MENU
             
         # Default to world if we have minimap
-        if self._has_minimap(screen):
+        if self._has_minimap(features):
             return GameState.WORLD
             
         return GameState.UNKNOWN
         
-    def _is_loading_screen(self, screen: np.ndarray) -> bool:
+    def _is_loading_screen(self, features: 'StateFeatures') -> bool:
         """Check if screen is a loading screen"""
-        # Loading screens are mostly dark
-        gray = cv2.cvtColor(screen, cv2.COLOR_RGB2GRAY)
-        mean_brightness = np.mean(gray)
+        # Very dark screen is likely loading; usually decided by the probes alone
+        return features.brightness_below(30)
         
-        # Very dark screen is likely loading
-        return mean_brightness < 30
-        
-    def _has_dialog_ui(self, screen: np.ndarray) -> bool:
+    def _has_dialog_ui(self, features: 'StateFeatures') -> bool:
         """Check if dialog UI is visible"""
-        region = self._scale_region(self.DIALOG_REGION)
-        x, y, w, h = region
-        
-        # Crop dialog region
-        dialog_area = screen[y:y+h, x:x+w]
-        
         # Dialog boxes typically have a dark semi-transparent background
-        gray = cv2.cvtColor(dialog_area, cv2.COLOR_RGB2GRAY)
+        return 20 < features.dialog_brightness < 80  # Dialog boxes are moderately dark
         
-        # Look for the characteristic dialog gradient
-        mean_val = np.mean(gray)
-        return 20 < mean_val < 80  # Dialog boxes are moderately dark
-        
-    def _is_map_open(self, screen: np.ndarray) -> bool:
+    def _is_map_open(self, features: 'StateFeatures') -> bool:
         """Check if the map is open"""
-        # When map is open, the center of screen has the map
-        h, w = screen.shape[:2]
-        center = screen[h//3:2*h//3, w//3:2*w//3]
-        
-        # Map has lots of light blues and greens
-        hsv = cv2.cvtColor(center, cv2.COLOR_RGB2HSV)
-        
-        # Check for map-like colors (blues, greens)
-        lower_blue = np.array([90, 50, 50])
-        upper_blue = np.array([130, 255, 255])
-        mask = cv2.inRange(hsv, lower_blue, upper_blue)
-        
-        blue_ratio = np.sum(mask > 0) / mask.size
-        return blue_ratio > 0.15  # More than 15% blue = likely map
+        # When map is open, the center of screen has the map, with lots of light blues
+        return features.map_color_ratio > 0.15  # More than 15% blue = likely map
         
-    def _is_pause_menu(self, screen: np.ndarray) -> bool:
+    def _is_pause_menu(self, features: 'StateFeatures') -> bool:
         """Check if pause menu is open"""
-        # Pause menu darkens the background and shows buttons
-        gray = cv2.cvtColor(screen, cv2.COLOR_RGB2GRAY)
+        # Pause menu darkens the background with a characteristic overlay
+        return 40 < features.brightness < 70
         
-        # The pause menu has characteristic dark overlay
-        mean_brightness = np.mean(gray)
-        return 40 < mean_brightness < 70
-        
-    def _is_main_menu(self, screen: np.ndarray) -> bool:
+    def _is_main_menu(self, features: 'StateFeatures') -> bool:
         """Check if at main menu"""
         # Main menu has the door/login screen
         # This is a simple heuristic
         return False  # Implement if needed
         
-    def _has_minimap(self, screen: np.ndarray) -> bool:
+    def _has_minimap(self, features: 'StateFeatures') -> bool:
         """Check if minimap is visible (indicates in-game)"""
-        region = self._scale_region(self.MINIMAP_REGION)
-        x, y, w, h = region
-        
-        # Crop minimap region
-        if y + h > screen.shape[0] or x + w > screen.shape[1]:
-            return False
-            
-        minimap = screen[y:y+h, x:x+w]
-        
         # Minimap should have varied colors (terrain)
-        std_dev = np.std(minimap)
-        return std_dev > 30  # Has enough variation to be a minimap
-        
-    def detect_interaction_prompt(self, screen: np.ndarray) -> Optional[Tuple[int, int]]:
+        std_dev = features.minimap_std
+        return std_dev is not None and std_dev > 30  # Has enough variation to be a minimap
+        
+    @timed("detector.interaction_prompt")
+    def detect_interaction_prompt(
+        self,
+        screen: Union[Frame, np.ndarray, PlanCapture]
+    ) -> Optional[Tuple[int, int]]:
         """
         Detect the 'F' interaction prompt position
         
+        Args:
+            screen: Full screen, or a plan capture with a "prompt" region
+                (PROMPT_SEARCH_REGION)
+            
         Returns:
             (x, y) position of prompt, or None if not found
         """
-        # The interaction prompt is usually white/yellow text
-        # We'll look for it in the center-right area of screen
-        h, w = screen.shape[:2]
-        
-        # Search region (right side of center)
-        search_x = int(w * 0.45)
-        search_y = int(h * 0.35)
-        search_w = int(w * 0.2)
-        search_h = int(h * 0.3)
-        
-        region = screen[search_y:search_y+search_h, search_x:search_x+search_w]
+        if isinstance(screen, PlanCapture):
+            region = screen["prompt"]
+            search_x, search_y = screen.origin("prompt")
+        else:
+            screen = as_frame(screen)
+            
+            # The interaction prompt is usually white/yellow text
+            # We'll look for it in the center-right area of screen
+            h, w = screen.shape[:2]
+            
+            # Search region (right side of center)
+            search_x = int(w * 0.45)
+            search_y = int(h * 0.35)
+            search_w = int(w * 0.2)
+            search_h = int(h * 0.3)
+            
+            region = screen.crop(search_x, search_y, search_w, search_h)
         
-        # Convert to HSV for color detection
-        hsv = cv2.cvtColor(region, cv2.COLOR_RGB2HSV)
+        # HSV for color detection
+        hsv = region.hsv
         
         # Look for bright yellow/white (interaction prompt color)
         lower = np.array([20, 100, 200])
@@ -228,7 +407,8 @@ class GameDetector:
                 
         return None
         
-    def detect_minimap_info(self, screen: np.ndarray) -> Optional[MinimapInfo]:
+    @timed("detector.minimap_info")
+    def detect_minimap_info(self, screen: Union[Frame, np.ndarray]) -> Optional[MinimapInfo]:
         """
         Extract information from the minimap
         
@@ -241,98 +421,108 @@ class GameDetector:
         if y + h > screen.shape[0] or x + w > screen.shape[1]:
             return None
             
-        minimap = screen[y:y+h, x:x+w]
+        minimap = as_frame(screen).crop(x, y, w, h)
         
-        # Find player indicator (usually a white/light triangle at center)
-        center_x, center_y = w // 2, h // 2
+        # Player arrow at the centre; direction 0 when it cannot be seen
+        heading = self.heading_estimator.estimate(minimap)
+        direction, confidence = heading if heading else (0.0, 0.0)
         
-        # For now, return a basic info
-        # Full implementation would detect the arrow direction
         return MinimapInfo(
-            player_direction=0,  # Would need more complex detection
-            has_waypoint=False
+            player_direction=direction,
+            has_waypoint=False,
+            direction_confidence=confidence
         )
         
-    def detect_chests(self, screen: np.ndarray) -> List[DetectedObject]:
+    @timed("detector.collectibles")
+    def detect_collectibles(
+        self,
+        screen: Union[Frame, np.ndarray],
+        kinds: Optional[Iterable[str]] = None
+    ) -> List[DetectedObject]:
         """
-        Detect chest locations on screen
+        Detect all collectible classes in one pass
+        
+        Converts the half-resolution level to HSV once, labels the blobs of
+        every colour range with a single connected components pass and
+        assigns each blob the class most of its pixels belong to.
         
         Note: This is a basic color-based detection.
         For better results, use a trained object detection model.
-        """
-        chests = []
         
-        # Chests have golden/brown color
-        hsv = cv2.cvtColor(screen, cv2.COLOR_RGB2HSV)
-        
-        # Golden chest color range
-        lower_gold = np.array([15, 100, 100])
-        upper_gold = np.array([30, 255, 255])
-        mask = cv2.inRange(hsv, lower_gold, upper_gold)
-        
-        # Find contours
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > 500:  # Minimum size threshold
-                x, y, w, h = cv2.boundingRect(contour)
-                
-                # Filter by aspect ratio (chests are roughly square-ish)
-                aspect = w / h if h > 0 else 0
-                if 0.5 < aspect < 2.0:
-                    chests.append(DetectedObject(
-                        object_type="chest",
-                        x=x + w // 2,
-                        y=y + h // 2,
-                        width=w,
-                        height=h,
-                        confidence=0.5  # Basic detection has low confidence
-                    ))
-                    
-        return chests
-        
-    def detect_oculi(self, screen: np.ndarray) -> List[DetectedObject]:
-        """
-        Detect oculi (Anemoculus, Geoculus, etc.) on screen
-        
-        Note: This is a basic color-based detection.
+        Args:
+            screen: Frame or RGB numpy array
+            kinds: Class names to look for (default all of COLLECTIBLES)
         """
-        oculi = []
-        
-        # Oculi glow with specific colors
-        hsv = cv2.cvtColor(screen, cv2.COLOR_RGB2HSV)
-        
-        # Cyan glow (Anemo) - common in early game
-        lower_cyan = np.array([85, 150, 150])
-        upper_cyan = np.array([100, 255, 255])
-        mask = cv2.inRange(hsv, lower_cyan, upper_cyan)
-        
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > 200:
-                x, y, w, h = cv2.boundingRect(contour)
-                oculi.append(DetectedObject(
-                    object_type="oculus",
-                    x=x + w // 2,
-                    y=y + h // 2,
-                    width=w,
-                    height=h,
-                    confidence=0.4
-                ))
-                
-        return oculi
-        
-    def get_screen_center(self, screen: np.ndarray) -> Tuple[int, int]:
+        classes = [c for c in self.COLLECTIBLES if kinds is None or c.name in kinds]
+        if not classes:
+            return []
+            
+        frame = as_frame(screen)
+        level = frame.level(self.COLLECTIBLE_LEVEL)
+        hsv = level.hsv
+        
+        masks = [cv2.inRange(hsv, np.array(c.lower_hsv), np.array(c.upper_hsv)) for c in classes]
+        combined = masks[0]
+        for mask in masks[1:]:
+            combined = cv2.bitwise_or(combined, mask)
+            
+        count, labels, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(
+            combined, 8, cv2.CV_32S, cv2.CCL_GRANA
+        )
+        if count <= 1:
+            return []
+            
+        # Majority class per blob; touching blobs of different colours are rare
+        if len(masks) == 1:
+            owner = np.zeros(count, dtype=np.intp)
+        else:
+            votes = np.stack([np.bincount(labels[mask > 0], minlength=count) for mask in masks])
+            owner = votes.argmax(axis=0)
+            
+        # Blob stats back in full resolution pixels
+        fx = frame.shape[1] / level.shape[1]
+        fy = frame.shape[0] / level.shape[0]
+        left = stats[:, cv2.CC_STAT_LEFT] * fx
+        top = stats[:, cv2.CC_STAT_TOP] * fy
+        width = stats[:, cv2.CC_STAT_WIDTH] * fx
+        height = stats[:, cv2.CC_STAT_HEIGHT] * fy
+        area = stats[:, cv2.CC_STAT_AREA] * (fx * fy)
+        aspect = width / height
+        
+        min_area = np.array([c.min_area for c in classes])[owner]
+        aspect_min = np.array([c.aspect_range[0] if c.aspect_range else 0.0 for c in classes])[owner]
+        aspect_max = np.array([c.aspect_range[1] if c.aspect_range else np.inf for c in classes])[owner]
+        keep = (area > min_area) & (aspect > aspect_min) & (aspect < aspect_max)
+        keep[0] = False  # Background
+        
+        return [
+            DetectedObject(
+                object_type=classes[owner[i]].name,
+                x=int(left[i] + width[i] / 2),
+                y=int(top[i] + height[i] / 2),
+                width=int(width[i]),
+                height=int(height[i]),
+                confidence=classes[owner[i]].confidence
+            )
+            for i in np.flatnonzero(keep)
+        ]
+        
+    def detect_chests(self, screen: Union[Frame, np.ndarray]) -> List[DetectedObject]:
+        """Detect chest locations on screen"""
+        return self.detect_collectibles(screen, ("chest",))
+        
+    def detect_oculi(self, screen: Union[Frame, np.ndarray]) -> List[DetectedObject]:
+        """Detect oculi (Anemoculus, Geoculus, etc.) on screen"""
+        return self.detect_collectibles(screen, ("oculus",))
+        
+    def get_screen_center(self, screen: Union[Frame, np.ndarray]) -> Tuple[int, int]:
         """Get screen center point (where player/crosshair is)"""
         h, w = screen.shape[:2]
         return (w // 2, h // 2)
         
     def calculate_direction_to_target(
         self, 
-        screen: np.ndarray,
+        screen: Union[Frame, np.ndarray],
         target_x: int,
         target_y: int
     ) -> Tuple[float, float]:
@@ -0,0 +1,212 @@
+"""
+Captured frame with cached colour conversions
+
+Screenshots arrive as BGRA. A Frame wraps that buffer without copying and
+converts it to BGR, RGB, gray or HSV on first use only, so detectors that
+look at the same frame share one conversion per colour space. Crops are
+views whose conversions come from the full frame. Downscaled pyramid
+levels are built on demand, so checks that only need coarse statistics
+never convert full-resolution pixels.
+"""
+from typing import Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+# Direct conversions; HSV is derived from BGR
+_CONVERSIONS = {
+    ('BGRA', 'BGR'): cv2.COLOR_BGRA2BGR,
+    ('BGRA', 'RGB'): cv2.COLOR_BGRA2RGB,
+    ('BGRA', 'GRAY'): cv2.COLOR_BGRA2GRAY,
+    ('BGR', 'RGB'): cv2.COLOR_BGR2RGB,
+    ('BGR', 'GRAY'): cv2.COLOR_BGR2GRAY,
+    ('BGR', 'HSV'): cv2.COLOR_BGR2HSV,
+    ('RGB', 'BGR'): cv2.COLOR_RGB2BGR,
+    ('RGB', 'GRAY'): cv2.COLOR_RGB2GRAY,
+    ('RGB', 'HSV'): cv2.COLOR_RGB2HSV,
+}
+
+# Index arrays of sample grids, by (width, height, columns, rows)
+_SAMPLE_GRIDS: Dict[Tuple[int, int, int, int], Tuple[np.ndarray, np.ndarray]] = {}
+
+
+class Frame:
+    """
+    A screen image in its native channel order with lazily cached conversions
+
+    Conversions are read-only and shared; copy them before modifying.
+
+    Usage:
+        frame = Frame.from_screenshot(sct.grab(monitor))
+        gray = frame.gray  # Converted once
+        minimap = frame.crop(55, 45, 210, 200).hsv
+        quarter = frame.level(2).gray  # 1/4 resolution
+    """
+    
+    ORDERS = ('BGRA', 'BGR', 'RGB', 'GRAY', 'HSV')
+    MAX_LEVEL = 4
+    
+    def __init__(self, data: np.ndarray, order: str = 'BGRA', timestamp: float = 0.0):
+        if order not in self.ORDERS:
+            raise ValueError(f"Unknown channel order: {order}")
+        self.data = data
+        self.order = order
+        self.timestamp = timestamp
+        self.conversions = 0  # Colour conversions done for this frame
+        self._cache: Dict[str, np.ndarray] = {order: data}
+        self._parent: Optional[Tuple['Frame', Tuple[int, int, int, int]]] = None
+        self._levels: Dict[int, 'Frame'] = {}  # Levels >= 1; caching level 0 would make a reference cycle
+        self.scale = 1.0  # Size relative to the captured frame
+        
+    @classmethod
+    def from_buffer(cls, buffer, width: int, height: int, timestamp: float = 0.0) -> 'Frame':
+        """Wrap a raw BGRA buffer without copying"""
+        data = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 4)
+        data.flags.writeable = False
+        return cls(data, 'BGRA', timestamp)
+        
+    @classmethod
+    def from_screenshot(cls, screenshot, timestamp: float = 0.0) -> 'Frame':
+        """Wrap an mss screenshot without copying"""
+        return cls.from_buffer(screenshot.raw, screenshot.width, screenshot.height, timestamp)
+        
+    # ================== Geometry ==================
+    
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Shape of the native data, so code using image.shape keeps working"""
+        return self.data.shape
+        
+    @property
+    def height(self) -> int:
+        return self.data.shape[0]
+        
+    @property
+    def width(self) -> int:
+        return self.data.shape[1]
+        
+    def crop(self, x: int, y: int, w: int, h: int) -> 'Frame':
+        """Get a sub-frame; its data and conversions are views into this frame"""
+        region = Frame(self.data[y:y + h, x:x + w], self.order, self.timestamp)
+        region._parent = (self, (x, y, w, h))
+        region.scale = self.scale
+        return region
+        
+    def sample(self, columns: int, rows: int) -> np.ndarray:
+        """
+        Read an evenly spaced grid of pixels straight from the native data
+        
+        Returns:
+            (rows, columns[, channels]) array in the native channel order;
+            a few hundred pixels cost microseconds, with no conversion or resize
+        """
+        h, w = self.data.shape[:2]
+        key = (w, h, columns, rows)
+        grid = _SAMPLE_GRIDS.get(key)
+        if grid is None:
+            # Pixel centres of equal cells, so borders are not oversampled
+            xs = ((np.arange(min(columns, w)) + 0.5) * w / min(columns, w)).astype(np.intp)
+            ys = ((np.arange(min(rows, h)) + 0.5) * h / min(rows, h)).astype(np.intp)
+            grid = _SAMPLE_GRIDS[key] = np.ix_(ys, xs)
+        return self.data[grid]
+        
+    def level(self, n: int) -> 'Frame':
+        """
+        Get the frame downscaled by 2**n (0 = this frame), building it on first use
+
+        Levels keep the native channel order; their conversions are cached
+        like those of any frame.
+        """
+        if not 0 <= n <= self.MAX_LEVEL:
+            raise ValueError(f"Pyramid level out of range: {n}")
+        if n == 0:
+            return self
+        level = self._levels.get(n)
+        if level is not None:
+            return level
+            
+        if self._parent:
+            # Crop the parent's level so all crops share one resize
+            parent, (x, y, w, h) = self._parent
+            level = parent.level(n).crop(x >> n, y >> n, max(1, w >> n), max(1, h >> n))
+        else:
+            # Halve the previous level; cv2 has a fast path for INTER_AREA by exactly 2
+            source = self.level(n - 1).data
+            size = (max(1, source.shape[1] // 2), max(1, source.shape[0] // 2))
+            small = cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+            small.flags.writeable = False
+            level = Frame(small, self.order, self.timestamp)
+            level.scale = self.scale / (1 << n)
+            
+        self._levels[n] = level
+        return level
+        
+    # ================== Conversions ==================
+    
+    def get(self, order: str) -> np.ndarray:
+        """Get the image in a channel order, converting on first use"""
+        image = self._cache.get(order)
+        if image is not None:
+            return image
+            
+        if self._parent:
+            # Convert the whole frame once instead of every crop separately
+            parent, (x, y, w, h) = self._parent
+            image = parent.get(order)[y:y + h, x:x + w]
+            self._cache[order] = image
+            return image
+            
+        if order == 'HSV' and (self.order, 'HSV') not in _CONVERSIONS:
+            source, code = self.get('BGR'), cv2.COLOR_BGR2HSV
+        elif (self.order, order) in _CONVERSIONS:
+            source, code = self.data, _CONVERSIONS[(self.order, order)]
+        else:
+            raise ValueError(f"Cannot convert {self.order} to {order}")
+            
+        image = cv2.cvtColor(source, code)
+        image.flags.writeable = False
+        self.conversions += 1
+        self._cache[order] = image
+        return image
+        
+    @property
+    def bgr(self) -> np.ndarray:
+        return self.get('BGR')
+        
+    @property
+    def rgb(self) -> np.ndarray:
+        return self.get('RGB')
+        
+    @property
+    def gray(self) -> np.ndarray:
+        return self.get('GRAY')
+        
+    @property
+    def hsv(self) -> np.ndarray:
+        return self.get('HSV')
+        
+    @property
+    def color(self) -> np.ndarray:
+        """Colour channels in native order (no conversion), for order-independent statistics"""
+        if self.order == 'BGRA':
+            return self.data[:, :, :3]
+        return self.data
+
+
+def as_frame(image: Union[Frame, np.ndarray], order: str = 'RGB') -> Frame:
+    """
+    Wrap an image as a Frame
+
+    Args:
+        image: Frame (returned as is) or numpy array
+        order: Channel order of a 3-channel array; 4 channels are BGRA and
+            2D arrays are grayscale
+    """
+    if isinstance(image, Frame):
+        return image
+    if image.ndim == 2:
+        return Frame(image, 'GRAY')
+    if image.shape[2] == 4:
+        return Frame(image, 'BGRA')
+    return Frame(image, order)
@@ -0,0 +1,166 @@
+"""
+Player heading from the minimap arrow
+
+The arrow at the minimap centre is resampled along rays with a lookup
+table built once (360 angles x radii). Summing each ray gives an angular
+profile of the arrow. That profile is circularly correlated with the
+profile of a north-pointing reference arrow, which is the same as matching
+a bank of 360 rotated templates for the price of one FFT.
+"""
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .frame import Frame, as_frame
+
+
+ARROW_SHAPE = np.array([
+    (0.0, -1.0),  # Tip
+    (0.75, 0.85),  # Right wing
+    (0.0, 0.4),  # Notch
+    (-0.75, 0.85),  # Left wing
+], dtype=np.float32)
+
+
+def draw_player_arrow(
+    image: np.ndarray,
+    center: Tuple[float, float],
+    heading: float,
+    size: float,
+    color=(120, 230, 255)
+) -> np.ndarray:
+    """
+    Draw an arrow like the minimap player marker (in place)
+
+    Args:
+        image: Image to draw on
+        center: Arrow centre (x, y), sub-pixel positions allowed
+        heading: Degrees clockwise from north
+        size: Distance from the centre to the tip in pixels
+        color: Fill colour in the image's channel order
+    """
+    angle = np.deg2rad(heading)
+    cos, sin = np.cos(angle), np.sin(angle)
+    x = ARROW_SHAPE[:, 0] * cos - ARROW_SHAPE[:, 1] * sin
+    y = ARROW_SHAPE[:, 0] * sin + ARROW_SHAPE[:, 1] * cos
+    points = np.stack([center[0] + x * size, center[1] + y * size], axis=1)
+    
+    # 4 fractional bits keep the edges anti-aliased at sub-pixel accuracy
+    cv2.fillPoly(image, [np.round(points * 16).astype(np.int32)], color, cv2.LINE_AA, shift=4)
+    return image
+
+
+class HeadingEstimator:
+    """
+    Estimates the player heading from the minimap arrow
+
+    Usage:
+        estimator = HeadingEstimator(scale=detector.scale_y)
+        heading = estimator.estimate(minimap)
+        if heading:
+            degrees, confidence = heading
+    """
+    
+    ANGLE_STEPS = 360  # Rays of the lookup table, one per degree
+    ARROW_SIZE = 10  # Centre to tip of the arrow at 1080p
+    SAMPLE_RADIUS = 14  # Ray length at 1080p
+    CROP_RADIUS = 18  # Half side of the patch cut around the minimap centre
+    ARROW_BRIGHTNESS = 170  # Gray level where arrow pixels start
+    BRIGHTNESS_RAMP = 40  # Gray levels from no to full arrow weight
+    MIN_MASS = 0.15  # Minimum arrow area as a share of the reference arrow
+    
+    def __init__(self, scale: float = 1.0, reference: Optional[np.ndarray] = None):
+        """
+        Args:
+            scale: Screen height / 1080
+            reference: Image of the arrow pointing north, default a drawn arrow
+        """
+        self.scale = scale
+        self.radius = max(4, round(self.SAMPLE_RADIUS * scale))
+        self.crop_radius = max(self.radius, round(self.CROP_RADIUS * scale))
+        
+        # Ray offsets from the arrow centre; r = 0 carries no direction
+        radii = np.arange(1, self.radius + 1, dtype=np.float32)
+        angles = np.deg2rad(np.arange(self.ANGLE_STEPS) * (360 / self.ANGLE_STEPS))
+        self._ray_x = (np.sin(angles)[:, None] * radii).astype(np.float32)
+        self._ray_y = (-np.cos(angles)[:, None] * radii).astype(np.float32)
+        
+        if reference is None:
+            side = 2 * self.crop_radius + 1
+            reference = np.zeros((side, side, 3), dtype=np.uint8)
+            draw_player_arrow(reference, (self.crop_radius, self.crop_radius), 0, self.ARROW_SIZE * scale)
+            
+        profile, mass = self.profile(reference)
+        if profile is None:
+            raise ValueError("Reference arrow has no bright pixels")
+        self.reference_mass = mass
+        self._reference_spectrum = np.conj(np.fft.rfft(profile))
+        
+    def _weights(self, patch: Frame) -> np.ndarray:
+        """Arrow weight per pixel, ramping from 0 to 1 over BRIGHTNESS_RAMP gray levels"""
+        # Convert only the patch; a crop's gray would convert its whole parent frame
+        weights = Frame(np.ascontiguousarray(patch.data), patch.order).gray.astype(np.float32)
+        weights -= self.ARROW_BRIGHTNESS
+        weights *= 1.0 / self.BRIGHTNESS_RAMP
+        return np.clip(weights, 0.0, 1.0, out=weights)
+        
+    def profile(self, patch: Union[Frame, np.ndarray]) -> Tuple[Optional[np.ndarray], float]:
+        """
+        Normalized angular profile of the arrow in a patch
+
+        Returns:
+            (profile, mass): zero mean, unit norm arrow length per ray
+            around the arrow's centroid, and the arrow area in pixels;
+            profile is None without arrow pixels
+        """
+        weights = self._weights(as_frame(patch))
+        moments = cv2.moments(weights)
+        mass = moments['m00']
+        if mass <= 0:
+            return None, 0.0
+            
+        cx, cy = moments['m10'] / mass, moments['m01'] / mass
+        polar = cv2.remap(weights, self._ray_x + np.float32(cx), self._ray_y + np.float32(cy), cv2.INTER_LINEAR)
+        profile = polar.sum(axis=1)
+        profile -= profile.mean()
+        norm = np.linalg.norm(profile)
+        if norm == 0:
+            return None, mass
+        return profile / norm, mass
+        
+    def estimate(self, minimap: Union[Frame, np.ndarray]) -> Optional[Tuple[float, float]]:
+        """
+        Estimate the heading from a minimap crop
+
+        Args:
+            minimap: The minimap region (the arrow sits at its centre)
+
+        Returns:
+            (heading, confidence): degrees clockwise from north in [0, 360)
+            and the correlation with the reference arrow, or None if no
+            arrow was found
+        """
+        minimap = as_frame(minimap)
+        h, w = minimap.shape[:2]
+        r = self.crop_radius
+        x0, y0 = max(0, w // 2 - r), max(0, h // 2 - r)
+        patch = minimap.crop(x0, y0, min(2 * r + 1, w - x0), min(2 * r + 1, h - y0))
+        
+        profile, mass = self.profile(patch)
+        if profile is None or mass < self.MIN_MASS * self.reference_mass:
+            return None
+            
+        # Correlation with the reference rotated by every step at once
+        correlation = np.fft.irfft(np.fft.rfft(profile) * self._reference_spectrum, n=self.ANGLE_STEPS)
+        peak = int(np.argmax(correlation))
+        
+        # Parabola through the peak and its neighbours for sub-step accuracy
+        left = correlation[peak - 1]
+        right = correlation[(peak + 1) % self.ANGLE_STEPS]
+        center = correlation[peak]
+        curvature = left - 2 * center + right
+        offset = 0.5 * (left - right) / curvature if curvature < 0 else 0.0
+        
+        heading = (peak + offset) * (360 / self.ANGLE_STEPS) % 360
+        return float(heading), float(max(0.0, center))
@@ -0,0 +1,414 @@
+"""
+Player localization on the world map
+
+The minimap is matched against a large world map image to get the player's
+absolute position. The world map's ORB keypoints are computed offline and
+stored tile by tile in .npy files that are memory-mapped at run time, so
+only the tiles around the last known position are read per query. Once
+the position is known, a query costs one ORB pass over the minimap, a
+brute-force Hamming match against a few thousand descriptors and a RANSAC
+similarity fit, a few milliseconds on the CPU.
+
+Usage:
+    python -m screen.localization build world_map.png map_index/ --minimap-scale 1.0
+    python -m screen.localization locate map_index/ screenshot.png
+"""
+import argparse
+import json
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .frame import Frame, as_frame
+from config import get_config
+from instrumentation import timed
+
+
+# ORB settings shared by the index and the queries
+ORB_PATCH_SIZE = 19  # Smaller than the default 31 so features reach the minimap edge
+ORB_SCALE_FACTOR = 1.2
+ORB_LEVELS = 4
+
+
+def _create_orb(features: int) -> cv2.ORB:
+    return cv2.ORB_create(
+        nfeatures=features,
+        scaleFactor=ORB_SCALE_FACTOR,
+        nlevels=ORB_LEVELS,
+        edgeThreshold=ORB_PATCH_SIZE,
+        patchSize=ORB_PATCH_SIZE,
+        fastThreshold=10
+    )
+
+
+@dataclass
+class Location:
+    """Player position on the world map"""
+    x: float  # World map pixels
+    y: float
+    rotation: float  # Degrees the minimap is turned against the map
+    inliers: int  # Matches consistent with the position
+    confidence: float  # Share of the matches that are inliers
+    timestamp: float  # time.monotonic() of the query
+
+
+class FeatureIndex:
+    """
+    Tiled ORB keypoints and descriptors of a world map
+
+    Features are stored sorted by tile, so the features of a row of tiles
+    are one contiguous slice of the memory-mapped arrays.
+    """
+    
+    META_FILE = "index.json"
+    KEYPOINTS_FILE = "keypoints.npy"  # (N, 2) float32 map coordinates
+    DESCRIPTORS_FILE = "descriptors.npy"  # (N, 32) uint8 ORB descriptors
+    OFFSETS_FILE = "offsets.npy"  # (tiles + 1,) int64 start of each tile's features
+    
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path / self.META_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.width = meta['width']
+        self.height = meta['height']
+        self.tile_size = meta['tile_size']
+        self.minimap_scale = meta.get('minimap_scale', 1.0)  # Minimap resize to the map's scale
+        self.columns = math.ceil(self.width / self.tile_size)
+        self.rows = math.ceil(self.height / self.tile_size)
+        
+        self.keypoints = np.load(self.path / self.KEYPOINTS_FILE, mmap_mode='r')
+        self.descriptors = np.load(self.path / self.DESCRIPTORS_FILE, mmap_mode='r')
+        self.offsets = np.load(self.path / self.OFFSETS_FILE)
+        
+    def __len__(self) -> int:
+        return len(self.keypoints)
+        
+    @classmethod
+    def build(
+        cls,
+        world_map: np.ndarray,
+        path: Union[str, Path],
+        tile_size: int = 256,
+        features_per_tile: int = 500,
+        minimap_scale: float = 1.0,
+        log_callback=print
+    ) -> 'FeatureIndex':
+        """
+        Compute and store the features of a world map image
+
+        Args:
+            world_map: BGR or gray world map
+            path: Index directory, created if missing
+            tile_size: Side of a tile in map pixels
+            features_per_tile: ORB features kept per tile
+            minimap_scale: Factor that brings the minimap to the map's scale
+        """
+        gray = world_map if world_map.ndim == 2 else cv2.cvtColor(world_map, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        orb = _create_orb(features_per_tile)
+        margin = ORB_PATCH_SIZE + 1  # Tiles are padded so features are found up to their border
+        
+        keypoints, descriptors, offsets = [], [], [0]
+        columns, rows = math.ceil(width / tile_size), math.ceil(height / tile_size)
+        for row in range(rows):
+            for column in range(columns):
+                x0, y0 = column * tile_size, row * tile_size
+                x1, y1 = min(x0 + tile_size, width), min(y0 + tile_size, height)
+                px0, py0 = max(0, x0 - margin), max(0, y0 - margin)
+                patch = gray[py0:min(y1 + margin, height), px0:min(x1 + margin, width)]
+                
+                found, desc = orb.detectAndCompute(patch, None)
+                count = 0
+                if desc is not None:
+                    points = np.array([kp.pt for kp in found], dtype=np.float32) + (px0, py0)
+                    # Keep features owned by this tile, the padding belongs to the neighbours
+                    inside = ((points[:, 0] >= x0) & (points[:, 0] < x1)
+                              & (points[:, 1] >= y0) & (points[:, 1] < y1))
+                    keypoints.append(points[inside])
+                    descriptors.append(desc[inside])
+                    count = int(inside.sum())
+                offsets.append(offsets[-1] + count)
+                
+            if log_callback:
+                log_callback(f"🧭 建立索引: 第 {row + 1}/{rows} 行，共 {offsets[-1]} 个特征点")
+                
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / cls.KEYPOINTS_FILE, np.concatenate(keypoints) if keypoints else np.zeros((0, 2), np.float32))
+        np.save(path / cls.DESCRIPTORS_FILE, np.concatenate(descriptors) if descriptors else np.zeros((0, 32), np.uint8))
+        np.save(path / cls.OFFSETS_FILE, np.array(offsets, dtype=np.int64))
+        with open(path / cls.META_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'width': width,
+                'height': height,
+                'tile_size': tile_size,
+                'features_per_tile': features_per_tile,
+                'minimap_scale': minimap_scale,
+                'orb_patch_size': ORB_PATCH_SIZE,
+            }, f, indent=2)
+        return cls(path)
+        
+    def features_in(
+        self,
+        window: Optional[Tuple[float, float, float, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Keypoints and descriptors of the tiles overlapping a window
+
+        Args:
+            window: (x0, y0, x1, y1) in map pixels, None for the whole map
+        """
+        if window is None:
+            return self.keypoints, self.descriptors
+            
+        x0, y0, x1, y1 = window
+        c0 = min(max(0, int(x0 // self.tile_size)), self.columns - 1)
+        c1 = min(max(0, int(x1 // self.tile_size)), self.columns - 1)
+        r0 = min(max(0, int(y0 // self.tile_size)), self.rows - 1)
+        r1 = min(max(0, int(y1 // self.tile_size)), self.rows - 1)
+        
+        # One slice per row of tiles; only these pages are read from disk
+        spans = [(self.offsets[r * self.columns + c0], self.offsets[r * self.columns + c1 + 1])
+                 for r in range(r0, r1 + 1)]
+        keypoints = np.concatenate([self.keypoints[a:b] for a, b in spans])
+        descriptors = np.concatenate([self.descriptors[a:b] for a, b in spans])
+        
+        # Tiles overhang the window; fewer candidates make matching faster
+        inside = ((keypoints[:, 0] >= x0) & (keypoints[:, 0] < x1)
+                  & (keypoints[:, 1] >= y0) & (keypoints[:, 1] < y1))
+        return keypoints[inside], descriptors[inside]
+
+
+class MinimapLocalizer:
+    """
+    Tracks the player's world map position from minimap crops
+
+    Usage:
+        localizer = MinimapLocalizer(FeatureIndex("map_index"))
+        location = localizer.locate(minimap)
+        if location:
+            print(location.x, location.y)
+    """
+    
+    SEARCH_RADIUS = 300  # Map pixels searched around the last position
+    RATIO = 0.8  # Lowe's ratio test on the two nearest descriptors
+    MIN_INLIERS = 10
+    RANSAC_THRESHOLD = 4.0  # Reprojection error in map pixels
+    SCALE_TOLERANCE = 0.25  # Allowed scale error of the fitted transform
+    LOST_AFTER = 5  # Failed queries before the whole map is searched again
+    MATCH_CHUNK = 100000  # Map descriptors matched per call in whole-map searches
+    MASK_MARGIN = 0.92  # Radius of the circular minimap mask as a share of half the crop
+    ARROW_RADIUS = 16  # Centre area covered by the player arrow (minimap pixels at 1080p)
+    
+    def __init__(self, index: FeatureIndex, features: int = 500, log_callback=None):
+        self.index = index
+        self.log_callback = log_callback
+        self.orb = _create_orb(features)
+        self.matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+        
+        self.last: Optional[Location] = None
+        self.failures = 0  # Consecutive failed queries
+        self._mask: Optional[np.ndarray] = None
+        
+    def reset(self, position: Optional[Tuple[float, float]] = None):
+        """Forget the tracked position, optionally starting from a known one"""
+        self.failures = 0
+        self.last = None
+        if position is not None:
+            self.last = Location(position[0], position[1], 0.0, 0, 0.0, time.monotonic())
+            
+    @property
+    def is_tracking(self) -> bool:
+        return self.last is not None and self.failures < self.LOST_AFTER
+        
+    def _query_mask(self, shape: Tuple[int, int]) -> np.ndarray:
+        """Circle of the minimap without the player arrow, built once per size"""
+        if self._mask is None or self._mask.shape != shape:
+            h, w = shape
+            mask = np.zeros(shape, dtype=np.uint8)
+            cv2.circle(mask, (w // 2, h // 2), int(min(w, h) / 2 * self.MASK_MARGIN), 255, -1)
+            cv2.circle(mask, (w // 2, h // 2), max(1, int(self.ARROW_RADIUS * h / 200)), 0, -1)
+            self._mask = mask
+        return self._mask
+        
+    @timed("localization.locate")
+    def locate(
+        self,
+        minimap: Union[Frame, np.ndarray],
+        hint: Optional[Tuple[float, float]] = None
+    ) -> Optional[Location]:
+        """
+        Find the minimap's centre on the world map
+
+        Args:
+            minimap: The minimap region, player at its centre
+            hint: Approximate position to search around instead of the last one
+
+        Returns:
+            The location, or None if the minimap could not be matched
+        """
+        # Convert only the crop; a crop's gray would convert its whole parent frame
+        minimap = as_frame(minimap)
+        gray = Frame(np.ascontiguousarray(minimap.data), minimap.order).gray
+        if self.index.minimap_scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.index.minimap_scale, fy=self.index.minimap_scale,
+                              interpolation=cv2.INTER_AREA)
+        h, w = gray.shape
+        
+        query_points, query_descriptors = self.orb.detectAndCompute(gray, self._query_mask((h, w)))
+        if query_descriptors is None or len(query_points) < self.MIN_INLIERS:
+            return self._failed()
+            
+        center = hint
+        if center is None and self.is_tracking:
+            center = (self.last.x, self.last.y)
+        window = None
+        if center is not None:
+            r = self.SEARCH_RADIUS
+            window = (center[0] - r, center[1] - r, center[0] + r, center[1] + r)
+        map_points, map_descriptors = self.index.features_in(window)
+        if len(map_descriptors) < 2:
+            return self._failed()
+            
+        query_ids, map_ids = self._match(query_descriptors, map_descriptors)
+        if len(query_ids) < self.MIN_INLIERS:
+            return self._failed()
+            
+        source = np.float32([query_points[i].pt for i in query_ids])
+        target = np.asarray(map_points[map_ids], dtype=np.float32)
+        transform, inliers = cv2.estimateAffinePartial2D(
+            source, target, method=cv2.RANSAC,
+            ransacReprojThreshold=self.RANSAC_THRESHOLD, maxIters=1000, confidence=0.99
+        )
+        if transform is None:
+            return self._failed()
+            
+        inlier_count = int(inliers.sum())
+        scale = math.hypot(transform[0, 0], transform[1, 0])
+        if inlier_count < self.MIN_INLIERS or abs(scale - 1.0) > self.SCALE_TOLERANCE:
+            return self._failed()
+            
+        x, y = transform @ np.array([w / 2, h / 2, 1.0])
+        self.last = Location(
+            x=float(x),
+            y=float(y),
+            rotation=math.degrees(math.atan2(transform[1, 0], transform[0, 0])),
+            inliers=inlier_count,
+            confidence=inlier_count / len(query_ids),
+            timestamp=time.monotonic()
+        )
+        self.failures = 0
+        return self.last
+        
+    def _match(self, query_descriptors: np.ndarray, map_descriptors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Query and map indices of the matches passing the ratio test"""
+        count = len(query_descriptors)
+        best = np.full(count, np.inf)
+        second = np.full(count, np.inf)
+        nearest = np.zeros(count, dtype=np.int64)
+        
+        # The matcher takes at most 2^18 descriptors, whole-map searches go in chunks
+        for start in range(0, len(map_descriptors), self.MATCH_CHUNK):
+            chunk = np.ascontiguousarray(map_descriptors[start:start + self.MATCH_CHUNK])
+            for pair in self.matcher.knnMatch(query_descriptors, chunk, k=2):
+                for match in pair:
+                    i = match.queryIdx
+                    if match.distance < best[i]:
+                        second[i] = best[i]
+                        best[i] = match.distance
+                        nearest[i] = start + match.trainIdx
+                    elif match.distance < second[i]:
+                        second[i] = match.distance
+                        
+        good = np.flatnonzero(best < self.RATIO * second)
+        return good, nearest[good]
+        
+    def _failed(self) -> None:
+        self.failures += 1
+        if self.failures == self.LOST_AFTER and self.log_callback:
+            self.log_callback("🧭 小地图定位丢失，改为全图搜索")
+        return None
+
+
+def load_localizer(log_callback=print) -> Optional[MinimapLocalizer]:
+    """Load the index set in the config, None if none is set or it cannot be read"""
+    config = get_config()
+    if not config.localization_index_dir:
+        return None
+    try:
+        return MinimapLocalizer(FeatureIndex(config.localization_index_dir), log_callback=log_callback)
+    except (OSError, KeyError, ValueError) as e:
+        if log_callback:
+            log_callback(f"⚠️ 地图定位索引加载失败: {e}")
+        return None
+
+
+# ================== CLI ==================
+
+def _read_image(path: str) -> np.ndarray:
+    # imdecode handles non-ASCII paths on Windows, unlike imread
+    image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Cannot read image: {path}")
+    return image
+
+
+def _command_build(args):
+    world_map = _read_image(args.world_map)
+    start = time.perf_counter()
+    index = FeatureIndex.build(world_map, args.out, args.tile, args.features, args.minimap_scale)
+    print(f"💾 索引已保存: {args.out} ({len(index)} 个特征点, {time.perf_counter() - start:.1f} s)")
+
+
+def _command_locate(args):
+    from .detector import GameDetector
+    
+    screenshot = Frame(_read_image(args.screenshot), 'BGR')
+    h, w = screenshot.shape[:2]
+    detector = GameDetector((w, h))
+    x, y, mw, mh = detector.minimap_region()
+    
+    localizer = MinimapLocalizer(FeatureIndex(args.index))
+    hint = (args.x, args.y) if args.x is not None and args.y is not None else None
+    start = time.perf_counter()
+    location = localizer.locate(screenshot.crop(x, y, mw, mh), hint)
+    elapsed = (time.perf_counter() - start) * 1000
+    if location is None:
+        print(f"❌ 未能定位 ({elapsed:.1f} ms)")
+    else:
+        print(f"📍 ({location.x:.0f}, {location.y:.0f}) 旋转 {location.rotation:.1f}°, "
+              f"内点 {location.inliers} ({location.confidence:.0%}), {elapsed:.1f} ms")
+
+
+def main():
+    """Headless entry point"""
+    parser = argparse.ArgumentParser(description="小地图定位 / Minimap localization")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    build = commands.add_parser('build', help="从大地图建立特征索引")
+    build.add_argument('world_map', help="大地图图片")
+    build.add_argument('out', help="索引目录")
+    build.add_argument('--tile', type=int, default=256, help="分块边长（像素）")
+    build.add_argument('--features', type=int, default=500, help="每块特征点数")
+    build.add_argument('--minimap-scale', type=float, default=1.0, help="小地图缩放到大地图比例的系数")
+    
+    locate = commands.add_parser('locate', help="在截图中定位玩家")
+    locate.add_argument('index', help="索引目录")
+    locate.add_argument('screenshot', help="游戏截图")
+    locate.add_argument('--x', type=float, help="大致位置 x（可选）")
+    locate.add_argument('--y', type=float, help="大致位置 y（可选）")
+    
+    args = parser.parse_args()
+    {
+        'build': _command_build,
+        'locate': _command_locate,
+    }[args.command](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,10 +4,13 @@ Supports Chinese and English text recognition
 """
 import cv2
 import numpy as np
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 from dataclasses import dataclass
 import re
 
+from .frame import Frame, as_frame
+from instrumentation import timed
+
 
 @dataclass
 class TextRegion:
@@ -58,22 +61,25 @@ class GameOCR:
         self.engine = None
         self.engine_type = 'none'
         
+    @timed("ocr.read_text")
     def read_text(
         self, 
-        image: np.ndarray,
+        image: Union[Frame, np.ndarray],
         lang: str = 'chi_sim+eng'
     ) -> List[TextRegion]:
         """
         Read all text from image
         
         Args:
-            image: Image to read text from
+            image: Frame or BGR image to read text from
             lang: Language code (for Tesseract)
         """
+        frame = as_frame(image, 'BGR')
         if self.engine_type == 'paddle':
-            return self._read_paddle(image)
+            return self._read_paddle(frame.bgr)
         elif self.engine_type == 'tesseract':
-            return self._read_tesseract(image, lang)
+            # pytesseract reads arrays as RGB
+            return self._read_tesseract(frame.rgb, lang)
         else:
             return []
             
@@ -142,9 +148,10 @@ class GameOCR:
             
         return results
         
+    @timed("ocr.find_text")
     def find_text(
         self, 
-        image: np.ndarray, 
+        image: Union[Frame, np.ndarray], 
         target_text: str,
         fuzzy: bool = True
     ) -> Optional[TextRegion]:
@@ -173,15 +180,16 @@ class GameOCR:
         
     def find_waypoint_name(
         self, 
-        image: np.ndarray, 
+        image: Union[Frame, np.ndarray], 
         waypoint_name: str
     ) -> Optional[TextRegion]:
         """Find a waypoint name on the map"""
         return self.find_text(image, waypoint_name, fuzzy=True)
         
+    @timed("ocr.coordinates")
     def read_coordinates(
         self, 
-        image: np.ndarray
+        image: Union[Frame, np.ndarray]
     ) -> Optional[Tuple[float, float]]:
         """
         Read coordinate numbers from image
@@ -203,16 +211,13 @@ class GameOCR:
                     
         return None
         
-    def preprocess_for_ocr(self, image: np.ndarray) -> np.ndarray:
+    def preprocess_for_ocr(self, image: Union[Frame, np.ndarray]) -> np.ndarray:
         """
         Preprocess image for better OCR results
         """
-        # Convert to grayscale if needed
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
-            
+        # Grayscale (cached on Frames, no conversion for gray arrays)
+        gray = as_frame(image, 'BGR').gray
+        
         # Enhance contrast
         gray = cv2.equalizeHist(gray)
         
@@ -230,14 +235,16 @@ class MapTextFinder:
     def __init__(self):
         self.ocr = GameOCR()
         
+    @timed("ocr.region_name")
     def find_region_name(
         self, 
-        map_image: np.ndarray
+        map_image: Union[Frame, np.ndarray]
     ) -> Optional[str]:
         """Find the current region name on the map"""
         # Region name is usually in the top-left area
-        h, w = map_image.shape[:2]
-        region_area = map_image[0:int(h*0.15), 0:int(w*0.4)]
+        frame = as_frame(map_image, 'BGR')
+        h, w = frame.shape[:2]
+        region_area = frame.crop(0, 0, int(w*0.4), int(h*0.15))
         
         regions = self.ocr.read_text(region_area)
         
@@ -248,9 +255,10 @@ class MapTextFinder:
             
         return None
         
+    @timed("ocr.waypoint_labels")
     def find_waypoint_labels(
         self, 
-        map_image: np.ndarray
+        map_image: Union[Frame, np.ndarray]
     ) -> List[TextRegion]:
         """Find all waypoint/location labels on the map"""
         regions = self.ocr.read_text(map_image)
@@ -0,0 +1,377 @@
+"""
+Capture recording and replay
+
+A recording is a directory of compressed chunk files plus an index.json
+listing every frame's timestamp, window geometry and location. Within a
+chunk, frames after the first are stored as the difference to the previous
+frame, so still screens cost almost nothing. ReplayCapture serves a
+recording through the ScreenCapture interface, which lets the detector,
+Navigator and DecisionEngine run offline for repeatable benchmarks.
+"""
+import bisect
+import json
+import queue
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .capture import ScreenCapture, WindowInfo
+from .frame import Frame
+from .window_tracker import WindowTracker
+
+FORMAT_VERSION = 1
+INDEX_FILE = "index.json"
+
+
+class CaptureRecorder:
+    """
+    Writes captured frames to a recording directory
+
+    Frames are queued and compressed on a writer thread, so recording does
+    not slow the capture loop down. The index is rewritten after every
+    chunk, so a crash loses at most the chunk being written.
+
+    Usage:
+        recorder = CaptureRecorder("recordings/session1")
+        recorder.write(frame, region)
+        recorder.close()
+    """
+    
+    def __init__(self, path, chunk_frames: int = 64, level: int = 1, max_pending: int = 32):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_frames = chunk_frames
+        self.level = level
+        
+        self._frames: List[list] = []  # [timestamp, chunk, offset, length, keyframe]
+        self._shapes: List[list] = []  # [height, width, channels, order]
+        self._regions: List[Optional[list]] = []  # [left, top, width, height]
+        self._chunk = -1
+        self._chunk_file = None
+        self._chunk_count = 0
+        self._previous: Optional[np.ndarray] = None
+        self._start: Optional[float] = None
+        self.bytes_written = 0
+        self.raw_bytes = 0
+        
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._write_loop, name="CaptureRecorder", daemon=True)
+        self._thread.start()
+        
+    def write(self, frame: Frame, region: Optional[Dict[str, int]] = None):
+        """Queue a frame with the screen area it shows (blocks if the writer falls behind)"""
+        self._queue.put((frame, dict(region) if region else None))
+        
+    def close(self):
+        """Write the remaining frames and the index"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+        
+    @property
+    def frame_count(self) -> int:
+        return len(self._frames)
+        
+    def _write_loop(self):
+        """Writer loop (runs in thread)"""
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                self._write_frame(*item)
+        finally:
+            if self._chunk_file:
+                self._chunk_file.close()
+            self._write_index()
+            
+    def _write_frame(self, frame: Frame, region: Optional[Dict[str, int]]):
+        # Alpha carries no information, keep the colour channels only
+        data = np.ascontiguousarray(frame.color)
+        order = 'BGR' if frame.order == 'BGRA' else frame.order
+        
+        if self._start is None:
+            self._start = frame.timestamp
+            
+        if self._chunk_count == 0:
+            self._open_chunk()
+            
+        keyframe = self._previous is None or self._previous.shape != data.shape or self._chunk_count == 0
+        payload = data if keyframe else data - self._previous  # uint8 wraps around
+        compressed = zlib.compress(payload.tobytes(), self.level)
+        
+        offset = self._chunk_file.tell()
+        self._chunk_file.write(compressed)
+        
+        self._frames.append([round(frame.timestamp - self._start, 6), self._chunk, offset, len(compressed), int(keyframe)])
+        self._shapes.append([data.shape[0], data.shape[1], data.shape[2] if data.ndim == 3 else 1, order])
+        self._regions.append([region['left'], region['top'], region['width'], region['height']] if region else None)
+        self._previous = data
+        self.bytes_written += len(compressed)
+        self.raw_bytes += data.nbytes
+        
+        self._chunk_count += 1
+        if self._chunk_count >= self.chunk_frames:
+            self._chunk_file.close()
+            self._chunk_file = None
+            self._chunk_count = 0
+            self._write_index()
+            
+    def _open_chunk(self):
+        self._chunk += 1
+        self._chunk_file = open(self.path / f"chunk_{self._chunk:05d}.bin", 'wb')
+        
+    def _write_index(self):
+        index = {
+            'version': FORMAT_VERSION,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'frames': self._frames,
+            'shapes': self._shapes,
+            'regions': self._regions,
+        }
+        tmp = self.path / (INDEX_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        tmp.replace(self.path / INDEX_FILE)
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RecordingReader:
+    """
+    Random access to the frames of a recording
+
+    Decoding a frame replays the differences from its chunk's keyframe;
+    the last decoded frame is kept, so sequential reads decode one frame each.
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / INDEX_FILE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version: {index.get('version')}")
+            
+        self._frames = index['frames']
+        self._shapes = index['shapes']
+        self._regions = index['regions']
+        self.timestamps = [entry[0] for entry in self._frames]
+        
+        self._decoded: Optional[Tuple[int, np.ndarray]] = None
+        self._lock = threading.Lock()
+        
+    def __len__(self) -> int:
+        return len(self._frames)
+        
+    @property
+    def duration(self) -> float:
+        """Seconds between the first and the last frame"""
+        return self.timestamps[-1] if self.timestamps else 0.0
+        
+    def index_at(self, t: float) -> int:
+        """Index of the last frame recorded at or before t seconds"""
+        return max(0, bisect.bisect_right(self.timestamps, t) - 1)
+        
+    def region(self, i: int) -> Dict[str, int]:
+        """Screen area shown by a frame (its own size at the origin if none was recorded)"""
+        region = self._regions[i]
+        if region is None:
+            height, width = self._shapes[i][:2]
+            return {'left': 0, 'top': 0, 'width': width, 'height': height}
+        return dict(zip(('left', 'top', 'width', 'height'), region))
+        
+    def read(self, i: int) -> Frame:
+        """Decode a frame (read-only, timestamp relative to the recording start)"""
+        with self._lock:
+            data = self._decode_locked(i)
+        data.flags.writeable = False
+        return Frame(data, self._shapes[i][3], self.timestamps[i])
+        
+    def _decode_locked(self, i: int) -> np.ndarray:
+        if self._decoded and self._decoded[0] == i:
+            return self._decoded[1]
+            
+        # Start from the previous decoded frame if it is in the same run, else the keyframe
+        start = i
+        while not self._frames[start][4]:
+            start -= 1
+        if self._decoded and start <= self._decoded[0] < i:
+            start, data = self._decoded[0] + 1, self._decoded[1]
+        else:
+            data = None
+            
+        for j in range(start, i + 1):
+            payload = self._payload(j)
+            data = payload if self._frames[j][4] else data + payload
+            
+        self._decoded = (i, data)
+        return data
+        
+    def _payload(self, i: int) -> np.ndarray:
+        _, chunk, offset, length, _ = self._frames[i]
+        with open(self.path / f"chunk_{chunk:05d}.bin", 'rb') as f:
+            f.seek(offset)
+            raw = zlib.decompress(f.read(length))
+        height, width, channels, _ = self._shapes[i]
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        return np.frombuffer(raw, dtype=np.uint8).reshape(shape)
+
+
+class ReplayCapture(ScreenCapture):
+    """
+    Serves a recording through the ScreenCapture interface
+
+    Clock modes:
+        'wall': frames follow real time since the first capture
+        'virtual': every capture advances to the next recorded frame, so a
+            replay sees the same frames however fast the code runs
+
+    After the last frame the recording keeps showing it; check `finished`.
+
+    Usage:
+        replay = ReplayCapture("recordings/session1", clock='virtual')
+        navigator = Navigator(screen_capture=replay, window_tracker=ReplayWindowTracker(replay),
+                              controller=GameController(dry_run=True))
+    """
+    
+    CLOCKS = ('wall', 'virtual')
+    
+    def __init__(self, path, clock: str = 'wall', speed: float = 1.0):
+        if clock not in self.CLOCKS:
+            raise ValueError(f"Unknown clock: {clock}")
+        super().__init__()
+        self.reader = RecordingReader(path)
+        if not len(self.reader):
+            raise ValueError(f"Recording is empty: {path}")
+        self.clock = clock
+        self.speed = speed
+        
+        self._wall_start: Optional[float] = None
+        self._position = -1  # Virtual clock: index of the last served frame
+        self._held = 0  # Depth of hold() blocks
+        self._held_index: Optional[int] = None  # Frame shared inside the outermost hold
+        self._lock = threading.RLock()
+        self.frames_served = 0
+        
+    # ================== Clock ==================
+    
+    @property
+    def current_index(self) -> int:
+        """Index of the frame a capture would return now"""
+        with self._lock:
+            if self.clock == 'virtual':
+                return max(self._position, 0)
+            if self._wall_start is None:
+                return 0
+            return self.reader.index_at((time.monotonic() - self._wall_start) * self.speed)
+            
+    @property
+    def finished(self) -> bool:
+        """True once the last recorded frame has been served"""
+        return self.current_index >= len(self.reader) - 1 and self.frames_served > 0
+        
+    def seek(self, t: float):
+        """Jump to t seconds into the recording"""
+        with self._lock:
+            index = self.reader.index_at(t)
+            if self.clock == 'virtual':
+                self._position = index - 1  # The next capture returns this frame
+            else:
+                self._wall_start = time.monotonic() - t / self.speed
+                
+    def _next_index(self) -> int:
+        with self._lock:
+            if self.clock == 'wall':
+                if self._wall_start is None:
+                    self._wall_start = time.monotonic()
+                return self.current_index
+            if self._held and self._held_index is not None:
+                return self._held_index
+            self._position = min(self._position + 1, len(self.reader) - 1)
+            if self._held:
+                self._held_index = self._position
+            return self._position
+            
+    @contextmanager
+    def hold(self):
+        """Let all captures inside the block see the same frame (one virtual step)"""
+        with self._lock:
+            self._held += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._held -= 1
+                if not self._held:
+                    self._held_index = None
+                    
+    # ================== ScreenCapture interface ==================
+    
+    def _session(self):
+        raise RuntimeError("Replay has no capture session")
+        
+    def capture_frame(self, monitor: int = 1, region: Optional[Dict[str, int]] = None) -> Frame:
+        """Return the recorded frame for the current time, cropped to a region if given"""
+        i = self._next_index()
+        frame = self.reader.read(i)
+        self.frames_served += 1
+        
+        # Stamp with the current time so ages and waits behave as live
+        frame.timestamp = time.monotonic()
+        
+        recorded = self.reader.region(i)
+        if region is None or region == recorded:
+            return frame
+        x = max(0, region['left'] - recorded['left'])
+        y = max(0, region['top'] - recorded['top'])
+        return frame.crop(x, y, region['width'], region['height'])
+        
+    def capture_plan(self, plan, monitor: int = 1, mode: Optional[str] = None, area=None):
+        """Capture the regions of a plan from one recorded frame"""
+        with self.hold():
+            return super().capture_plan(plan, monitor, mode, area)
+            
+    def get_monitor(self, monitor: int = 1) -> Dict[str, int]:
+        """Geometry of the recorded area"""
+        return self.reader.region(self.current_index)
+        
+    def get_screen_size(self) -> Tuple[int, int]:
+        region = self.get_monitor()
+        return region['width'], region['height']
+        
+    def bring_window_to_front(self, window_info: WindowInfo) -> bool:
+        return True
+        
+    def release_thread(self):
+        pass
+        
+    def close(self):
+        pass
+
+
+class ReplayWindowTracker(WindowTracker):
+    """Reports the recorded window geometry of a replay as the game window"""
+    
+    def __init__(self, replay: ReplayCapture, title: Optional[str] = None):
+        super().__init__(title, refresh_interval=0.0)
+        self.replay = replay
+        
+    def _refresh_locked(self):
+        region = self.replay.get_monitor()
+        self._window = WindowInfo(
+            hwnd=0, title=self.title, x=region['left'], y=region['top'],
+            width=region['width'], height=region['height']
+        )
+        
+    def region(self) -> Dict[str, int]:
+        return self.replay.get_monitor()
@@ -0,0 +1,398 @@
+"""
+Trained game state classifier
+
+A softmax (multinomial logistic) model over compact colour and layout
+statistics of the regions detect_game_state looks at (centre, dialog box,
+minimap). Features come from downscaled pyramid levels, so a prediction
+takes well under 2 ms on the CPU. GameDetector uses the model when one is
+loaded and falls back to its hand-tuned rules for unsure predictions.
+
+The dataset is a directory with one sub-directory of screenshots per
+state, e.g. dataset/map/0001.png.
+
+Usage:
+    python -m screen.state_classifier export recordings/run1 unlabeled/ --every 15
+    python -m screen.state_classifier label unlabeled/ dataset/
+    python -m screen.state_classifier train dataset/ --out state_model.npz
+    python -m screen.state_classifier evaluate dataset/ --model state_model.npz
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .detector import GameDetector, GameState
+from .frame import Frame, as_frame
+from .capture_plan import PlanCapture
+from config import get_config
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+LABEL_KEYS = "1234567890abcdefghijklmnoprtuvwxyz"  # One per state when labelling; s and q skip and quit
+
+# Pyramid level of each region: about 160x90, 165x19 and 105x100 pixels at 1080p
+REGION_LEVELS = {'center': 2, 'dialog': 3, 'minimap': 1}
+
+HUE_BINS = 12
+SATURATED_LOWER = np.array([0, 50, 50])
+SATURATED_UPPER = np.array([180, 255, 255])
+VALUE_BINS = 8
+
+
+def _region_features(frame: Frame) -> List[float]:
+    """Colour, brightness, layout and edge statistics of one region"""
+    bgr = frame.bgr
+    means, stds = cv2.meanStdDev(bgr)
+    features = list(means.ravel() / 255) + list(stds.ravel() / 128)
+    
+    # Hue of the saturated pixels, and the share of such pixels
+    hsv = frame.hsv
+    saturated = cv2.inRange(hsv, SATURATED_LOWER, SATURATED_UPPER)
+    count = max(cv2.countNonZero(saturated), 1)
+    hue = cv2.calcHist([hsv], [0], saturated, [HUE_BINS], [0, 180]).ravel() / count
+    features += list(hue) + [cv2.countNonZero(saturated) / saturated.size]
+    
+    gray = frame.gray
+    value = cv2.calcHist([gray], [0], None, [VALUE_BINS], [0, 256]).ravel() / gray.size
+    features += list(value)
+    
+    # Brightness of the four quadrants for coarse layout
+    h, w = gray.shape[:2]
+    for y0, y1 in ((0, h // 2), (h // 2, h)):
+        for x0, x1 in ((0, w // 2), (w // 2, w)):
+            features.append(cv2.mean(gray[y0:y1, x0:x1])[0] / 255)
+            
+    # Edge density: text and UI borders
+    edges = cv2.Laplacian(gray, cv2.CV_16S)
+    features.append(cv2.mean(cv2.convertScaleAbs(edges))[0] / 64)
+    return features
+
+
+REGION_FEATURES = 6 + HUE_BINS + 1 + VALUE_BINS + 4 + 1
+
+
+def extract_features(regions: Dict[str, Optional[Frame]]) -> np.ndarray:
+    """Feature vector of the state regions; a missing region gives zeros plus a flag"""
+    features = []
+    for name, level in REGION_LEVELS.items():
+        frame = regions.get(name)
+        if frame is None or frame.width < 4 or frame.height < 4:
+            features += [0.0] * REGION_FEATURES + [1.0]
+        else:
+            features += _region_features(frame.level(level)) + [0.0]
+    return np.asarray(features, dtype=np.float32)
+
+
+class StateClassifier:
+    """
+    Multinomial logistic regression over state features
+
+    Usage:
+        model = StateClassifier.load("state_model.npz")
+        state, confidence = model.predict(frame)
+    """
+    
+    def __init__(self, detector: Optional[GameDetector] = None, min_confidence: float = 0.6):
+        self.detector = detector or GameDetector()
+        self.min_confidence = min_confidence  # Below this GameDetector uses its rules
+        self.classes: List[GameState] = []
+        self.weights: Optional[np.ndarray] = None  # (features, classes)
+        self.bias: Optional[np.ndarray] = None
+        self.mean: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+        
+    @property
+    def is_trained(self) -> bool:
+        return self.weights is not None
+        
+    # ================== Features ==================
+    
+    def regions(self, screen) -> Dict[str, Optional[Frame]]:
+        """Crop the state regions of a frame, or take them from a game_state_plan() capture"""
+        if isinstance(screen, PlanCapture):
+            return {name: screen.get(name) for name in REGION_LEVELS}
+            
+        screen = as_frame(screen)
+        detector = self.detector
+        if (screen.width, screen.height) != tuple(detector.resolution):
+            detector = GameDetector((screen.width, screen.height))
+            
+        regions = {}
+        for name, region in (
+            ('center', GameDetector.CENTER_REGION),
+            ('dialog', GameDetector.DIALOG_REGION),
+            ('minimap', GameDetector.MINIMAP_REGION),
+        ):
+            x, y, w, h = detector._scale_region(region)
+            regions[name] = screen.crop(x, y, w, h) if x + w <= screen.width and y + h <= screen.height else None
+        return regions
+        
+    def features(self, screen) -> np.ndarray:
+        return extract_features(self.regions(screen))
+        
+    # ================== Inference ==================
+    
+    def predict_proba(self, screen) -> np.ndarray:
+        """Class probabilities of a Frame, RGB array or plan capture"""
+        if not self.is_trained:
+            raise RuntimeError("State classifier is not trained")
+        x = (self.features(screen) - self.mean) / self.scale
+        return _softmax(x @ self.weights + self.bias)
+        
+    def predict(self, screen) -> Tuple[GameState, float]:
+        """Most likely state and its probability"""
+        probabilities = self.predict_proba(screen)
+        best = int(np.argmax(probabilities))
+        return self.classes[best], float(probabilities[best])
+        
+    # ================== Training ==================
+    
+    def fit(
+        self,
+        features: np.ndarray,
+        labels: List[GameState],
+        epochs: int = 500,
+        learning_rate: float = 0.5,
+        l2: float = 1e-3
+    ) -> float:
+        """
+        Train with full-batch gradient descent
+
+        Returns:
+            Final training cross-entropy
+        """
+        self.classes = sorted(set(labels), key=lambda state: state.value)
+        index = {state: i for i, state in enumerate(self.classes)}
+        y = np.array([index[label] for label in labels])
+        targets = np.eye(len(self.classes), dtype=np.float32)[y]
+        
+        self.mean = features.mean(axis=0)
+        self.scale = features.std(axis=0) + 1e-6
+        x = (features - self.mean) / self.scale
+        
+        n, d = x.shape
+        self.weights = np.zeros((d, len(self.classes)), dtype=np.float32)
+        self.bias = np.zeros(len(self.classes), dtype=np.float32)
+        
+        loss = 0.0
+        for _ in range(epochs):
+            probabilities = _softmax(x @ self.weights + self.bias)
+            error = (probabilities - targets) / n
+            self.weights -= learning_rate * (x.T @ error + l2 * self.weights)
+            self.bias -= learning_rate * error.sum(axis=0)
+            loss = -np.mean(np.log(probabilities[np.arange(n), y] + 1e-9))
+        return float(loss)
+        
+    def save(self, filepath: str):
+        np.savez(
+            filepath,
+            classes=np.array([state.value for state in self.classes]),
+            weights=self.weights, bias=self.bias, mean=self.mean, scale=self.scale
+        )
+        
+    @classmethod
+    def load(
+        cls,
+        filepath: str,
+        detector: Optional[GameDetector] = None,
+        min_confidence: float = 0.6
+    ) -> 'StateClassifier':
+        model = cls(detector, min_confidence)
+        with np.load(filepath) as data:
+            model.classes = [GameState(value) for value in data['classes']]
+            model.weights = data['weights']
+            model.bias = data['bias']
+            model.mean = data['mean']
+            model.scale = data['scale']
+        return model
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def load_state_classifier(detector: Optional[GameDetector] = None, log_callback=print) -> Optional[StateClassifier]:
+    """Load the model set in the config, None if none is set or it cannot be read"""
+    config = get_config()
+    if not config.state_classifier_path:
+        return None
+    try:
+        return StateClassifier.load(config.state_classifier_path, detector, config.state_classifier_min_confidence)
+    except (OSError, KeyError, ValueError) as e:
+        if log_callback:
+            log_callback(f"⚠️ 状态分类模型加载失败: {e}")
+        return None
+
+
+# ================== Dataset and CLI ==================
+
+def load_dataset(dataset_dir: str) -> Tuple[List[Path], List[GameState]]:
+    """Screenshots and labels of a dataset/<state>/*.png directory"""
+    paths, labels = [], []
+    for state_dir in sorted(Path(dataset_dir).iterdir()):
+        if not state_dir.is_dir():
+            continue
+        state = GameState(state_dir.name)
+        for path in sorted(state_dir.iterdir()):
+            if path.suffix.lower() in IMAGE_EXTENSIONS:
+                paths.append(path)
+                labels.append(state)
+    return paths, labels
+
+
+def _read_image(path: Path) -> Frame:
+    # imdecode handles non-ASCII paths on Windows, unlike imread
+    image = cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Cannot read image: {path}")
+    return Frame(image, 'BGR')
+
+
+def _write_image(path: Path, image: np.ndarray):
+    ok, encoded = cv2.imencode(path.suffix, image)
+    if ok:
+        encoded.tofile(str(path))
+
+
+def _feature_matrix(model: StateClassifier, paths: List[Path]) -> np.ndarray:
+    return np.stack([model.features(_read_image(path)) for path in paths])
+
+
+def _command_export(args):
+    """Save every n-th frame of a recording as a PNG"""
+    from .recording import RecordingReader
+    reader = RecordingReader(args.recording)
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for i in range(0, len(reader), args.every):
+        frame = reader.read(i)
+        _write_image(out / f"{Path(args.recording).name}_{i:06d}.png", frame.bgr)
+        count += 1
+    print(f"🖼️ 导出 {count} 张截图到 {out}")
+
+
+def _label_keys() -> Dict[str, GameState]:
+    """Map one labelling key to every game state"""
+    states = list(GameState)
+    assert len(states) <= len(LABEL_KEYS), "Not enough labelling keys"
+    keys = dict(zip(LABEL_KEYS, states))
+    assert len(keys) == len(states) and not {'s', 'q'} & keys.keys()
+    return keys
+
+
+def _command_label(args):
+    """Show unlabeled screenshots and move each into the folder of the pressed state"""
+    keys = _label_keys()
+    print("按键 / Keys: " + "  ".join(f"{key}={state.value}" for key, state in keys.items()))
+    print("s=跳过 / skip   q=退出 / quit")
+    
+    out = Path(args.dataset)
+    images = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    labeled = 0
+    for path in images:
+        frame = _read_image(path)
+        preview = cv2.resize(frame.bgr, (960, int(960 * frame.height / frame.width)))
+        cv2.imshow("label", preview)
+        key = chr(cv2.waitKey(0) & 0xFF)
+        if key == 'q':
+            break
+        if key not in keys:
+            continue
+        target = out / keys[key].value
+        target.mkdir(parents=True, exist_ok=True)
+        path.replace(target / path.name)
+        labeled += 1
+    cv2.destroyAllWindows()
+    print(f"🏷️ 已标注 {labeled} 张")
+
+
+def _command_train(args):
+    paths, labels = load_dataset(args.dataset)
+    if not paths:
+        raise SystemExit("数据集为空 / Empty dataset")
+    model = StateClassifier()
+    features = _feature_matrix(model, paths)
+    
+    # Hold out every k-th sample to report generalisation
+    holdout = np.arange(len(paths)) % args.holdout_every == 0 if args.holdout_every else np.zeros(len(paths), bool)
+    train_labels = [label for label, held in zip(labels, holdout) if not held]
+    loss = model.fit(features[~holdout], train_labels, epochs=args.epochs, learning_rate=args.lr, l2=args.l2)
+    print(f"📉 训练损失 {loss:.4f}，样本 {len(train_labels)}，类别 {[s.value for s in model.classes]}")
+    
+    if holdout.any():
+        _report(model, features[holdout], [label for label, held in zip(labels, holdout) if held])
+        
+    # Final model uses all samples
+    model.fit(features, labels, epochs=args.epochs, learning_rate=args.lr, l2=args.l2)
+    model.save(args.out)
+    print(f"💾 模型已保存: {args.out}")
+
+
+def _command_evaluate(args):
+    paths, labels = load_dataset(args.dataset)
+    model = StateClassifier.load(args.model)
+    _report(model, _feature_matrix(model, paths), labels)
+    
+    # Inference time on the first screenshot, features included
+    frame = _read_image(paths[0])
+    start = time.perf_counter()
+    for _ in range(50):
+        model.predict(Frame(frame.data, frame.order))
+    print(f"⏱️ 单次推理 {(time.perf_counter() - start) * 1000 / 50:.2f} ms")
+
+
+def _report(model: StateClassifier, features: np.ndarray, labels: List[GameState]):
+    """Print accuracy and per-state recall"""
+    x = (features - model.mean) / model.scale
+    predicted = [model.classes[i] for i in np.argmax(x @ model.weights + model.bias, axis=1)]
+    correct = sum(p == t for p, t in zip(predicted, labels))
+    print(f"🎯 准确率 {correct}/{len(labels)} = {correct / len(labels):.1%}")
+    for state in sorted(set(labels), key=lambda s: s.value):
+        hits = sum(p == t == state for p, t in zip(predicted, labels))
+        total = sum(t == state for t in labels)
+        print(f"   {state.value:<12} {hits}/{total}")
+
+
+def main():
+    """Headless entry point"""
+    parser = argparse.ArgumentParser(description="游戏状态分类器 / Game state classifier")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    export = commands.add_parser('export', help="从录制导出截图")
+    export.add_argument('recording', help="录制目录")
+    export.add_argument('out', help="输出目录")
+    export.add_argument('--every', type=int, default=15, help="每隔多少帧导出一张")
+    
+    label = commands.add_parser('label', help="标注截图")
+    label.add_argument('images', help="未标注截图目录")
+    label.add_argument('dataset', help="数据集目录")
+    
+    train = commands.add_parser('train', help="训练模型")
+    train.add_argument('dataset', help="数据集目录")
+    train.add_argument('--out', default="state_model.npz", help="模型文件")
+    train.add_argument('--epochs', type=int, default=500)
+    train.add_argument('--lr', type=float, default=0.5)
+    train.add_argument('--l2', type=float, default=1e-3)
+    train.add_argument('--holdout-every', type=int, default=5, help="每 k 个样本留出一个做验证 (0 = 不留出)")
+    
+    evaluate = commands.add_parser('evaluate', help="评估模型")
+    evaluate.add_argument('dataset', help="数据集目录")
+    evaluate.add_argument('--model', default="state_model.npz", help="模型文件")
+    
+    args = parser.parse_args()
+    {
+        'export': _command_export,
+        'label': _command_label,
+        'train': _command_train,
+        'evaluate': _command_evaluate,
+    }[args.command](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+"""
+Background game state watcher
+
+A single thread runs the game state check on every captured frame and
+publishes debounced transitions. A new state is only accepted once it was
+seen on confirm_frames consecutive frames, so a single misdetected frame
+(a flash, a half-faded dialog) does not flip the state. Waiters block on a
+condition variable and wake on the frame that confirms the transition
+instead of polling with fixed sleeps.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Iterable, List, Optional, Set, Union
+
+from .capture import ScreenCapture
+from .capture_plan import PlanCapture
+from .capture_service import CaptureService
+from .change_detector import ChangeDetector, PerceptionMemo
+from .detector import GameDetector, GameState
+from config import get_config
+
+
+@dataclass
+class StateTransition:
+    """A debounced change of the game state"""
+    state: GameState
+    previous: Optional[GameState]  # None for the first state seen
+    timestamp: float  # time.monotonic() of the first frame showing the state
+    confirmed_at: float  # time.monotonic() when the state was accepted
+    confidence: float  # Share of the recent frames that showed the state
+
+
+class GameStateWatcher:
+    """
+    Publishes debounced game state transitions from the capture stream
+
+    Frames come from a running CaptureService; without one the watcher
+    captures the state regions itself at the capture FPS.
+
+    Usage:
+        watcher = GameStateWatcher(detector, capture_service)
+        watcher.start()
+        since = time.monotonic()
+        controller.open_map()
+        transition = watcher.wait_for(GameState.MAP, timeout=3.0, since=since)
+        watcher.stop()
+    """
+    
+    HISTORY_SIZE = 64  # Transitions kept for wait_for(since=...)
+    
+    def __init__(
+        self,
+        detector: GameDetector,
+        capture_service: Optional[CaptureService] = None,
+        screen_capture: Optional[ScreenCapture] = None,
+        window_tracker=None,
+        confirm_frames: Optional[int] = None,
+        fps: Optional[float] = None,
+        log_callback=None
+    ):
+        config = get_config()
+        self.detector = detector
+        self.capture_service = capture_service
+        self.screen = screen_capture or (capture_service.screen if capture_service else ScreenCapture())
+        self.window_tracker = window_tracker
+        self.confirm_frames = max(1, confirm_frames or config.state_watcher_confirm_frames)
+        self.fps = fps or config.capture_fps
+        self.log_callback = log_callback
+        
+        # Recent raw detections; confidence is measured over this window
+        self._observations: Deque[GameState] = deque(maxlen=2 * self.confirm_frames)
+        self._candidate: Optional[GameState] = None
+        self._candidate_since = 0.0
+        self._candidate_frames = 0
+        
+        self._current: Optional[StateTransition] = None
+        self._history: Deque[StateTransition] = deque(maxlen=self.HISTORY_SIZE)
+        self._frames = 0
+        
+        # The navigator's change detector belongs to its own thread
+        self._state_plan = detector.game_state_plan()
+        self._state_regions = {
+            "center": GameDetector.CENTER_REGION,
+            "dialog": GameDetector.DIALOG_REGION,
+            "minimap": GameDetector.MINIMAP_REGION,
+        }
+        self._changes = ChangeDetector(self._state_regions)
+        self._perception = PerceptionMemo()
+        
+        self._condition = threading.Condition()
+        # Serialises observe and reset; detection runs outside the condition so waiters are not held up
+        self._observe_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+    def log(self, message: str):
+        """Log a message"""
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+            
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+        
+    @property
+    def state(self) -> Optional[GameState]:
+        """Current debounced state (None before the first state is confirmed)"""
+        current = self._current
+        return current.state if current else None
+        
+    @property
+    def current(self) -> Optional[StateTransition]:
+        """Transition into the current state"""
+        return self._current
+        
+    @property
+    def confidence(self) -> float:
+        """Share of the recent frames that agree with the current state"""
+        with self._condition:
+            if self._current is None or not self._observations:
+                return 0.0
+            return self._observations.count(self._current.state) / len(self._observations)
+            
+    @property
+    def frame_count(self) -> int:
+        """Frames checked since start"""
+        return self._frames
+        
+    def history(self) -> List[StateTransition]:
+        """Recent transitions, oldest first"""
+        with self._condition:
+            return list(self._history)
+            
+    def last_entered(self, state: GameState) -> Optional[float]:
+        """Timestamp of the latest transition into a state, None if not in the history"""
+        with self._condition:
+            for transition in reversed(self._history):
+                if transition.state == state:
+                    return transition.timestamp
+        return None
+        
+    # ================== Lifecycle ==================
+    
+    def start(self):
+        """Start the watcher thread"""
+        if self.is_running:
+            return
+            
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name="GameStateWatcher", daemon=True)
+        self._thread.start()
+        
+    def stop(self, timeout: float = 1.0):
+        """Stop the watcher thread and wake all waiters"""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+            
+    def reset(self):
+        """Forget the current state and all transitions"""
+        with self._observe_lock, self._condition:
+            self._observations.clear()
+            self._candidate = None
+            self._candidate_frames = 0
+            self._current = None
+            self._history.clear()
+            self._changes.reset()
+            self._perception.clear()
+            
+    def _watch_loop(self):
+        """Check loop (runs in thread)"""
+        last_timestamp = 0.0
+        next_tick = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    if self.capture_service is not None and self.capture_service.is_running:
+                        # Exactly one check per captured frame
+                        captured = self.capture_service.wait_for_newer(last_timestamp, timeout=0.5)
+                        if captured is None:
+                            continue
+                        last_timestamp = captured.timestamp
+                        self.observe(captured.frame, captured.timestamp)
+                        continue
+                        
+                    # No capture thread: grab only the state regions at the capture rate
+                    area = self.window_tracker.region() if self.window_tracker else None
+                    screen = self.screen.capture_plan(self._state_plan, area=area)
+                    self.observe(screen, time.monotonic())
+                except Exception as e:
+                    self.log(f"⚠️ 状态监视失败: {str(e)[:50]}")
+                    self._stop_event.wait(0.5)
+                    
+                next_tick += 1.0 / self.fps
+                now = time.monotonic()
+                if next_tick < now:
+                    next_tick = now
+                self._stop_event.wait(next_tick - now)
+        finally:
+            # The mss session belongs to this thread
+            self.screen.release_thread()
+            with self._condition:
+                self._condition.notify_all()
+                
+    # ================== Detection ==================
+    
+    def observe(self, screen, timestamp: Optional[float] = None) -> Optional[StateTransition]:
+        """
+        Check one frame and update the debounced state
+
+        Called by the watcher thread; can also be fed frames directly,
+        e.g. from a replay, without starting the thread.
+
+        Returns:
+            The transition if this frame confirmed a new state, else None
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self._observe_lock:
+            return self._observe_locked(screen, timestamp)
+            
+    def _observe_locked(self, screen, timestamp: float) -> Optional[StateTransition]:
+        """Body of observe (caller holds the observe lock)"""
+        change = self._changes.update(screen)
+        # A full frame is classified from whole-screen statistics too (loading, pause);
+        # a plan capture from all its regions, including the overview strips
+        regions = list(self._state_plan.regions) if isinstance(screen, PlanCapture) else None
+        state = self._perception.get(
+            "game_state", change, lambda: self.detector.detect_game_state(screen), regions
+        )
+        
+        with self._condition:
+            self._frames += 1
+            self._observations.append(state)
+            
+            if state == self._candidate:
+                self._candidate_frames += 1
+            else:
+                self._candidate = state
+                self._candidate_since = timestamp
+                self._candidate_frames = 1
+                
+            if self._current is not None and state == self._current.state:
+                return None
+            if self._candidate_frames < self.confirm_frames:
+                return None
+                
+            transition = StateTransition(
+                state=state,
+                previous=self._current.state if self._current else None,
+                timestamp=self._candidate_since,
+                confirmed_at=time.monotonic(),
+                confidence=self._observations.count(state) / len(self._observations)
+            )
+            self._current = transition
+            self._history.append(transition)
+            self._condition.notify_all()
+            return transition
+            
+    # ================== Waiting ==================
+    
+    def wait_for(
+        self,
+        states: Union[GameState, Iterable[GameState]],
+        timeout: float,
+        since: Optional[float] = None
+    ) -> Optional[StateTransition]:
+        """
+        Block until the debounced state is one of the given states
+
+        Args:
+            states: State or states to wait for
+            timeout: Maximum time to wait in seconds
+            since: time.monotonic() value; when set, only a transition into
+                the state that happened after it counts, even if the state
+                has already been left again (short loading screens)
+
+        Returns:
+            The matching transition, or None on timeout or when stopped
+        """
+        wanted = _state_set(states)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                transition = self._match_locked(wanted, since)
+                if transition is not None:
+                    return transition
+                    
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop_event.is_set():
+                    return None
+                self._condition.wait(remaining)
+                
+    def wait_while(
+        self,
+        states: Union[GameState, Iterable[GameState]],
+        timeout: float,
+        since: Optional[float] = None
+    ) -> Optional[StateTransition]:
+        """Block until the debounced state is none of the given states"""
+        return self.wait_for(set(GameState) - _state_set(states), timeout, since)
+        
+    def _match_locked(self, wanted: Set[GameState], since: Optional[float]) -> Optional[StateTransition]:
+        """Find the transition satisfying a wait (caller holds the lock)"""
+        if since is None:
+            if self._current is not None and self._current.state in wanted:
+                return self._current
+            return None
+            
+        for transition in self._history:
+            if transition.timestamp >= since and transition.state in wanted:
+                return transition
+        return None
+
+
+def _state_set(states: Union[GameState, Iterable[GameState]]) -> Set[GameState]:
+    """Normalize one or more states to a set"""
+    if isinstance(states, GameState):
+        return {states}
+    return set(states)
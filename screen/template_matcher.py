@@ -4,11 +4,14 @@ Uses OpenCV to find game UI elements like waypoints, buttons, etc.
 """
 import cv2
 import numpy as np
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 from dataclasses import dataclass
 from pathlib import Path
 import os
 
+from .frame import Frame, as_frame
+from instrumentation import timed
+
 
 @dataclass
 class MatchResult:
@@ -83,9 +86,10 @@ class TemplateMatcher:
         cv2.imwrite(str(filepath), image)
         self.templates[name] = image
         
+    @timed("template.find")
     def find_template(
         self, 
-        screen: np.ndarray, 
+        screen: Union[Frame, np.ndarray], 
         template_name: str,
         threshold: float = 0.8,
         max_results: int = 10
@@ -94,7 +98,7 @@ class TemplateMatcher:
         Find all occurrences of a template in the screen
         
         Args:
-            screen: Screenshot to search in
+            screen: Screenshot to search in (Frame or BGR array)
             template_name: Name of template to find
             threshold: Minimum confidence threshold (0-1)
             max_results: Maximum number of results to return
@@ -103,11 +107,13 @@ class TemplateMatcher:
             return []
             
         template = self.templates[template_name]
-        return self._match_template(screen, template, template_name, threshold, max_results)
+        # Templates are BGR (cv2.imread); a Frame converts to BGR once for all templates
+        return self._match_template(as_frame(screen, 'BGR').bgr, template, template_name, threshold, max_results)
         
+    @timed("template.waypoints")
     def find_all_waypoints(
         self, 
-        screen: np.ndarray,
+        screen: Union[Frame, np.ndarray],
         threshold: float = 0.75
     ) -> List[MatchResult]:
         """Find all waypoint-type icons on the map"""
@@ -122,9 +128,10 @@ class TemplateMatcher:
         results.sort(key=lambda x: x.confidence, reverse=True)
         return results
         
+    @timed("template.chests")
     def find_chests(
         self, 
-        screen: np.ndarray,
+        screen: Union[Frame, np.ndarray],
         threshold: float = 0.7
     ) -> List[MatchResult]:
         """Find all chest icons"""
@@ -137,9 +144,10 @@ class TemplateMatcher:
             
         return results
         
+    @timed("template.oculi")
     def find_oculi(
         self, 
-        screen: np.ndarray,
+        screen: Union[Frame, np.ndarray],
         threshold: float = 0.7
     ) -> List[MatchResult]:
         """Find all oculus icons"""
@@ -253,9 +261,10 @@ class TemplateMatcher:
         
         return intersection / union if union > 0 else 0.0
         
+    @timed("template.button")
     def find_button(
         self,
-        screen: np.ndarray,
+        screen: Union[Frame, np.ndarray],
         button_name: str,
         threshold: float = 0.8
     ) -> Optional[MatchResult]:
@@ -263,17 +272,19 @@ class TemplateMatcher:
         results = self.find_template(screen, button_name, threshold, max_results=1)
         return results[0] if results else None
         
+    @timed("template.interact_prompt")
     def find_interact_prompt(
         self,
-        screen: np.ndarray,
+        screen: Union[Frame, np.ndarray],
         threshold: float = 0.8
     ) -> Optional[MatchResult]:
         """Find the F key interaction prompt"""
         return self.find_button(screen, "interact_prompt", threshold)
         
+    @timed("template.teleport_button")
     def find_teleport_button(
         self,
-        screen: np.ndarray,
+        screen: Union[Frame, np.ndarray],
         threshold: float = 0.8
     ) -> Optional[MatchResult]:
         """Find the teleport confirmation button"""
@@ -282,7 +293,7 @@ class TemplateMatcher:
 
 # Helper function to create templates from screenshots
 def create_template_from_region(
-    screen: np.ndarray,
+    screen: Union[Frame, np.ndarray],
     x: int, y: int, 
     width: int, height: int,
     name: str,
@@ -296,6 +307,6 @@ def create_template_from_region(
         # Select region containing waypoint icon
         create_template_from_region(screen, 100, 200, 50, 50, "waypoint", matcher)
     """
-    template = screen[y:y+height, x:x+width].copy()
+    template = as_frame(screen, 'BGR').crop(x, y, width, height).bgr.copy()
     matcher.save_template(name, template)
     return template
@@ -0,0 +1,203 @@
+"""
+Object tracking between frames
+
+A tracker starts from one detection and follows the object by template
+matching in a small window around the position predicted by a
+constant-velocity Kalman filter, at a few scales so it keeps up as the
+object grows on approach. An update converts and matches only that window,
+at half resolution, instead of running a full-frame detection; full
+detection is only needed again once the track is lost.
+"""
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .detector import DetectedObject
+from .frame import Frame, as_frame
+from instrumentation import timed
+
+
+def _refine(values: np.ndarray) -> float:
+    """Sub-pixel offset of a peak from a parabola through it and its neighbours"""
+    if len(values) < 3:
+        return 0.0
+    left, center, right = (float(v) for v in values)
+    curvature = left - 2 * center + right
+    return 0.0 if curvature >= 0 else 0.5 * (left - right) / curvature
+
+
+class ObjectTracker:
+    """
+    Follows one detected object across frames
+
+    Usage:
+        tracker = ObjectTracker(detection, frame)
+        tracked = tracker.update(next_frame)
+        if tracker.lost:
+            ...  # detect again and start a new tracker
+    """
+    
+    CONTEXT = 0.25  # Template border around the object, as a share of its size, so its edges are matched
+    SCALES = (1.0, 0.95, 1.05)  # Template scales tried per update, the current size first
+    SCALE_GAIN = 0.01  # Score a new scale must win by, so the size does not wander on noise
+    LEVEL = 1  # Pyramid level matched at, positions are accurate to about 2^LEVEL px
+    SEARCH_MARGIN = 1.0  # Window padding around the prediction, as a share of the object size
+    MAX_SEARCH = 400  # Cap of the padding in pixels
+    MIN_SCORE = 0.5  # Normalized correlation needed to accept a match
+    REFRESH_SCORE = 0.8  # Only matches at least this good update the template
+    REFRESH_RATE = 0.1  # Weight of the matched patch when blended into the template
+    MAX_MISSES = 3  # Consecutive missed frames before the track is lost
+    DEFAULT_DT = 1 / 15  # Seconds between updates when frames carry no timestamp
+    PROCESS_NOISE = 2000.0  # Acceleration spectral density (px²/s³)
+    MEASUREMENT_NOISE = 2.0  # Matching error (px)
+    
+    def __init__(self, detection: DetectedObject, screen: Union[Frame, np.ndarray]):
+        frame = as_frame(screen)
+        self.object_type = detection.object_type
+        self.width = max(4, detection.width)
+        self.height = max(4, detection.height)
+        self.score = detection.confidence
+        self.misses = 0
+        self.timestamp = frame.timestamp
+        
+        tw, th = self._template_size(self.width, self.height)
+        x0, y0 = detection.x - tw // 2, detection.y - th // 2
+        inside = x0 >= 0 and y0 >= 0 and x0 + tw <= frame.shape[1] and y0 + th <= frame.shape[0]
+        self.template = self._patch(frame, x0, y0, tw, th) if inside else None
+        
+        # State (x, y, vx, vy), position measured
+        self.kalman = cv2.KalmanFilter(4, 2)
+        self.kalman.measurementMatrix = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype=np.float32)
+        self.kalman.measurementNoiseCov = np.eye(2, dtype=np.float32) * self.MEASUREMENT_NOISE ** 2
+        self.kalman.errorCovPost = np.diag([4.0, 4.0, 1e4, 1e4]).astype(np.float32)
+        self.kalman.statePost = np.array([[detection.x], [detection.y], [0], [0]], dtype=np.float32)
+        
+    @classmethod
+    def _patch(cls, frame: Frame, x: int, y: int, w: int, h: int) -> Optional[np.ndarray]:
+        """Gray rectangle clipped to the frame and reduced to the matching level"""
+        fh, fw = frame.shape[:2]
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(fw, x + w), min(fh, y + h)
+        factor = 1 << cls.LEVEL
+        if x1 - x0 < factor or y1 - y0 < factor:
+            return None
+        # A crop's gray would convert its whole parent frame
+        crop = frame.crop(x0, y0, x1 - x0, y1 - y0)
+        gray = Frame(np.ascontiguousarray(crop.data), crop.order).gray
+        size = ((x1 - x0) // factor, (y1 - y0) // factor)
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        
+    @classmethod
+    def _template_size(cls, width: float, height: float) -> Tuple[int, int]:
+        return int(round(width * (1 + 2 * cls.CONTEXT))), int(round(height * (1 + 2 * cls.CONTEXT)))
+        
+    @property
+    def lost(self) -> bool:
+        return self.misses >= self.MAX_MISSES or self.template is None
+        
+    @property
+    def position(self) -> Tuple[float, float]:
+        """Last estimated centre"""
+        state = self.kalman.statePost
+        return float(state[0, 0]), float(state[1, 0])
+        
+    def _predict(self, dt: float) -> Tuple[float, float, float]:
+        """Advance the filter by dt seconds, returns the predicted centre and its std"""
+        self.kalman.transitionMatrix = np.array([
+            [1, 0, dt, 0],
+            [0, 1, 0, dt],
+            [0, 0, 1, 0],
+            [0, 0, 0, 1],
+        ], dtype=np.float32)
+        # Discrete white-noise acceleration model
+        q = self.PROCESS_NOISE
+        block = np.array([[dt ** 3 / 3, dt ** 2 / 2], [dt ** 2 / 2, dt]], dtype=np.float32) * q
+        noise = np.zeros((4, 4), dtype=np.float32)
+        noise[np.ix_([0, 2], [0, 2])] = block
+        noise[np.ix_([1, 3], [1, 3])] = block
+        self.kalman.processNoiseCov = noise
+        
+        state = self.kalman.predict()
+        covariance = self.kalman.errorCovPre
+        spread = float(np.sqrt(max(covariance[0, 0], covariance[1, 1])))
+        return float(state[0, 0]), float(state[1, 0]), spread
+        
+    @timed("tracker.update")
+    def update(self, screen: Union[Frame, np.ndarray]) -> Optional[DetectedObject]:
+        """
+        Find the object in a new frame
+
+        Returns:
+            The tracked object with the match score as confidence, or None
+            if it was not found (see lost)
+        """
+        if self.template is None:
+            return None
+            
+        frame = as_frame(screen)
+        dt = frame.timestamp - self.timestamp if frame.timestamp > self.timestamp else self.DEFAULT_DT
+        self.timestamp = frame.timestamp
+        px, py, spread = self._predict(dt)
+        
+        # Window around the prediction, wider while the motion is uncertain
+        factor = 1 << self.LEVEL
+        th, tw = self.template.shape
+        big_w = int(tw * factor * max(self.SCALES)) + factor
+        big_h = int(th * factor * max(self.SCALES)) + factor
+        pad = int(min(self.MAX_SEARCH, self.SEARCH_MARGIN * max(self.width, self.height) + 3 * spread))
+        wx = int(px) - big_w // 2 - pad
+        wy = int(py) - big_h // 2 - pad
+        window = self._patch(frame, wx, wy, big_w + 2 * pad, big_h + 2 * pad)
+        if window is None:
+            return self._missed()
+            
+        best = None
+        for scale in self.SCALES:
+            size = (max(1, int(round(tw * scale))), max(1, int(round(th * scale))))
+            if window.shape[0] < size[1] or window.shape[1] < size[0]:
+                continue
+            template = self.template if scale == 1.0 else cv2.resize(self.template, size, interpolation=cv2.INTER_AREA)
+            scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (mx, my) = cv2.minMaxLoc(scores)
+            if best is None or score > best[0] + self.SCALE_GAIN:
+                best = (score, mx, my, scale, template, scores)
+        if best is None or best[0] < self.MIN_SCORE:
+            return self._missed()
+        score, mx, my, scale, template, scores = best
+        th, tw = template.shape
+        
+        # Sub-pixel centre in the window, then in the frame (the window may be clipped at the border)
+        cx = mx + _refine(scores[my, max(0, mx - 1):mx + 2]) + tw / 2
+        cy = my + _refine(scores[max(0, my - 1):my + 2, mx]) + th / 2
+        x = max(0, wx) + cx * factor
+        y = max(0, wy) + cy * factor
+        self.kalman.correct(np.array([[x], [y]], dtype=np.float32))
+        self.misses = 0
+        self.score = score
+        self.width *= scale
+        self.height *= scale
+        
+        if score >= self.REFRESH_SCORE:
+            # Blend confident matches in slowly: the template follows gradual changes of
+            # lighting and size, while one misplaced match cannot pull the track away
+            patch = cv2.getRectSubPix(window, (tw, th), (cx - 0.5, cy - 0.5))
+            self.template = cv2.addWeighted(template, 1 - self.REFRESH_RATE, patch, self.REFRESH_RATE, 0)
+        else:
+            self.template = template
+            
+        return DetectedObject(
+            object_type=self.object_type,
+            x=int(round(x)),
+            y=int(round(y)),
+            width=int(round(self.width)),
+            height=int(round(self.height)),
+            confidence=float(score)
+        )
+        
+    def _missed(self) -> None:
+        # The prediction stands in for the position until the track is lost
+        self.kalman.statePost = self.kalman.statePre.copy()
+        self.kalman.errorCovPost = self.kalman.errorCovPre.copy()
+        self.misses += 1
+        return None
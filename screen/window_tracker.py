@@ -0,0 +1,132 @@
+"""
+Game window tracking
+
+Finds the game window once and caches its client area. The geometry is
+refreshed cheaply from the window handle when it is older than the refresh
+interval or after invalidate(), so captures can cover just the game and
+image coordinates can be mapped back to screen space.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .capture import ScreenCapture, WindowInfo, WIN32_AVAILABLE
+from .x11_backend import get_backend
+from config import get_config
+
+if WIN32_AVAILABLE:
+    import win32gui
+
+
+class WindowTracker:
+    """
+    Caches the game window's client area
+
+    Falls back to the primary monitor when the window cannot be found
+    (e.g. on platforms without window enumeration), so callers can always
+    use region() and to_screen().
+
+    Usage:
+        tracker = WindowTracker()
+        frame = screen_capture.capture_frame(region=tracker.region())
+        controller.set_coordinate_mapper(tracker.to_screen)
+        controller.click_at(x, y)  # Image coordinates; the mapper converts them to the screen
+    """
+    
+    def __init__(self, title: Optional[str] = None, refresh_interval: float = 1.0):
+        self.title = title or get_config().game_window_title
+        self.refresh_interval = refresh_interval
+        
+        self._window: Optional[WindowInfo] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        
+    @property
+    def window(self) -> Optional[WindowInfo]:
+        """The game window's client area, or None if not found"""
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.refresh_interval:
+                self._refresh_locked()
+            return self._window
+            
+    def refresh(self, force: bool = False) -> Optional[WindowInfo]:
+        """
+        Update the cached geometry
+
+        Args:
+            force: Search for the window again instead of reading the cached handle
+        """
+        with self._lock:
+            if force:
+                self._window = None
+            self._refresh_locked()
+            return self._window
+            
+    def invalidate(self):
+        """Re-read the geometry on next use (e.g. after a move or resize event)"""
+        with self._lock:
+            self._checked_at = 0.0
+            
+    def _refresh_locked(self):
+        """Refresh from the window handle, searching only when it is gone"""
+        self._checked_at = time.monotonic()
+        
+        if self._window is not None:
+            client = self._client_area(self._window.hwnd, self._window.title)
+            if client is not None:
+                self._window = client
+                return
+                
+        found = ScreenCapture.find_game_window(self.title)
+        self._window = self._client_area(found.hwnd, found.title) if found else None
+        
+    @staticmethod
+    def _client_area(hwnd: int, title: str) -> Optional[WindowInfo]:
+        """Get the client area of a window in screen coordinates"""
+        if not WIN32_AVAILABLE:
+            # X11 windows are listed by their client area already
+            backend = get_backend()
+            if backend is None:
+                return None
+            try:
+                return backend.window_info(hwnd, title)
+            except RuntimeError:
+                return None
+                
+        try:
+            if not win32gui.IsWindow(hwnd):
+                return None
+            _, _, width, height = win32gui.GetClientRect(hwnd)
+            left, top = win32gui.ClientToScreen(hwnd, (0, 0))
+        except Exception:
+            return None
+            
+        if width <= 0 or height <= 0:
+            # Minimized windows have an empty client area
+            return None
+        return WindowInfo(hwnd=hwnd, title=title, x=left, y=top, width=width, height=height)
+        
+    # ================== Geometry ==================
+    
+    def region(self) -> Dict[str, int]:
+        """Capture region of the client area (primary monitor if no window)"""
+        window = self.window
+        if window is not None:
+            return {'left': window.x, 'top': window.y, 'width': window.width, 'height': window.height}
+        return ScreenCapture.get_monitor(1)
+        
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height) of the tracked area"""
+        region = self.region()
+        return region['width'], region['height']
+        
+    def to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        """Map image coordinates of a capture to screen coordinates"""
+        region = self.region()
+        return int(x) + region['left'], int(y) + region['top']
+        
+    def to_image(self, x: int, y: int) -> Tuple[int, int]:
+        """Map screen coordinates to image coordinates of a capture"""
+        region = self.region()
+        return int(x) - region['left'], int(y) - region['top']
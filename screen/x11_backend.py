@@ -0,0 +1,321 @@
+"""
+X11 window backend for Linux
+
+Enumerates top-level windows through EWMH (_NET_CLIENT_LIST, _NET_WM_NAME)
+and activates them with _NET_ACTIVE_WINDOW, using libX11 through ctypes
+like mss does, so no extra package is needed. Without a window manager
+(e.g. a bare Xvfb) the mapped children of the root window are used instead.
+Pixels are grabbed by mss, whose Linux backend uses XShmGetImage.
+"""
+import ctypes
+import ctypes.util
+import os
+import platform
+import threading
+from typing import List, Optional
+
+from .capture import WindowInfo
+
+# Xlib constants
+_SUCCESS = 0
+_IS_VIEWABLE = 2
+_ANY_PROPERTY_TYPE = 0
+_CLIENT_MESSAGE = 33
+_SUBSTRUCTURE_REDIRECT_MASK = 1 << 20
+_SUBSTRUCTURE_NOTIFY_MASK = 1 << 19
+_REVERT_TO_PARENT = 2
+_CURRENT_TIME = 0
+
+_Window = ctypes.c_ulong
+_Atom = ctypes.c_ulong
+
+
+class _XWindowAttributes(ctypes.Structure):
+    _fields_ = [
+        ('x', ctypes.c_int), ('y', ctypes.c_int),
+        ('width', ctypes.c_int), ('height', ctypes.c_int),
+        ('border_width', ctypes.c_int), ('depth', ctypes.c_int),
+        ('visual', ctypes.c_void_p), ('root', _Window),
+        ('class_', ctypes.c_int), ('bit_gravity', ctypes.c_int),
+        ('win_gravity', ctypes.c_int), ('backing_store', ctypes.c_int),
+        ('backing_planes', ctypes.c_ulong), ('backing_pixel', ctypes.c_ulong),
+        ('save_under', ctypes.c_int), ('colormap', ctypes.c_ulong),
+        ('map_installed', ctypes.c_int), ('map_state', ctypes.c_int),
+        ('all_event_masks', ctypes.c_long), ('your_event_mask', ctypes.c_long),
+        ('do_not_propagate_mask', ctypes.c_long), ('override_redirect', ctypes.c_int),
+        ('screen', ctypes.c_void_p),
+    ]
+
+
+class _XClientMessageEvent(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_int), ('serial', ctypes.c_ulong),
+        ('send_event', ctypes.c_int), ('display', ctypes.c_void_p),
+        ('window', _Window), ('message_type', _Atom),
+        ('format', ctypes.c_int), ('data', ctypes.c_long * 5),
+    ]
+
+
+class _XEvent(ctypes.Union):
+    _fields_ = [('xclient', _XClientMessageEvent), ('pad', ctypes.c_long * 24)]
+
+
+_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+
+def _load_xlib():
+    """Load libX11 and declare the functions used here"""
+    if platform.system() != 'Linux':
+        return None
+    path = ctypes.util.find_library('X11')
+    if not path:
+        return None
+    try:
+        xlib = ctypes.cdll.LoadLibrary(path)
+    except OSError:
+        return None
+        
+    signatures = {
+        'XOpenDisplay': (ctypes.c_void_p, [ctypes.c_char_p]),
+        'XCloseDisplay': (ctypes.c_int, [ctypes.c_void_p]),
+        'XDefaultRootWindow': (_Window, [ctypes.c_void_p]),
+        'XInternAtom': (_Atom, [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]),
+        'XGetWindowProperty': (ctypes.c_int, [
+            ctypes.c_void_p, _Window, _Atom, ctypes.c_long, ctypes.c_long, ctypes.c_int, _Atom,
+            ctypes.POINTER(_Atom), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_ulong),
+            ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_void_p)
+        ]),
+        'XQueryTree': (ctypes.c_int, [
+            ctypes.c_void_p, _Window, ctypes.POINTER(_Window), ctypes.POINTER(_Window),
+            ctypes.POINTER(ctypes.POINTER(_Window)), ctypes.POINTER(ctypes.c_uint)
+        ]),
+        'XGetWindowAttributes': (ctypes.c_int, [
+            ctypes.c_void_p, _Window, ctypes.POINTER(_XWindowAttributes)
+        ]),
+        'XTranslateCoordinates': (ctypes.c_int, [
+            ctypes.c_void_p, _Window, _Window, ctypes.c_int, ctypes.c_int,
+            ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(_Window)
+        ]),
+        'XFetchName': (ctypes.c_int, [ctypes.c_void_p, _Window, ctypes.POINTER(ctypes.c_void_p)]),
+        'XSendEvent': (ctypes.c_int, [
+            ctypes.c_void_p, _Window, ctypes.c_int, ctypes.c_long, ctypes.POINTER(_XEvent)
+        ]),
+        'XRaiseWindow': (ctypes.c_int, [ctypes.c_void_p, _Window]),
+        'XSetInputFocus': (ctypes.c_int, [ctypes.c_void_p, _Window, ctypes.c_int, ctypes.c_ulong]),
+        'XSync': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int]),
+        'XFree': (ctypes.c_int, [ctypes.c_void_p]),
+        'XSetErrorHandler': (ctypes.c_void_p, [_ERROR_HANDLER]),
+    }
+    for name, (restype, argtypes) in signatures.items():
+        func = getattr(xlib, name)
+        func.restype = restype
+        func.argtypes = argtypes
+    return xlib
+
+
+_xlib = _load_xlib()
+
+# libX11 is present and there is a display to connect to
+X11_AVAILABLE = _xlib is not None and bool(os.environ.get('DISPLAY'))
+
+
+@_ERROR_HANDLER
+def _ignore_error(display, event):
+    # Windows can vanish between listing and querying them (BadWindow);
+    # the default handler would exit the process
+    return 0
+
+
+class X11Backend:
+    """
+    Window enumeration and activation on an X11 display
+
+    Xlib calls on one connection are serialised with a lock, so the
+    backend can be shared between threads.
+
+    Usage:
+        backend = X11Backend()
+        windows = backend.find_windows("原神")
+        backend.activate(windows[0])
+    """
+    
+    def __init__(self, display: Optional[str] = None):
+        self.display_name = display
+        self._display = None
+        self._root = None
+        self._atoms = {}
+        self._lock = threading.Lock()
+        
+    def _connect_locked(self):
+        """Open the display connection on first use (caller holds the lock)"""
+        if self._display:
+            return self._display
+        if _xlib is None:
+            raise RuntimeError("libX11 not available")
+            
+        name = self.display_name.encode() if self.display_name else None
+        display = _xlib.XOpenDisplay(name)
+        if not display:
+            raise RuntimeError(f"Cannot open X display {self.display_name or os.environ.get('DISPLAY')}")
+            
+        _xlib.XSetErrorHandler(_ignore_error)
+        self._display = display
+        self._root = _xlib.XDefaultRootWindow(display)
+        return display
+        
+    def _atom(self, name: str) -> int:
+        atom = self._atoms.get(name)
+        if atom is None:
+            atom = _xlib.XInternAtom(self._display, name.encode(), False)
+            self._atoms[name] = atom
+        return atom
+        
+    def _property(self, window: int, name: str, length: int = 4096) -> Optional[bytes]:
+        """Read a window property; 32-bit items come back as C longs"""
+        actual_type = _Atom()
+        actual_format = ctypes.c_int()
+        count = ctypes.c_ulong()
+        remaining = ctypes.c_ulong()
+        data = ctypes.c_void_p()
+        
+        status = _xlib.XGetWindowProperty(
+            self._display, window, self._atom(name), 0, length, False, _ANY_PROPERTY_TYPE,
+            ctypes.byref(actual_type), ctypes.byref(actual_format), ctypes.byref(count),
+            ctypes.byref(remaining), ctypes.byref(data)
+        )
+        if status != _SUCCESS or not data.value:
+            return None
+        try:
+            if actual_format.value == 0:
+                return None
+            item_size = ctypes.sizeof(ctypes.c_long) if actual_format.value == 32 else actual_format.value // 8
+            return ctypes.string_at(data.value, count.value * item_size)
+        finally:
+            _xlib.XFree(data)
+            
+    # ================== Enumeration ==================
+    
+    def _client_windows(self) -> List[int]:
+        """Top-level windows, from the window manager or the root's children"""
+        clients = self._property(self._root, '_NET_CLIENT_LIST')
+        if clients:
+            count = len(clients) // ctypes.sizeof(_Window)
+            return list((_Window * count).from_buffer_copy(clients))
+            
+        # No EWMH window manager, e.g. a bare Xvfb
+        root = _Window()
+        parent = _Window()
+        children = ctypes.POINTER(_Window)()
+        count = ctypes.c_uint()
+        if not _xlib.XQueryTree(
+            self._display, self._root, ctypes.byref(root), ctypes.byref(parent),
+            ctypes.byref(children), ctypes.byref(count)
+        ):
+            return []
+        try:
+            return [children[i] for i in range(count.value)]
+        finally:
+            if children:
+                _xlib.XFree(children)
+                
+    def _title(self, window: int) -> str:
+        title = self._property(window, '_NET_WM_NAME')
+        if title:
+            return title.decode('utf-8', errors='replace')
+            
+        name = ctypes.c_void_p()
+        if _xlib.XFetchName(self._display, window, ctypes.byref(name)) and name.value:
+            try:
+                return ctypes.string_at(name.value).decode('latin-1')
+            finally:
+                _xlib.XFree(name)
+        return ""
+        
+    def _geometry(self, window: int, title: str) -> Optional[WindowInfo]:
+        """Client area of a viewable window in root coordinates"""
+        attributes = _XWindowAttributes()
+        if not _xlib.XGetWindowAttributes(self._display, window, ctypes.byref(attributes)):
+            return None
+        if attributes.map_state != _IS_VIEWABLE or attributes.width <= 0 or attributes.height <= 0:
+            return None
+            
+        x = ctypes.c_int()
+        y = ctypes.c_int()
+        child = _Window()
+        if not _xlib.XTranslateCoordinates(
+            self._display, window, self._root, 0, 0, ctypes.byref(x), ctypes.byref(y), ctypes.byref(child)
+        ):
+            return None
+        return WindowInfo(hwnd=window, title=title, x=x.value, y=y.value,
+                          width=attributes.width, height=attributes.height)
+                          
+    def find_windows(self, title_contains: str = "") -> List[WindowInfo]:
+        """Find viewable top-level windows whose title contains a substring"""
+        with self._lock:
+            self._connect_locked()
+            windows = []
+            for window in self._client_windows():
+                title = self._title(window)
+                if title_contains.lower() not in title.lower():
+                    continue
+                info = self._geometry(window, title)
+                if info is not None:
+                    windows.append(info)
+            return windows
+            
+    def window_info(self, window: int, title: str = "") -> Optional[WindowInfo]:
+        """Current client area of a known window, None if it is gone or unmapped"""
+        with self._lock:
+            self._connect_locked()
+            return self._geometry(window, title or self._title(window))
+            
+    # ================== Activation ==================
+    
+    def activate(self, window_info: WindowInfo) -> bool:
+        """Ask the window manager to activate a window, or raise and focus it directly"""
+        with self._lock:
+            display = self._connect_locked()
+            window = window_info.hwnd
+            
+            if self._property(self._root, '_NET_SUPPORTED') is not None:
+                event = _XEvent()
+                event.xclient.type = _CLIENT_MESSAGE
+                event.xclient.send_event = True
+                event.xclient.window = window
+                event.xclient.message_type = self._atom('_NET_ACTIVE_WINDOW')
+                event.xclient.format = 32
+                event.xclient.data[0] = 2  # Source indication: pager, not an application
+                event.xclient.data[1] = _CURRENT_TIME
+                sent = _xlib.XSendEvent(
+                    display, self._root, False,
+                    _SUBSTRUCTURE_REDIRECT_MASK | _SUBSTRUCTURE_NOTIFY_MASK, ctypes.byref(event)
+                )
+            else:
+                _xlib.XRaiseWindow(display, window)
+                sent = _xlib.XSetInputFocus(display, window, _REVERT_TO_PARENT, _CURRENT_TIME)
+                
+            _xlib.XSync(display, False)
+            return bool(sent)
+            
+    def close(self):
+        """Close the display connection"""
+        with self._lock:
+            if self._display:
+                _xlib.XCloseDisplay(self._display)
+                self._display = None
+                self._atoms.clear()
+
+
+_shared_backend: Optional[X11Backend] = None
+_shared_lock = threading.Lock()
+
+
+def get_backend() -> Optional[X11Backend]:
+    """Get the shared backend, None when no X display is available"""
+    global _shared_backend
+    if not X11_AVAILABLE:
+        return None
+    with _shared_lock:
+        if _shared_backend is None:
+            _shared_backend = X11Backend()
+        return _shared_backend
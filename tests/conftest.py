@@ -0,0 +1,9 @@
+"""
+Shared test setup
+
+Tests import the packages from the repository root, as the benchmarks do.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,123 @@
+"""
+Tests for video.analyzer
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+import video.analyzer as analyzer_module
+from video.analyzer import ActionType, GuideStep, VideoAnalyzer
+from video.extractor import VideoFrame
+from video.motion import MotionSegment, MotionType
+from video.segmentation import LegCache, RouteLeg
+
+
+def step(number: int, action: ActionType, timestamp: float) -> GuideStep:
+    return GuideStep(number, action, "", timestamp=timestamp)
+
+
+def test_steps_sharing_a_timestamp_split_the_motion():
+    steps = [
+        step(1, ActionType.MOVE, 0.0),
+        step(2, ActionType.SPRINT, 0.0),  # Same frame as step 1
+        step(3, ActionType.JUMP, 0.0),  # Same frame, but measures other motion
+        step(4, ActionType.MOVE, 6.0),
+    ]
+    segments = [
+        MotionSegment(MotionType.FORWARD, 0.0, 4.0),
+        MotionSegment(MotionType.JUMP, 4.0, 5.0),
+        MotionSegment(MotionType.FORWARD, 6.0, 8.0),
+    ]
+    VideoAnalyzer().attach_motion(steps, segments)
+    
+    assert steps[0].measured_duration == 2.0
+    assert steps[1].measured_duration == 2.0
+    assert steps[2].measured_duration == 1.0
+    assert steps[3].measured_duration == 2.0
+    # Summed, the forward motion is counted once
+    forward = sum(s.measured_duration for s in steps if s.action_type != ActionType.JUMP)
+    assert forward == 6.0
+
+
+class FakeExtractor:
+    """Stands in for VideoExtractor: a 30 s video sampled without decoding"""
+    
+    def __init__(self, video_path, use_proxy=False):
+        self.info = SimpleNamespace(fps=30.0, duration=30.0)
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        return False
+        
+    def extract_frames_at_interval(self, interval, start, end):
+        t = start
+        while t < end:
+            yield VideoFrame(int(t * 30), t, np.zeros((4, 4, 3), dtype=np.uint8))
+            t += interval
+
+
+class FakeCache:
+    """Records which legs would be cached"""
+    stored = []
+    
+    def __init__(self, *args):
+        pass
+        
+    make_key = staticmethod(LegCache.make_key)
+    
+    def get(self, key):
+        return None
+        
+    def put(self, key, steps):
+        FakeCache.stored.append(key)
+
+
+def analyze_with(monkeypatch, analyze_frames):
+    """Run analyze_video on two legs of four batches each, returning the (progress, message) reports"""
+    monkeypatch.setattr(analyzer_module, "VideoExtractor", FakeExtractor)
+    monkeypatch.setattr(analyzer_module, "LegCache", FakeCache)
+    config = analyzer_module.get_config()
+    monkeypatch.setattr(config, "max_frames_per_analysis", 5)
+    monkeypatch.setattr(config, "leg_cache_enabled", True)
+    monkeypatch.setattr(config, "max_parallel_legs", 1)
+    FakeCache.stored = []
+    
+    analyzer = VideoAnalyzer()
+    monkeypatch.setattr(analyzer, "analyze_motion", lambda path: [])
+    monkeypatch.setattr(analyzer, "reconstruct_route", lambda path: [])
+    monkeypatch.setattr(analyzer, "split_legs", lambda path, duration: [
+        RouteLeg(0, 0.0, 15.0, "start", "a"), RouteLeg(1, 15.0, 30.0, "loading", "b")
+    ])
+    monkeypatch.setattr(analyzer, "analyze_frames", analyze_frames)
+    
+    progress = []
+    analyzer.analyze_video(
+        "guide.mp4", frame_interval=0.75, progress_callback=lambda c, t, m: progress.append((c, m))
+    )
+    return progress
+
+
+def test_leg_with_a_failed_batch_is_not_cached(monkeypatch):
+    def analyze_frames(frames, context="", log_callback=None, raise_on_failure=False):
+        if frames[0].timestamp >= 15.0 and frames[0].timestamp < 19.0:
+            raise RuntimeError("API unavailable")  # One batch of the second leg
+        return [GuideStep(0, ActionType.MOVE, "", timestamp=frames[0].timestamp)]
+        
+    analyze_with(monkeypatch, analyze_frames)
+    assert len(FakeCache.stored) == 1  # Only the first leg
+
+
+def test_log_lines_do_not_advance_progress(monkeypatch):
+    def analyze_frames(frames, context="", log_callback=None, raise_on_failure=False):
+        for _ in range(3):
+            log_callback("router log")
+        return []
+        
+    progress = analyze_with(monkeypatch, analyze_frames)
+    # Each of the eight batches moves the bar one step, however much it logs
+    batches = [p for p, message in progress if "批次" in message]
+    assert batches == [20 + int(70 * n / 8) for n in range(1, 9)]
+    last = next(i for i, (p, message) in enumerate(progress) if "路线段 2/2" in message and "批次 4/4" in message)
+    assert all(p < 90 for p, _ in progress[:last])
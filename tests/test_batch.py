@@ -0,0 +1,15 @@
+"""
+Tests for video.batch
+"""
+import pytest
+
+from video.batch import BatchBackend
+
+
+def test_incomplete_backend_fails_when_created():
+    class SubmitOnly(BatchBackend):
+        def submit(self, jsonl_path):
+            return "job"
+            
+    with pytest.raises(TypeError):
+        SubmitOnly()
@@ -0,0 +1,29 @@
+"""
+Tests for screen.change_detector
+"""
+import numpy as np
+
+from screen.change_detector import ChangeDetector, ChangeKind, PerceptionMemo
+from screen.frame import Frame
+
+
+def test_gradual_fade_invalidates_the_memo():
+    changes = ChangeDetector()
+    memo = PerceptionMemo()
+    results = []
+    
+    # A fade to black, each step well under the probe threshold
+    for level in range(200, -1, -5):
+        frame = Frame(np.full((108, 192, 4), level, dtype=np.uint8))
+        change = changes.update(frame)
+        results.append(memo.get("brightness", change, lambda: level))
+        
+    assert results[-1] < ChangeDetector.PIXEL_THRESHOLD / 3
+    assert memo.misses > 1
+
+
+def test_unchanged_frames_are_still_skipped():
+    changes = ChangeDetector()
+    frame = Frame(np.full((108, 192, 4), 90, dtype=np.uint8))
+    changes.update(frame)
+    assert changes.update(frame).kind == ChangeKind.UNCHANGED
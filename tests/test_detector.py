@@ -0,0 +1,41 @@
+"""
+Tests for screen.detector
+"""
+import numpy as np
+
+from screen.capture_plan import PlanCapture
+from screen.detector import GameDetector, GameState
+from screen.frame import Frame
+
+
+def plan_capture(detector: GameDetector, frame: Frame) -> PlanCapture:
+    """What capture_plan would grab of this screen"""
+    plan = detector.game_state_plan()
+    frames = {r.name: frame.crop(r.x, r.y, r.width, r.height) for r in plan}
+    return PlanCapture(plan, frames, plan.region_pixels)
+
+
+def test_plan_capture_reads_whole_screen_brightness():
+    detector = GameDetector((1920, 1080))
+    image = np.full((1080, 1920, 4), 120, dtype=np.uint8)
+    image[360:720, 640:1280] = 15  # A dark scene in the middle of the screen
+    frame = Frame(image)
+    
+    state = detector.detect_game_state(plan_capture(detector, frame))
+    assert state not in (GameState.LOADING, GameState.PAUSE_MENU)
+    assert state == detector.detect_game_state(frame)
+
+
+def test_plan_capture_still_sees_loading_screens():
+    detector = GameDetector((1920, 1080))
+    frame = Frame(np.full((1080, 1920, 4), 5, dtype=np.uint8))
+    assert detector.detect_game_state(plan_capture(detector, frame)) == GameState.LOADING
+
+
+def test_minimap_texture_near_the_threshold_keeps_its_state():
+    detector = GameDetector((1920, 1080))
+    x, y, w, h = detector._scale_region(detector.MINIMAP_REGION)
+    image = np.full((1080, 1920, 4), 130, dtype=np.uint8)
+    stripes = np.where((np.arange(w) // 3) % 2 == 0, 162, 98)  # Std 32, just above the threshold
+    image[y:y + h, x:x + w, :3] = stripes.astype(np.uint8)[None, :, None]
+    assert detector.detect_game_state(Frame(image)) == GameState.WORLD
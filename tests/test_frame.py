@@ -0,0 +1,30 @@
+"""
+Tests for screen.frame
+"""
+import gc
+import weakref
+
+import numpy as np
+
+from screen.frame import Frame
+
+
+def test_level_zero_is_the_frame():
+    frame = Frame(np.zeros((64, 64, 4), dtype=np.uint8))
+    assert frame.level(0) is frame
+    assert frame.level(1).shape[:2] == (32, 32)
+
+
+def test_frame_freed_without_gc_after_level():
+    gc.disable()
+    try:
+        frame = Frame(np.zeros((64, 64, 4), dtype=np.uint8))
+        frame.level(1)
+        frame.crop(8, 8, 16, 16).level(1)
+        frame.gray
+        ref = weakref.ref(frame)
+        del frame
+        # Freed by reference counting alone, not left for the cyclic collector
+        assert ref() is None
+    finally:
+        gc.enable()
@@ -0,0 +1,48 @@
+"""
+Tests for automation.navigator
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from automation.navigator import Navigator
+from screen.detector import GameDetector, GameState
+from screen.frame import Frame
+
+
+class CountingDetector(GameDetector):
+    """Detector reporting a fixed state and counting state checks"""
+    
+    def __init__(self):
+        super().__init__((1920, 1080))
+        self.state_checks = 0
+        
+    def detect_game_state(self, screen):
+        self.state_checks += 1
+        return GameState.WORLD
+
+
+def make_navigator(frames):
+    """Navigator reading frames from a running stand-in capture service"""
+    service = SimpleNamespace(is_running=True, get_screen=lambda: frames.pop(0))
+    controller = SimpleNamespace(coordinate_mapper=lambda x, y: (x, y))
+    return Navigator(
+        controller=controller,
+        screen_capture=SimpleNamespace(),
+        detector=CountingDetector(),
+        capture_service=service,
+    )
+
+
+def test_state_rechecked_when_only_a_corner_changes():
+    screen = np.full((1080, 1920, 4), 90, dtype=np.uint8)
+    corner = screen.copy()
+    corner[900:, 1500:] = 250  # Outside the center, dialog and minimap regions
+    navigator = make_navigator([Frame(screen), Frame(screen), Frame(corner)])
+    
+    navigator.check_game_state()
+    navigator.check_game_state()
+    assert navigator.detector.state_checks == 1  # Unchanged frame reuses the result
+    
+    navigator.check_game_state()
+    assert navigator.detector.state_checks == 2
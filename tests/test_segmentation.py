@@ -0,0 +1,68 @@
+"""
+Tests for video.segmentation
+"""
+import numpy as np
+
+from video.segmentation import LegSegmenter, _LumaSample
+
+FPS = 4.0  # LegSegmenter's default scan rate
+
+
+def sample(timestamp: float, thumb: np.ndarray, map_ratio: float = 0.0) -> _LumaSample:
+    thumb = np.clip(thumb, 0, 255).astype(np.uint8)
+    return _LumaSample(timestamp, thumb, float(thumb.mean()), float(thumb.std()), map_ratio)
+
+
+def scene(rng, width: int = 64, height: int = 36) -> np.ndarray:
+    """A smooth textured world view, wider than a thumbnail so it can pan"""
+    coarse = rng.uniform(60, 160, (height // 6 + 1, (width * 4) // 6 + 1))
+    return np.kron(coarse, np.ones((6, 6)))[:height, :width * 4]
+
+
+def test_fade_in_after_loading_is_not_a_map_opening():
+    rng = np.random.default_rng(0)
+    world = scene(rng)
+    samples = []
+    
+    def add(seconds: float, make):
+        for _ in range(int(seconds * FPS)):
+            samples.append(sample(len(samples) / FPS, make(len(samples))))
+            
+    walk = lambda i: world[:, i % 150:i % 150 + 64]  # Panning a pixel per sample
+    still = world[:, 20:84].copy()
+    dark = lambda i: np.full((36, 64), 8.0)
+    
+    add(10, walk)
+    add(2, dark)  # Loading
+    add(0.5, lambda i: still * 0.5)  # Fade-in
+    add(2, lambda i: still)  # Standing still after arriving
+    add(10, walk)
+    add(2, dark)  # Teleport
+    add(10, walk)
+    duration = len(samples) / FPS
+    
+    legs = LegSegmenter().segment(samples, duration)
+    assert [leg.boundary for leg in legs] == ["start", "loading", "loading"]
+    assert abs(legs[2].start_time - 26.5) < 0.5
+
+
+def test_map_opening_starts_the_leg_of_its_teleport():
+    rng = np.random.default_rng(1)
+    world = scene(rng)
+    world_map = np.full((36, 64), 200.0)
+    world_map[::6] = 120  # Grid lines, so the cut into the map is hard
+    samples = []
+    
+    def add(seconds: float, make, map_ratio: float = 0.0):
+        for _ in range(int(seconds * FPS)):
+            samples.append(sample(len(samples) / FPS, make(len(samples)), map_ratio))
+            
+    walk = lambda i: world[:, i % 150:i % 150 + 64]
+    add(10, walk)
+    add(3, lambda i: world_map, map_ratio=0.6)  # Map open, picking a waypoint
+    add(2, lambda i: np.full((36, 64), 8.0))  # Teleport
+    add(10, walk)
+    
+    legs = LegSegmenter().segment(samples, len(samples) / FPS)
+    assert [leg.boundary for leg in legs] == ["start", "map"]
+    assert abs(legs[1].start_time - 10.0) < 0.5
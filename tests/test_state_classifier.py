@@ -0,0 +1,12 @@
+"""
+Tests for screen.state_classifier
+"""
+from screen.detector import GameState
+from screen.state_classifier import _label_keys
+
+
+def test_every_state_has_its_own_label_key():
+    keys = _label_keys()
+    assert set(keys.values()) == set(GameState)
+    assert all(len(key) == 1 for key in keys)
+    assert keys['0'] == GameState.CUTSCENE
@@ -0,0 +1,45 @@
+"""
+Tests for screen.state_watcher
+"""
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from screen.detector import GameDetector, GameState
+from screen.frame import Frame
+from screen.state_watcher import GameStateWatcher
+
+
+class BlockingDetector(GameDetector):
+    """Detector that holds every state check until it is released"""
+    
+    def __init__(self):
+        super().__init__((1920, 1080))
+        self.checking = threading.Event()
+        self.release = threading.Event()
+        
+    def detect_game_state(self, screen):
+        self.checking.set()
+        self.release.wait(5)
+        return GameState.WORLD
+
+
+def test_reset_waits_for_an_observation_in_progress():
+    detector = BlockingDetector()
+    watcher = GameStateWatcher(detector, screen_capture=SimpleNamespace(), confirm_frames=1)
+    frame = Frame(np.full((1080, 1920, 4), 90, dtype=np.uint8))
+    observer = threading.Thread(target=watcher.observe, args=(frame, 1.0))
+    observer.start()
+    assert detector.checking.wait(5)
+    
+    resetter = threading.Thread(target=watcher.reset)
+    resetter.start()
+    resetter.join(0.2)
+    assert resetter.is_alive()  # Still detecting, the change and memo state must not be cleared yet
+    
+    detector.release.set()
+    observer.join(5)
+    resetter.join(5)
+    assert watcher.state is None
+    assert watcher.history() == []
@@ -0,0 +1,47 @@
+"""
+Tests for screen.tracker
+"""
+import cv2
+import numpy as np
+
+from screen.detector import DetectedObject
+from screen.frame import Frame
+from screen.tracker import ObjectTracker
+
+SIZE = (40, 30)
+
+
+def draw_chest(image: np.ndarray, x: int, y: int, lid: float = 0.5):
+    """Golden box with a dark lid band at a fraction of its height"""
+    w, h = SIZE
+    x0, y0 = x - w // 2, y - h // 2
+    cv2.rectangle(image, (x0, y0), (x0 + w, y0 + h), (30, 200, 230), -1)
+    band = y0 + int(h * lid)
+    cv2.rectangle(image, (x0 + 5, band - 2), (x0 + w - 5, band + 2), (20, 60, 90), -1)
+
+
+def screen(rng, chest, distractor, occluded: bool) -> Frame:
+    image = np.full((360, 640, 3), 110, dtype=np.uint8)
+    image = cv2.add(image, rng.integers(0, 12, image.shape, dtype=np.uint8))
+    draw_chest(image, *distractor, lid=0.25)
+    draw_chest(image, *chest)
+    if occluded:
+        # Something passes in front of the chest, leaving only a weak match
+        x, y = chest
+        cv2.rectangle(image, (x - 22, y - 17), (x + 4, y + 17), (110, 110, 110), -1)
+    return Frame(image, 'BGR')
+
+
+def test_weak_matches_near_a_distractor_do_not_replace_the_template():
+    rng = np.random.default_rng(0)
+    distractor = (300, 235)
+    path = [(200 + 5 * i, 180) for i in range(40)]
+    
+    frames = [screen(rng, chest, distractor, 18 <= i < 22) for i, chest in enumerate(path)]
+    tracker = ObjectTracker(DetectedObject("chest", *path[0], *SIZE, 0.5), frames[0])
+    for frame in frames[1:]:
+        tracker.update(frame)
+        
+    x, y = tracker.position
+    assert not tracker.lost
+    assert np.hypot(x - path[-1][0], y - path[-1][1]) < 4
@@ -0,0 +1,121 @@
+"""
+Tests for screen.x11_backend, against a dummy window on a private Xvfb
+"""
+import ctypes
+import ctypes.util
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from screen.x11_backend import X11Backend
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("Xvfb") is None or ctypes.util.find_library("X11") is None,
+    reason="needs Xvfb and libX11"
+)
+
+TITLE = "x11 backend test"
+GEOMETRY = (40, 30, 320, 240)
+
+
+def client_xlib():
+    """A libX11 handle of its own with the calls needed to make a window"""
+    xlib = ctypes.CDLL(ctypes.util.find_library("X11"))
+    window = ctypes.c_ulong
+    signatures = {
+        'XOpenDisplay': (ctypes.c_void_p, [ctypes.c_char_p]),
+        'XCloseDisplay': (ctypes.c_int, [ctypes.c_void_p]),
+        'XDefaultRootWindow': (window, [ctypes.c_void_p]),
+        'XCreateSimpleWindow': (window, [
+            ctypes.c_void_p, window, ctypes.c_int, ctypes.c_int, ctypes.c_uint, ctypes.c_uint,
+            ctypes.c_uint, ctypes.c_ulong, ctypes.c_ulong
+        ]),
+        'XStoreName': (ctypes.c_int, [ctypes.c_void_p, window, ctypes.c_char_p]),
+        'XMapWindow': (ctypes.c_int, [ctypes.c_void_p, window]),
+        'XUnmapWindow': (ctypes.c_int, [ctypes.c_void_p, window]),
+        'XDestroyWindow': (ctypes.c_int, [ctypes.c_void_p, window]),
+        'XGetInputFocus': (ctypes.c_int, [
+            ctypes.c_void_p, ctypes.POINTER(window), ctypes.POINTER(ctypes.c_int)
+        ]),
+        'XSync': (ctypes.c_int, [ctypes.c_void_p, ctypes.c_int]),
+    }
+    for name, (restype, argtypes) in signatures.items():
+        func = getattr(xlib, name)
+        func.restype = restype
+        func.argtypes = argtypes
+    return xlib
+
+
+@pytest.fixture(scope="module")
+def display():
+    """Name of a fresh Xvfb display without a window manager"""
+    read, write = os.pipe()
+    server = subprocess.Popen(
+        ["Xvfb", "-displayfd", str(write), "-screen", "0", "800x600x24", "-nolisten", "tcp"],
+        pass_fds=(write,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    os.close(write)
+    # Xvfb writes the display number it picked once it accepts connections
+    with os.fdopen(read) as pipe:
+        number = pipe.readline().strip()
+    if not number:
+        server.kill()
+        pytest.skip("Xvfb did not start")
+    yield f":{number}"
+    server.terminate()
+    server.wait()
+
+
+@pytest.fixture
+def client(display):
+    """Connection with one mapped dummy window, as (xlib, connection, window)"""
+    xlib = client_xlib()
+    connection = xlib.XOpenDisplay(display.encode())
+    assert connection
+    x, y, width, height = GEOMETRY
+    window = xlib.XCreateSimpleWindow(connection, xlib.XDefaultRootWindow(connection), x, y, width, height, 0, 0, 0)
+    xlib.XStoreName(connection, window, TITLE.encode())
+    xlib.XMapWindow(connection, window)
+    xlib.XSync(connection, False)
+    yield xlib, connection, window
+    xlib.XDestroyWindow(connection, window)
+    xlib.XCloseDisplay(connection)
+
+
+@pytest.fixture
+def backend(display):
+    backend = X11Backend(display)
+    yield backend
+    backend.close()
+
+
+def test_find_windows_by_title(client, backend):
+    _, _, window = client
+    windows = backend.find_windows("BACKEND TEST")
+    assert [(w.hwnd, w.title) for w in windows] == [(window, TITLE)]
+    assert (windows[0].x, windows[0].y, windows[0].width, windows[0].height) == GEOMETRY
+    assert backend.find_windows("no such window") == []
+
+
+def test_window_info_follows_the_window(client, backend):
+    xlib, connection, window = client
+    info = backend.window_info(window)
+    assert info.title == TITLE
+    assert (info.x, info.y, info.width, info.height) == GEOMETRY
+    
+    xlib.XUnmapWindow(connection, window)
+    xlib.XSync(connection, False)
+    assert backend.window_info(window) is None
+
+
+def test_activate_focuses_the_window(client, backend):
+    xlib, connection, window = client
+    info = backend.find_windows(TITLE)[0]
+    assert backend.activate(info)
+    
+    focus = ctypes.c_ulong()
+    revert = ctypes.c_int()
+    xlib.XGetInputFocus(connection, ctypes.byref(focus), ctypes.byref(revert))
+    assert focus.value == window
@@ -0,0 +1,183 @@
+"""
+Job queue panel showing queued and running video analyses
+"""
+import os
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame,
+    QTableWidget, QTableWidgetItem, QProgressBar, QHeaderView,
+    QAbstractItemView, QFileDialog
+)
+from PyQt6.QtCore import pyqtSignal
+
+from video.job_queue import JobQueue, AnalysisJob, JobStatus
+
+
+STATUS_TEXT = {
+    JobStatus.QUEUED: "⏳ 排队中",
+    JobStatus.RUNNING: "🔍 分析中",
+    JobStatus.DONE: "✅ 完成",
+    JobStatus.FAILED: "❌ 失败",
+    JobStatus.CANCELLED: "⛔ 已取消",
+}
+
+
+class JobQueuePanel(QWidget):
+    """Panel listing analysis jobs with per-job progress"""
+    
+    # Emitted in the GUI thread for every job update
+    job_updated = pyqtSignal(object)  # AnalysisJob
+    
+    COLUMNS = ["视频", "优先级", "状态", "进度"]
+    
+    def __init__(self, job_queue: JobQueue):
+        super().__init__()
+        self.job_queue = job_queue
+        self._rows = {}  # job_id -> row
+        
+        self.init_ui()
+        
+        # Worker threads report through the signal, which is queued to the GUI thread
+        self.job_queue.set_update_callback(self.job_updated.emit)
+        self.job_updated.connect(self.update_job)
+        
+        for job in self.job_queue.get_jobs():
+            self.update_job(job)
+            
+    def init_ui(self):
+        """Initialize the UI"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        container = QFrame()
+        container.setObjectName("jobQueueContainer")
+        container.setStyleSheet("""
+            #jobQueueContainer {
+                background-color: #16213e;
+                border-radius: 10px;
+                padding: 10px;
+            }
+        """)
+        container_layout = QVBoxLayout(container)
+        
+        header = QLabel("🗂️ 分析队列 / Job Queue")
+        header.setStyleSheet("""
+            color: #e94560;
+            font-size: 16px;
+            font-weight: bold;
+        """)
+        container_layout.addWidget(header)
+        
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.setStyleSheet("""
+            QTableWidget {
+                background-color: #0d1b2a;
+                gridline-color: #0f3460;
+                border: none;
+            }
+            QHeaderView::section {
+                background-color: #0f3460;
+                color: #eee;
+                border: none;
+                padding: 4px;
+            }
+        """)
+        container_layout.addWidget(self.table)
+        
+        button_layout = QHBoxLayout()
+        
+        self.add_btn = QPushButton("➕ 添加视频")
+        self.add_btn.clicked.connect(self.add_videos)
+        button_layout.addWidget(self.add_btn)
+        
+        self.priority_btn = QPushButton("⬆️ 优先")
+        self.priority_btn.clicked.connect(self.raise_priority)
+        button_layout.addWidget(self.priority_btn)
+        
+        self.cancel_btn = QPushButton("⛔ 取消")
+        self.cancel_btn.clicked.connect(self.cancel_selected)
+        button_layout.addWidget(self.cancel_btn)
+        
+        self.retry_btn = QPushButton("🔁 重试")
+        self.retry_btn.clicked.connect(self.retry_selected)
+        button_layout.addWidget(self.retry_btn)
+        
+        self.clear_btn = QPushButton("🧹 清除已完成")
+        self.clear_btn.clicked.connect(self.clear_finished)
+        button_layout.addWidget(self.clear_btn)
+        
+        button_layout.addStretch()
+        container_layout.addLayout(button_layout)
+        
+        layout.addWidget(container)
+        
+    def add_videos(self):
+        """Pick videos and queue them"""
+        filepaths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "选择要分析的视频",
+            "",
+            "视频文件 (*.mp4 *.avi *.mkv *.mov *.wmv);;所有文件 (*.*)"
+        )
+        for filepath in filepaths:
+            self.job_queue.add(filepath)
+            
+    def selected_job_ids(self):
+        """Get the job ids of the selected rows"""
+        rows = {index.row() for index in self.table.selectedIndexes()}
+        return [jid for jid, row in self._rows.items() if row in rows]
+        
+    def raise_priority(self):
+        """Move selected jobs ahead of all others"""
+        top = max((job.priority for job in self.job_queue.get_jobs()), default=0)
+        for job_id in self.selected_job_ids():
+            self.job_queue.set_priority(job_id, top + 1)
+            
+    def cancel_selected(self):
+        """Cancel selected queued jobs"""
+        for job_id in self.selected_job_ids():
+            self.job_queue.cancel(job_id)
+            
+    def retry_selected(self):
+        """Queue selected failed or cancelled jobs again"""
+        for job_id in self.selected_job_ids():
+            self.job_queue.retry(job_id)
+            
+    def clear_finished(self):
+        """Remove finished jobs from the queue and the table"""
+        self.job_queue.clear_finished()
+        self.table.setRowCount(0)
+        self._rows.clear()
+        for job in self.job_queue.get_jobs():
+            self.update_job(job)
+            
+    def update_job(self, job: AnalysisJob):
+        """Add or refresh the row of a job"""
+        row = self._rows.get(job.job_id)
+        if row is None:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            self._rows[job.job_id] = row
+            
+            progress = QProgressBar()
+            progress.setRange(0, 100)
+            self.table.setCellWidget(row, 3, progress)
+            
+        name_item = QTableWidgetItem(os.path.basename(job.video_path))
+        name_item.setToolTip(job.video_path)
+        self.table.setItem(row, 0, name_item)
+        self.table.setItem(row, 1, QTableWidgetItem(str(job.priority)))
+        
+        status_item = QTableWidgetItem(STATUS_TEXT[job.status])
+        status_item.setToolTip(job.error or job.message)
+        self.table.setItem(row, 2, status_item)
+        
+        progress = self.table.cellWidget(row, 3)
+        progress.setValue(job.progress)
+        progress.setFormat(f"{job.progress}%")
+        progress.setToolTip(job.message)
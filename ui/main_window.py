@@ -13,33 +13,41 @@ from PyQt6.QtGui import QAction, QIcon, QKeySequence
 from .video_panel import VideoPanel
 from .control_panel import ControlPanel
 from .settings_dialog import SettingsDialog
+from .job_queue_panel import JobQueuePanel
+from .metrics_panel import MetricsPanel
 from config import get_config, save_config
 from engine.decision import DecisionEngine, ExecutionProgress, ExecutionState
+from video.proxy import ProxyGenerator, find_proxy
+from video.job_queue import JobQueue, JobStatus
 
 
-class AnalysisWorkerThread(QThread):
-    """Worker thread for video analysis"""
+class ProxyWorkerThread(QThread):
+    """Worker thread for proxy video generation"""
     progress = pyqtSignal(int, str)  # current percentage, message
-    finished_signal = pyqtSignal(object)  # analysis result
+    finished_signal = pyqtSignal(str, str)  # video path, proxy path ("" if cancelled)
     error = pyqtSignal(str)  # error message
     
-    def __init__(self, engine, video_path):
+    def __init__(self, video_path):
         super().__init__()
-        self.engine = engine
         self.video_path = video_path
+        self.generator = ProxyGenerator()
         
     def run(self):
         try:
             def progress_callback(current, total, message):
-                self.progress.emit(current, message)
+                self.progress.emit(int(current * 100 / total) if total else 0, message)
                 
-            result = self.engine.analyze_video(
+            proxy_path = self.generator.generate(
                 self.video_path,
                 progress_callback=progress_callback
             )
-            self.finished_signal.emit(result)
+            self.finished_signal.emit(self.video_path, proxy_path or "")
         except Exception as e:
             self.error.emit(str(e))
+            
+    def cancel(self):
+        """Stop generation as soon as possible"""
+        self.generator.cancel()
 
 
 class MainWindow(QMainWindow):
@@ -65,6 +73,11 @@ class MainWindow(QMainWindow):
         self.engine.on_progress = lambda p: self.engine_progress_signal.emit(p)
         self.engine.on_log = lambda m: self.engine_log_signal.emit(m)
         self.guide_loaded = False
+        self._proxy_thread = None
+        
+        # Persistent analysis queue; the job of the loaded video is tracked
+        self.job_queue = JobQueue()
+        self._current_job_id = None
         
         # Connect signals to slots
         self.engine_progress_signal.connect(self._on_engine_progress)
@@ -73,6 +86,7 @@ class MainWindow(QMainWindow):
         self.init_ui()
         self.setup_signals()
         self.apply_styles()
+        self.job_queue.start()
         
     def init_ui(self):
         """Initialize the user interface"""
@@ -149,6 +163,14 @@ class MainWindow(QMainWindow):
         
         right_layout.addWidget(progress_container)
         
+        # Analysis job queue
+        self.job_queue_panel = JobQueuePanel(self.job_queue)
+        right_layout.addWidget(self.job_queue_panel)
+        
+        # Capture and recognition latencies
+        self.metrics_panel = MetricsPanel()
+        right_layout.addWidget(self.metrics_panel)
+        
         # Log output
         log_container = QWidget()
         log_container.setObjectName("logContainer")
@@ -252,6 +274,7 @@ class MainWindow(QMainWindow):
         
         # Video panel signals
         self.video_panel.video_loaded.connect(self.on_video_loaded)
+        self.job_queue_panel.job_updated.connect(self._on_job_updated)
         
         # Internal signals
         self.log_message.connect(self.append_log)
@@ -390,6 +413,41 @@ class MainWindow(QMainWindow):
         self.config.last_video_path = filepath
         save_config()
         self.control_panel.set_analyze_enabled(True)
+        self.start_proxy_generation(filepath)
+        
+    def start_proxy_generation(self, filepath: str):
+        """Generate a low-resolution proxy for smooth scrubbing in the background"""
+        self.cancel_proxy_generation()
+        if not self.config.use_proxy or find_proxy(filepath):
+            return
+            
+        self._proxy_thread = ProxyWorkerThread(filepath)
+        self._proxy_thread.progress.connect(self._on_proxy_progress)
+        self._proxy_thread.finished_signal.connect(self._on_proxy_finished)
+        self._proxy_thread.error.connect(
+            lambda msg: self.append_log(f"⚠️ 代理视频生成失败: {msg}")
+        )
+        self._proxy_thread.start()
+        
+    def cancel_proxy_generation(self):
+        """Cancel a running proxy generation and wait for it to stop"""
+        if self._proxy_thread and self._proxy_thread.isRunning():
+            self._proxy_thread.cancel()
+            self._proxy_thread.wait()
+        self._proxy_thread = None
+        
+    def _on_proxy_progress(self, current: int, message: str):
+        """Handle proxy generation progress"""
+        self.status_bar.showMessage(f"{message} {current}%")
+        
+    def _on_proxy_finished(self, video_path: str, proxy_path: str):
+        """Switch playback to the proxy once it is ready"""
+        if not proxy_path or video_path != self.video_panel.current_video:
+            return
+            
+        self.video_panel.set_proxy(proxy_path)
+        self.append_log("⚡ 代理视频已生成，拖动进度条更流畅")
+        self.status_bar.showMessage("就绪 - Ready")
         
     def analyze_video(self):
         """Start video analysis"""
@@ -406,30 +464,41 @@ class MainWindow(QMainWindow):
         self.status_changed.emit("正在分析视频...")
         self.control_panel.update_status("analyzing")
         
-        # Disable buttons during analysis
-        self.control_panel.set_analyze_enabled(False)
-        
-        # Create worker thread
-        self._analysis_thread = AnalysisWorkerThread(
-            self.engine,
-            self.video_panel.current_video
-        )
-        self._analysis_thread.progress.connect(self._on_analysis_progress)
-        self._analysis_thread.finished_signal.connect(self._on_analysis_finished)
-        self._analysis_thread.error.connect(self._on_analysis_error)
-        self._analysis_thread.start()
-        
+        # The loaded video goes ahead of other queued jobs
+        top = max((job.priority for job in self.job_queue.get_jobs()), default=0)
+        job = self.job_queue.add(self.video_panel.current_video, priority=top + 1)
+        self._current_job_id = job.job_id
+        
+    def _on_job_updated(self, job):
+        """Handle updates of queued analysis jobs"""
+        if job.job_id != self._current_job_id:
+            if job.status == JobStatus.DONE:
+                self.append_log(f"✅ 队列任务完成: {job.video_path}")
+            elif job.status == JobStatus.FAILED:
+                self.append_log(f"❌ 队列任务失败: {job.video_path}: {job.error}")
+            return
+            
+        if job.status == JobStatus.RUNNING:
+            self._on_analysis_progress(job.progress, job.message)
+        elif job.status == JobStatus.DONE:
+            self._on_analysis_finished(job)
+        elif job.status == JobStatus.FAILED:
+            self._on_analysis_error(job.error)
+            
     def _on_analysis_progress(self, current: int, message: str):
         """Handle analysis progress update"""
-        self.append_log(f"📊 {message} ({current}%)")
+        if message != getattr(self, '_last_progress_message', None):
+            self._last_progress_message = message
+            self.append_log(f"📊 {message} ({current}%)")
         self.progress_bar.setValue(current)
         
-    def _on_analysis_finished(self, result):
+    def _on_analysis_finished(self, job):
         """Handle analysis completion"""
-        from video.analyzer import AnalysisResult
+        self._current_job_id = None
+        self.engine.load_guide(job.result_path)
         
-        self.append_log(f"✅ 分析完成: {result.summary}")
-        self.append_log(f"📋 共提取 {result.total_steps} 个步骤")
+        self.append_log(f"✅ 分析完成: {job.message}")
+        self.append_log(f"📋 共提取 {len(self.engine.guide_steps)} 个步骤")
         
         # Enable execution
         self.guide_loaded = True
@@ -437,14 +506,11 @@ class MainWindow(QMainWindow):
         self.control_panel.set_analyze_enabled(True)
         self.control_panel.update_status("ready")
         self.status_changed.emit("分析完成 - 准备执行")
-        
-        # Save the guide
-        save_path = self.video_panel.current_video + ".guide.json"
-        result.save(save_path)
-        self.append_log(f"💾 攻略已保存到: {save_path}")
+        self.append_log(f"💾 攻略已保存到: {job.result_path}")
         
     def _on_analysis_error(self, error_msg: str):
         """Handle analysis error"""
+        self._current_job_id = None
         self.append_log(f"❌ 分析失败: {error_msg}")
         self.control_panel.update_status("error")
         self.control_panel.set_analyze_enabled(True)
@@ -552,5 +618,8 @@ class MainWindow(QMainWindow):
                 event.ignore()
                 return
                 
+        self.cancel_proxy_generation()
+        # Running jobs are queued again on the next start
+        self.job_queue.stop(timeout=0)
         save_config()
         event.accept()
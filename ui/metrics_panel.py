@@ -0,0 +1,140 @@
+"""
+Metrics panel showing capture and recognition latencies
+"""
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QComboBox, QFileDialog
+)
+from PyQt6.QtCore import QTimer
+
+from instrumentation import Instrumentation, get_metrics
+
+
+ALL_STEPS = "全部步骤"
+
+
+class MetricsPanel(QWidget):
+    """Panel listing per-operation call counts and latency percentiles"""
+    
+    COLUMNS = ["操作", "次数", "p50 (ms)", "p95 (ms)", "p99 (ms)", "最大 (ms)"]
+    REFRESH_MS = 1000
+    
+    def __init__(self, metrics: Instrumentation = None):
+        super().__init__()
+        self.metrics = metrics or get_metrics()
+        
+        self.init_ui()
+        
+        # Histograms are read under a lock, a periodic refresh is cheap enough
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(self.REFRESH_MS)
+        
+    def init_ui(self):
+        """Initialize the UI"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        container = QFrame()
+        container.setObjectName("metricsContainer")
+        container.setStyleSheet("""
+            #metricsContainer {
+                background-color: #16213e;
+                border-radius: 10px;
+                padding: 10px;
+            }
+        """)
+        container_layout = QVBoxLayout(container)
+        
+        header_layout = QHBoxLayout()
+        header = QLabel("⏱️ 耗时统计 / Latency")
+        header.setStyleSheet("""
+            color: #e94560;
+            font-size: 16px;
+            font-weight: bold;
+        """)
+        header_layout.addWidget(header)
+        header_layout.addStretch()
+        
+        self.step_combo = QComboBox()
+        self.step_combo.addItem(ALL_STEPS)
+        self.step_combo.currentTextChanged.connect(self.refresh)
+        header_layout.addWidget(self.step_combo)
+        container_layout.addLayout(header_layout)
+        
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.setStyleSheet("""
+            QTableWidget {
+                background-color: #0d1b2a;
+                gridline-color: #0f3460;
+                border: none;
+            }
+            QHeaderView::section {
+                background-color: #0f3460;
+                color: #eee;
+                border: none;
+                padding: 4px;
+            }
+        """)
+        container_layout.addWidget(self.table)
+        
+        button_layout = QHBoxLayout()
+        
+        self.export_btn = QPushButton("💾 导出 JSON")
+        self.export_btn.clicked.connect(self.export_json)
+        button_layout.addWidget(self.export_btn)
+        
+        self.reset_btn = QPushButton("🧹 清空")
+        self.reset_btn.clicked.connect(self.reset)
+        button_layout.addWidget(self.reset_btn)
+        
+        button_layout.addStretch()
+        container_layout.addLayout(button_layout)
+        
+        layout.addWidget(container)
+        
+    def refresh(self):
+        """Reload the table from the current histograms"""
+        snapshot = self.metrics.snapshot()
+        
+        # Keep the step list in sync without losing the selection
+        steps = [ALL_STEPS] + list(snapshot['steps'])
+        if steps != [self.step_combo.itemText(i) for i in range(self.step_combo.count())]:
+            selected = self.step_combo.currentText()
+            self.step_combo.blockSignals(True)
+            self.step_combo.clear()
+            self.step_combo.addItems(steps)
+            if selected in steps:
+                self.step_combo.setCurrentText(selected)
+            self.step_combo.blockSignals(False)
+            
+        step = self.step_combo.currentText()
+        rows = snapshot['overall'] if step == ALL_STEPS else snapshot['steps'].get(step, {})
+        
+        self.table.setRowCount(len(rows))
+        for row, (name, summary) in enumerate(rows.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            self.table.setItem(row, 1, QTableWidgetItem(str(summary['calls'])))
+            for column, key in enumerate(('p50_ms', 'p95_ms', 'p99_ms', 'max_ms'), start=2):
+                self.table.setItem(row, column, QTableWidgetItem(f"{summary[key]:.1f}"))
+                
+    def export_json(self):
+        """Save the current statistics to a JSON file"""
+        filepath, _ = QFileDialog.getSaveFileName(
+            self,
+            "导出耗时统计",
+            "metrics.json",
+            "JSON 文件 (*.json)"
+        )
+        if filepath:
+            self.metrics.export_json(filepath)
+            
+    def reset(self):
+        """Drop all statistics"""
+        self.metrics.reset()
+        self.refresh()
@@ -169,6 +169,18 @@ class SettingsDialog(QDialog):
         self.model_combo.setEditable(True)
         model_layout.addRow("模型:", self.model_combo)
         
+        self.routing_check = QCheckBox("先使用快速模型，置信度低时再升级")
+        model_layout.addRow("模型分级:", self.routing_check)
+        
+        self.fast_model_combo = QComboBox()
+        self.fast_model_combo.setEditable(True)
+        model_layout.addRow("快速模型:", self.fast_model_combo)
+        
+        self.routing_threshold_spin = QDoubleSpinBox()
+        self.routing_threshold_spin.setRange(0.0, 1.0)
+        self.routing_threshold_spin.setSingleStep(0.05)
+        model_layout.addRow("升级阈值:", self.routing_threshold_spin)
+        
         layout.addWidget(model_group)
         
         # Info label
@@ -338,6 +350,7 @@ class SettingsDialog(QDialog):
         
         # Update models
         self.model_combo.clear()
+        self.fast_model_combo.clear()
         if provider == "openai":
             self.model_combo.addItems([
                 "gpt-4o",
@@ -345,6 +358,7 @@ class SettingsDialog(QDialog):
                 "gpt-4-turbo",
                 "gpt-4-vision-preview",
             ])
+            self.fast_model_combo.addItems(["gpt-4o-mini"])
             default_url = "https://api.openai.com/v1"
         else:  # gemini
             self.model_combo.addItems([
@@ -353,6 +367,10 @@ class SettingsDialog(QDialog):
                 "gemini-1.5-flash",
                 "gemini-1.5-flash-8b",
             ])
+            self.fast_model_combo.addItems([
+                "gemini-1.5-flash-8b",
+                "gemini-1.5-flash",
+            ])
             default_url = "https://generativelanguage.googleapis.com/v1beta/openai/"
             
         # Update Base URL placeholder
@@ -389,6 +407,11 @@ class SettingsDialog(QDialog):
         else:
             self.model_combo.setCurrentText(self.config.openai_model)
             
+        # Model routing
+        self.routing_check.setChecked(self.config.model_routing_enabled)
+        self.fast_model_combo.setCurrentText(self.config.fast_model)
+        self.routing_threshold_spin.setValue(self.config.routing_confidence_threshold)
+        
         # Game settings
         self.window_title_input.setText(self.config.game_window_title)
         self.width_spin.setValue(self.config.game_resolution_width)
@@ -417,6 +440,9 @@ class SettingsDialog(QDialog):
         self.config.openai_api_key = self.api_key_input.text().strip()
         self.config.openai_base_url = self.base_url_input.text().strip()
         self.config.openai_model = self.model_combo.currentText()
+        self.config.model_routing_enabled = self.routing_check.isChecked()
+        self.config.fast_model = self.fast_model_combo.currentText().strip()
+        self.config.routing_confidence_threshold = self.routing_threshold_spin.value()
         
         # Game settings
         self.config.game_window_title = self.window_title_input.text().strip() or "原神"
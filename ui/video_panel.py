@@ -10,6 +10,9 @@ from PyQt6.QtGui import QPixmap, QImage, QDragEnterEvent, QDropEvent
 import cv2
 import os
 
+from config import get_config
+from video.proxy import find_proxy
+
 
 class VideoPanel(QWidget):
     """Panel for video display and control"""
@@ -20,7 +23,9 @@ class VideoPanel(QWidget):
     def __init__(self):
         super().__init__()
         self.current_video = None
-        self.video_capture = None
+        self.video_capture = None  # Used for playback (proxy if available)
+        self.full_capture = None  # Original file, for full-resolution frames
+        self.proxy_path = None
         self.total_frames = 0
         self.current_frame = 0
         self.fps = 30
@@ -177,32 +182,31 @@ class VideoPanel(QWidget):
             
     def load_video(self, filepath: str):
         """Load video from file path"""
-        if self.video_capture:
-            self.video_capture.release()
-            
-        self.video_capture = cv2.VideoCapture(filepath)
+        self.release_captures()
         
-        if not self.video_capture.isOpened():
+        self.full_capture = cv2.VideoCapture(filepath)
+        
+        if not self.full_capture.isOpened():
             self.video_label.setText("❌ 无法打开视频文件")
+            self.full_capture = None
             return
             
         self.current_video = filepath
-        self.total_frames = int(self.video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
-        self.fps = self.video_capture.get(cv2.CAP_PROP_FPS) or 30
+        self.video_capture = self.full_capture
+        self.total_frames = int(self.full_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self.full_capture.get(cv2.CAP_PROP_FPS) or 30
         self.current_frame = 0
         
+        # Scrub on the proxy if it was generated before
+        if get_config().use_proxy:
+            proxy = find_proxy(filepath)
+            if proxy:
+                self._open_proxy(proxy)
+                
         # Update UI
-        width = int(self.video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(self.video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.update_info_label()
         duration = self.total_frames / self.fps
         
-        self.info_label.setText(
-            f"📹 {os.path.basename(filepath)} | "
-            f"{width}x{height} | "
-            f"{self.fps:.1f} FPS | "
-            f"{self.format_time(duration)}"
-        )
-        
         self.progress_slider.setMaximum(self.total_frames - 1)
         self.duration_label.setText(self.format_time(duration))
         
@@ -217,6 +221,51 @@ class VideoPanel(QWidget):
         # Emit signal
         self.video_loaded.emit(filepath)
         
+    def update_info_label(self):
+        """Show file name, original resolution, frame rate and duration"""
+        width = int(self.full_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.full_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        duration = self.total_frames / self.fps
+        
+        self.info_label.setText(
+            f"📹 {os.path.basename(self.current_video)} | "
+            f"{width}x{height} | "
+            f"{self.fps:.1f} FPS | "
+            f"{self.format_time(duration)}"
+            + (" | ⚡ 代理播放" if self.proxy_path else "")
+        )
+        
+    def set_proxy(self, proxy_path: str):
+        """Switch playback to a finished proxy of the current video"""
+        if not self.current_video or self.proxy_path == proxy_path:
+            return
+            
+        if self._open_proxy(proxy_path):
+            self.update_info_label()
+            self.show_frame(self.current_frame)
+            
+    def _open_proxy(self, proxy_path: str) -> bool:
+        """Open a proxy for playback, keeping the original for full-res frames"""
+        capture = cv2.VideoCapture(proxy_path)
+        if not capture.isOpened():
+            return False
+            
+        if self.video_capture and self.video_capture is not self.full_capture:
+            self.video_capture.release()
+        self.video_capture = capture
+        self.proxy_path = proxy_path
+        return True
+        
+    def release_captures(self):
+        """Release the playback and original captures"""
+        if self.video_capture and self.video_capture is not self.full_capture:
+            self.video_capture.release()
+        if self.full_capture:
+            self.full_capture.release()
+        self.video_capture = None
+        self.full_capture = None
+        self.proxy_path = None
+        
     def show_frame(self, frame_num: int):
         """Display a specific frame"""
         if not self.video_capture:
@@ -327,12 +376,12 @@ class VideoPanel(QWidget):
                 self.load_video(filepath)
                 
     def get_current_frame_image(self):
-        """Get the current frame as numpy array"""
-        if not self.video_capture:
+        """Get the current frame as numpy array (full resolution)"""
+        if not self.full_capture:
             return None
             
-        self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-        ret, frame = self.video_capture.read()
+        self.full_capture.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
+        ret, frame = self.full_capture.read()
         
         if ret:
             return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -340,7 +389,6 @@ class VideoPanel(QWidget):
         
     def closeEvent(self, event):
         """Clean up on close"""
-        if self.video_capture:
-            self.video_capture.release()
+        self.release_captures()
         self.timer.stop()
         event.accept()
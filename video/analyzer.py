@@ -2,15 +2,23 @@
 AI-powered video analyzer using GPT-4 Vision
 """
 import json
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass, asdict
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 import re
 
 from openai import OpenAI
 
 from .extractor import VideoFrame, VideoExtractor
+from .motion import MotionAnalyzer, MotionSegment, MotionType, describe_segments
+from .trajectory import TrajectoryReconstructor, TrajectoryPoint
+from .segmentation import LegSegmenter, LegCache, RouteLeg
+from .proxy import resolve_source
 from config import get_config
+from model_router import ModelRouter, confidence_from_label
 
 
 class ActionType(Enum):
@@ -71,6 +79,7 @@ class GuideStep:
     # Timing
     wait_before: Optional[float] = None  # Wait before action (seconds)
     wait_after: Optional[float] = None  # Wait after action (seconds)
+    measured_duration: Optional[float] = None  # Duration measured from video motion (seconds)
     
     # Video reference
     frame_number: Optional[int] = None  # Associated video frame
@@ -99,6 +108,8 @@ class AnalysisResult:
     steps: List[GuideStep]
     summary: str
     estimated_duration: float  # Estimated time to complete in minutes
+    motion_segments: List[MotionSegment] = field(default_factory=list)
+    route: List[TrajectoryPoint] = field(default_factory=list)  # Minimap route polyline
     
     def to_json(self) -> str:
         """Convert to JSON string"""
@@ -107,7 +118,9 @@ class AnalysisResult:
             'total_steps': self.total_steps,
             'steps': [step.to_dict() for step in self.steps],
             'summary': self.summary,
-            'estimated_duration': self.estimated_duration
+            'estimated_duration': self.estimated_duration,
+            'motion_segments': [s.to_dict() for s in self.motion_segments],
+            'route': [p.to_dict() for p in self.route]
         }
         return json.dumps(data, ensure_ascii=False, indent=2)
         
@@ -116,6 +129,10 @@ class AnalysisResult:
         """Create from JSON string"""
         data = json.loads(json_str)
         data['steps'] = [GuideStep.from_dict(s) for s in data['steps']]
+        data['motion_segments'] = [
+            MotionSegment.from_dict(s) for s in data.get('motion_segments', [])
+        ]
+        data['route'] = [TrajectoryPoint.from_dict(p) for p in data.get('route', [])]
         return cls(**data)
         
     def save(self, filepath: str):
@@ -181,7 +198,8 @@ class VideoAnalyzer:
   "frame_info": {
     "scene": "大世界/地图/菜单",
     "location_description": "场景描述",
-    "subtitle_text": "字幕内容（如有）"
+    "subtitle_text": "字幕内容（如有）",
+    "confidence": 0.9
   },
   "steps": [
     {
@@ -231,15 +249,39 @@ class VideoAnalyzer:
 1. **字幕最重要**：字幕通常直接告诉你该做什么，如"这里跳下去"、"按T使用道具"
 2. **方向要准确**：根据小地图或画面判断，使用 forward/left/right/backward
 3. **按键要明确**：F=交互、T=道具、E=元素战技、Q=元素爆发、Space=跳跃
-4. **时长估算**：根据画面变化估算操作持续时间
+4. **时长估算**：如果提供了本地运动分析，以其测量的时长为准；否则根据画面变化估算操作持续时间
 5. **传送点名称**：尽量给出完整的传送点名称，如"望舒客栈"而非"那个传送点"
+6. **置信度**：在 frame_info.confidence 中给出你对本批步骤准确性的把握（0-1）
 
 请仔细分析每张图片，确保步骤准确、详细、可直接执行。"""
 
+    # Parameters a step needs to be directly executable
+    REQUIRED_FIELDS = {
+        ActionType.TELEPORT: ('teleport_location',),
+        ActionType.MOVE: ('direction', 'duration'),
+        ActionType.SPRINT: ('duration',),
+        ActionType.GLIDE: ('duration',),
+        ActionType.SWIM: ('duration',),
+        ActionType.CLIMB: ('duration',),
+        ActionType.WAIT: ('duration',),
+        ActionType.KEY_PRESS: ('key_to_press',),
+    }
+    
+    # Motion types whose measured durations apply to a step
+    MOTION_ACTIONS = {
+        ActionType.MOVE: (MotionType.FORWARD,),
+        ActionType.SPRINT: (MotionType.FORWARD,),
+        ActionType.SWIM: (MotionType.FORWARD,),
+        ActionType.CLIMB: (MotionType.FORWARD,),
+        ActionType.GLIDE: (MotionType.GLIDE,),
+        ActionType.JUMP: (MotionType.JUMP,),
+    }
+    
     def __init__(self):
         self.client: Optional[OpenAI] = None
         self._last_api_key = None
         self._last_base_url = None
+        self.router = ModelRouter()
         
     def _ensure_client(self):
         """Ensure OpenAI client is initialized with current settings"""
@@ -262,23 +304,8 @@ class VideoAnalyzer:
             
         return config
             
-    def analyze_frames(
-        self, 
-        frames: List[VideoFrame],
-        context: str = "",
-        log_callback = None
-    ) -> List[GuideStep]:
-        """
-        Analyze a batch of frames and extract steps
-        
-        Args:
-            frames: List of video frames to analyze
-            context: Additional context about the video
-            log_callback: Optional callback(message) for logging
-        """
-        config = self._ensure_client()
-        
-        # Prepare messages with images
+    def build_user_content(self, frames: List[VideoFrame], context: str = "") -> List[Dict[str, Any]]:
+        """Build the user message content (prompt text and images) for a batch"""
         content = []
         
         # Add context
@@ -307,25 +334,61 @@ class VideoAnalyzer:
                 "text": f"[图片 {i+1}，时间戳: {frame.timestamp:.1f}秒]"
             })
             
+        return content
+        
+    def build_request_body(self, content: List[Dict[str, Any]], model: str) -> Dict[str, Any]:
+        """Build the chat completion request body for a batch of frames"""
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": content}
+            ],
+            "max_tokens": 4096,
+            "temperature": 0.3
+        }
+        
+    def analyze_frames(
+        self, 
+        frames: List[VideoFrame],
+        context: str = "",
+        log_callback = None,
+        raise_on_failure: bool = False
+    ) -> List[GuideStep]:
+        """
+        Analyze a batch of frames and extract steps
+        
+        Args:
+            frames: List of video frames to analyze
+            context: Additional context about the video
+            log_callback: Optional callback(message) for logging
+            raise_on_failure: Raise the last error when all retries fail,
+                instead of returning no steps
+        """
+        self._ensure_client()
+        
+        # Prepare messages with images
+        content = self.build_user_content(frames, context)
+        
         # Make API call with retry
         max_retries = 3
         last_error = None
         
+        def call(model: str) -> str:
+            response = self.client.chat.completions.create(
+                **self.build_request_body(content, model)
+            )
+            return response.choices[0].message.content
+            
         for attempt in range(max_retries):
             try:
-                response = self.client.chat.completions.create(
-                    model=config.openai_model,
-                    messages=[
-                        {"role": "system", "content": self.SYSTEM_PROMPT},
-                        {"role": "user", "content": content}
-                    ],
-                    max_tokens=4096,
-                    temperature=0.3
+                # Cheap model first, escalate to the strong model if unsure
+                steps = self.router.route(
+                    call,
+                    lambda text: self.parse_response(text, frames),
+                    label="视频分析",
+                    log_callback=log_callback
                 )
-                
-                # Parse response
-                result_text = response.choices[0].message.content
-                steps = self._parse_steps(result_text, frames)
                 return steps
                 
             except Exception as e:
@@ -342,13 +405,26 @@ class VideoAnalyzer:
         # If all retries failed
         if log_callback:
             log_callback(f"❌ API分析最终失败: {str(last_error)}")
+        if raise_on_failure:
+            raise last_error
             
         return []
         
     def _parse_steps(self, text: str, frames: List[VideoFrame]) -> List[GuideStep]:
         """Parse steps from API response"""
+        steps, _ = self.parse_response(text, frames)
+        return steps
+        
+    def parse_response(self, text: str, frames: List[VideoFrame]) -> Tuple[List[GuideStep], float]:
+        """
+        Parse steps from API response and score how reliable they are
+        
+        Returns:
+            (steps, confidence) where confidence is in 0-1
+        """
         steps = []
         frame_info = {}
+        parsed_json = False
         
         # Try to extract JSON from response
         json_match = re.search(r'```json\s*(.*?)\s*```', text, re.DOTALL)
@@ -358,6 +434,7 @@ class VideoAnalyzer:
                 
                 # Extract frame info if present
                 frame_info = data.get('frame_info', {})
+                parsed_json = True
                 
                 if 'steps' in data:
                     for step_data in data['steps']:
@@ -408,7 +485,31 @@ class VideoAnalyzer:
                 step.frame_number = frames[frame_idx].frame_number
                 step.timestamp = frames[frame_idx].timestamp
                 
-        return steps
+        confidence = self._score_steps(steps, parsed_json, frame_info.get('confidence'))
+        return steps, confidence
+        
+    def _score_steps(
+        self,
+        steps: List[GuideStep],
+        parsed_json: bool,
+        reported_confidence=None
+    ) -> float:
+        """Heuristic confidence of parsed steps (0-1)"""
+        if not steps:
+            return 0.0
+        if not parsed_json:
+            # Fell back to free-text parsing, result is rarely executable
+            return 0.2
+            
+        known = sum(1 for s in steps if s.action_type != ActionType.CUSTOM)
+        complete = sum(
+            1 for s in steps
+            if all(getattr(s, f) is not None for f in self.REQUIRED_FIELDS.get(s.action_type, ()))
+        )
+        score = 0.5 * known / len(steps) + 0.5 * complete / len(steps)
+        
+        # The model's own estimate can only lower the score
+        return min(score, confidence_from_label(reported_confidence))
         
     def _parse_text_steps(self, text: str) -> List[GuideStep]:
         """Parse steps from plain text response"""
@@ -471,69 +572,259 @@ class VideoAnalyzer:
             
         max_frames = config.max_frames_per_analysis
         
+        # Measure movement locally so the model only has to label intent
+        if progress_callback:
+            progress_callback(0, 100, "分析画面运动...")
+        motion_segments = self.analyze_motion(video_path)
+        route = self.reconstruct_route(video_path)
+        
+        # Split at teleports so legs can be analyzed independently
+        if progress_callback:
+            progress_callback(15, 100, "划分路线段...")
         with VideoExtractor(video_path) as extractor:
-            # Extract frames
-            if progress_callback:
-                progress_callback(0, 100, "提取视频帧...")
-                
-            all_frames = list(extractor.extract_frames_at_interval(frame_interval))
+            fps = extractor.info.fps
+            legs = self.split_legs(video_path, extractor.info.duration)
             
+        batch_span = frame_interval * max_frames
+        total_batches = sum(max(1, int(leg.duration / batch_span + 0.999)) for leg in legs)
+        done_batches = [0]
+        progress_lock = threading.Lock()
+        
+        def on_log(message: str):
+            # Log lines (router, retries) do not advance the progress
+            with progress_lock:
+                progress = 20 + int(70 * min(done_batches[0], total_batches) / total_batches)
             if progress_callback:
-                progress_callback(20, 100, f"已提取 {len(all_frames)} 帧")
+                progress_callback(progress, 100, message)
                 
-            # Analyze in batches
-            all_steps = []
-            batch_count = (len(all_frames) + max_frames - 1) // max_frames
-            
-            for batch_idx in range(batch_count):
-                start_idx = batch_idx * max_frames
-                end_idx = min(start_idx + max_frames, len(all_frames))
-                batch_frames = all_frames[start_idx:end_idx]
+        def on_batch(message: str):
+            with progress_lock:
+                done_batches[0] += 1
+            on_log(message)
                 
-                if progress_callback:
-                    progress = 20 + int(70 * (batch_idx + 1) / batch_count)
-                    progress_callback(
-                        progress, 100, 
-                        f"分析中... (批次 {batch_idx + 1}/{batch_count})"
-                    )
-                    
-                context = ""
-                if all_steps:
-                    # Provide context from previous steps
-                    last_steps = all_steps[-3:]
-                    context = "前面的步骤：" + "; ".join(s.description for s in last_steps)
-                    
-                # Create a simple logger if callback exists
-                log_cb = None
-                if progress_callback:
-                    log_cb = lambda msg: progress_callback(progress, 100, msg)
-                    
-                batch_steps = self.analyze_frames(batch_frames, context, log_cb)
+        cache = LegCache() if config.leg_cache_enabled else None
+        settings = self._cache_settings(frame_interval)
+        
+        def run_leg(leg: RouteLeg) -> List[GuideStep]:
+            key = LegCache.make_key(leg, settings) if cache and leg.content_hash else None
+            cached = cache.get(key) if key else None
+            if cached is not None:
+                for _ in range(max(1, int(leg.duration / batch_span + 0.999))):
+                    on_batch(f"路线段 {leg.index + 1}/{len(legs)} 使用缓存")
+                return [self._step_from_cache(d, leg, fps) for d in cached]
                 
-                # Renumber steps
-                for step in batch_steps:
-                    step.step_number = len(all_steps) + 1
-                    all_steps.append(step)
-                    
-            # Generate summary
-            if progress_callback:
-                progress_callback(90, 100, "生成摘要...")
+            steps, complete = self._analyze_leg(
+                video_path, leg, frame_interval, motion_segments, on_batch, on_log, len(legs)
+            )
+            # A failed batch is missing steps; analyze the leg again next time
+            if key and complete:
+                cache.put(key, [self._step_to_cache(s, leg, fps) for s in steps])
+            return steps
+            
+        workers = max(1, min(config.max_parallel_legs, len(legs)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            leg_steps = list(pool.map(run_leg, legs))
+            
+        # Renumber steps
+        all_steps = []
+        for steps in leg_steps:
+            for step in steps:
+                step.step_number = len(all_steps) + 1
+                all_steps.append(step)
                 
-            summary = self._generate_summary(all_steps)
+        # Generate summary
+        if progress_callback:
+            progress_callback(90, 100, "生成摘要...")
             
-            # Estimate duration
-            estimated_duration = len(all_steps) * 0.5  # Rough estimate: 30 seconds per step
+        result = self.build_result(video_path, all_steps, motion_segments, route)
+        
+        if progress_callback:
+            progress_callback(100, 100, "分析完成！")
             
-            if progress_callback:
-                progress_callback(100, 100, "分析完成！")
+        return result
+        
+    def split_legs(self, video_path: str, duration: float) -> List[RouteLeg]:
+        """Split the video into route legs (one leg if disabled or failed)"""
+        config = get_config()
+        whole = [RouteLeg(0, 0.0, duration, "start")]
+        if not config.leg_segmentation_enabled:
+            return whole
+            
+        try:
+            return LegSegmenter().split(resolve_source(video_path)) or whole
+        except Exception as e:
+            print(f"Leg segmentation failed: {e}")
+            return whole
+            
+    def _analyze_leg(
+        self,
+        video_path: str,
+        leg: RouteLeg,
+        frame_interval: float,
+        motion_segments: List[MotionSegment],
+        on_batch,
+        on_log,
+        leg_count: int
+    ) -> Tuple[List[GuideStep], bool]:
+        """
+        Analyze one leg with context chained only inside the leg (runs in thread)
+        
+        Returns:
+            (steps, complete) where complete is False if any batch failed
+        """
+        max_frames = get_config().max_frames_per_analysis
+        
+        # Each thread needs its own capture; sampling seeks a lot, which is
+        # cheap on the all-intra proxy
+        with VideoExtractor(video_path, use_proxy=True) as extractor:
+            frames = list(extractor.extract_frames_at_interval(
+                frame_interval, leg.start_time, leg.end_time
+            ))
+            
+        steps = []
+        complete = True
+        batch_count = (len(frames) + max_frames - 1) // max_frames
+        for batch_idx in range(batch_count):
+            batch_frames = frames[batch_idx * max_frames:(batch_idx + 1) * max_frames]
+            
+            context = ""
+            if steps:
+                # Provide context from previous steps
+                last_steps = steps[-3:]
+                context = "前面的步骤：" + "; ".join(s.description for s in last_steps)
                 
-            return AnalysisResult(
-                video_path=video_path,
-                total_steps=len(all_steps),
-                steps=all_steps,
-                summary=summary,
-                estimated_duration=estimated_duration
+            motion = describe_segments(
+                motion_segments,
+                batch_frames[0].timestamp,
+                batch_frames[-1].timestamp + frame_interval
             )
+            if motion:
+                context = (context + "\n" if context else "") + "本地运动分析（精确时长）：" + motion
+                
+            prefix = f"[路线段 {leg.index + 1}/{leg_count}] "
+            try:
+                steps.extend(self.analyze_frames(
+                    batch_frames, context, lambda msg: on_log(prefix + msg), raise_on_failure=True
+                ))
+            except Exception:
+                complete = False  # Already logged; the other batches still count
+            on_batch(f"{prefix}分析中... (批次 {batch_idx + 1}/{batch_count})")
+            
+        return steps, complete
+        
+    def _cache_settings(self, frame_interval: float) -> Dict[str, Any]:
+        """Settings that change analysis results, part of the leg cache key"""
+        config = get_config()
+        return {
+            'models': [t.model for t in self.router.get_tiers()],
+            'frame_interval': frame_interval,
+            'max_frames': config.max_frames_per_analysis,
+            'motion': config.motion_analysis_enabled,
+            'prompt': hashlib.sha256(self.SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:16]
+        }
+        
+    @staticmethod
+    def _step_to_cache(step: GuideStep, leg: RouteLeg, fps: float) -> Dict[str, Any]:
+        """Convert a step for caching, with times relative to the leg start"""
+        data = step.to_dict()
+        data['measured_duration'] = None  # Derived from motion segments on load
+        if data['timestamp'] is not None:
+            data['timestamp'] -= leg.start_time
+        if data['frame_number'] is not None:
+            data['frame_number'] -= int(leg.start_time * fps)
+        return data
+        
+    @staticmethod
+    def _step_from_cache(data: Dict[str, Any], leg: RouteLeg, fps: float) -> GuideStep:
+        """Restore a cached step at the leg's position in the video"""
+        data = dict(data)
+        if data.get('timestamp') is not None:
+            data['timestamp'] += leg.start_time
+        if data.get('frame_number') is not None:
+            data['frame_number'] += int(leg.start_time * fps)
+        return GuideStep.from_dict(data)
+        
+    def build_result(
+        self,
+        video_path: str,
+        steps: List[GuideStep],
+        motion_segments: Optional[List[MotionSegment]] = None,
+        route: Optional[List[TrajectoryPoint]] = None
+    ) -> AnalysisResult:
+        """Assemble the final analysis result from all extracted steps"""
+        motion_segments = motion_segments or []
+        self.attach_motion(steps, motion_segments)
+        summary = self._generate_summary(steps)
+        
+        # Estimate duration
+        estimated_duration = len(steps) * 0.5  # Rough estimate: 30 seconds per step
+        
+        return AnalysisResult(
+            video_path=video_path,
+            total_steps=len(steps),
+            steps=steps,
+            summary=summary,
+            estimated_duration=estimated_duration,
+            motion_segments=motion_segments,
+            route=route or []
+        )
+        
+    def analyze_motion(self, video_path: str) -> List[MotionSegment]:
+        """Run local optical-flow motion analysis (empty list if disabled or failed)"""
+        config = get_config()
+        if not config.motion_analysis_enabled:
+            return []
+            
+        try:
+            return MotionAnalyzer(sample_fps=config.motion_sample_fps).analyze(resolve_source(video_path))
+        except Exception as e:
+            print(f"Motion analysis failed: {e}")
+            return []
+            
+    def reconstruct_route(self, video_path: str) -> List[TrajectoryPoint]:
+        """Reconstruct the minimap route (empty list if disabled or failed)"""
+        config = get_config()
+        if not config.trajectory_enabled:
+            return []
+            
+        try:
+            return TrajectoryReconstructor(sample_fps=config.trajectory_sample_fps).reconstruct(
+                resolve_source(video_path)
+            )
+        except Exception as e:
+            print(f"Route reconstruction failed: {e}")
+            return []
+            
+    def attach_motion(self, steps: List[GuideStep], segments: List[MotionSegment]):
+        """Set measured_duration of movement steps from overlapping motion segments"""
+        if not segments:
+            return
+            
+        timed = [s for s in steps if s.timestamp is not None]
+        
+        # Steps at the same time measuring the same motion share its window
+        sharing: Dict[Tuple[float, tuple], int] = {}
+        for step in timed:
+            motion_types = self.MOTION_ACTIONS.get(step.action_type)
+            if motion_types:
+                key = (step.timestamp, motion_types)
+                sharing[key] = sharing.get(key, 0) + 1
+                
+        for i, step in enumerate(timed):
+            motion_types = self.MOTION_ACTIONS.get(step.action_type)
+            if not motion_types:
+                continue
+                
+            # A step lasts until the next step that starts later
+            start = step.timestamp
+            end = next((s.timestamp for s in timed[i + 1:] if s.timestamp > start), segments[-1].end_time)
+            
+            measured = sum(
+                max(0.0, min(seg.end_time, end) - max(seg.start_time, start))
+                for seg in segments if seg.motion_type in motion_types
+            ) / sharing[(start, motion_types)]
+            if measured > 0:
+                step.measured_duration = round(measured, 2)
             
     def _generate_summary(self, steps: List[GuideStep]) -> str:
         """Generate a summary of all steps"""
@@ -574,34 +865,41 @@ class VideoAnalyzer:
         Analyze a single frame for real-time decision making
         Returns description of what's in the frame
         """
-        config = self._ensure_client()
-        
-        response = self.client.chat.completions.create(
-            model=config.openai_model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "你是原神游戏画面分析专家。请简洁描述当前画面中的场景、角色位置、以及任何可交互的物体（宝箱、神瞳、NPC等）。"
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{frame.to_base64()}",
-                                "detail": "high"
+        self._ensure_client()
+        
+        def call(model: str) -> str:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "你是原神游戏画面分析专家。请简洁描述当前画面中的场景、角色位置、以及任何可交互的物体（宝箱、神瞳、NPC等）。"
+                    },
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:image/jpeg;base64,{frame.to_base64()}",
+                                    "detail": "high"
+                                }
+                            },
+                            {
+                                "type": "text",
+                                "text": "请描述这个原神游戏画面。"
                             }
-                        },
-                        {
-                            "type": "text",
-                            "text": "请描述这个原神游戏画面。"
-                        }
-                    ]
-                }
-            ],
-            max_tokens=500,
-            temperature=0.3
+                        ]
+                    }
+                ],
+                max_tokens=500,
+                temperature=0.3
+            )
+            return response.choices[0].message.content
+            
+        # A plain description is only useful if it says something concrete
+        return self.router.route(
+            call,
+            lambda text: (text, 1.0 if text and len(text.strip()) >= 20 else 0.0),
+            label="画面描述"
         )
-        
-        return response.choices[0].message.content
@@ -0,0 +1,613 @@
+"""
+Offline batch-job analysis for whole video libraries
+
+Turns the frame batches of many videos into one provider batch job
+(JSONL upload), polls until the job completes and reassembles the
+results into AnalysisResult guide files. Latency does not matter here,
+so every batch is analyzed without chained context.
+
+Usage:
+    python -m video.batch videos/ --poll-interval 300
+    python -m video.batch a.mp4 b.mp4 --local       # offline stand-in endpoint
+    python -m video.batch --resume <manifest.json>
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .extractor import VideoFrame, VideoExtractor
+from .analyzer import VideoAnalyzer, AnalysisResult, GuideStep
+from .motion import MotionSegment, describe_segments
+from .trajectory import TrajectoryPoint
+from config import Config, get_config
+
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.wmv')
+
+# Batch states after which polling stops
+TERMINAL_STATES = ('completed', 'failed', 'expired', 'cancelled')
+
+# Provider limit for a single batch input file
+MAX_FILE_BYTES = 190 * 1024 * 1024
+
+
+class BatchBackend(ABC):
+    """Interface of a batch-job endpoint"""
+    
+    @abstractmethod
+    def submit(self, jsonl_path: str) -> str:
+        """Upload a JSONL request file and start a job, returns the job id"""
+        
+    @abstractmethod
+    def get_status(self, job_id: str) -> str:
+        """Get the job status (validating, in_progress, completed, failed, ...)"""
+        
+    @abstractmethod
+    def fetch_results(self, job_id: str) -> List[Dict[str, Any]]:
+        """Get the output lines of a finished job"""
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """Batch backend using the OpenAI-compatible Batch API"""
+    
+    def __init__(self, client=None):
+        if client is None:
+            from openai import OpenAI
+            config = get_config()
+            client = OpenAI(
+                api_key=config.openai_api_key,
+                base_url=config.openai_base_url or "https://api.openai.com/v1"
+            )
+        self.client = client
+        
+    def submit(self, jsonl_path: str) -> str:
+        with open(jsonl_path, 'rb') as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+            
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+        
+    def get_status(self, job_id: str) -> str:
+        return self.client.batches.retrieve(job_id).status
+        
+    def fetch_results(self, job_id: str) -> List[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(job_id)
+        
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = self.client.files.content(file_id).text
+                lines.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        return lines
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Local stand-in for the provider batch endpoint
+
+    Processes submitted JSONL files in a background thread and writes
+    output lines in the provider's format, so the whole flow can be
+    exercised offline. By default every request gets a canned response;
+    pass a responder(body) -> text to plug in something smarter.
+    """
+    
+    def __init__(
+        self,
+        work_dir: Optional[str] = None,
+        responder: Optional[Callable[[Dict[str, Any]], str]] = None,
+        processing_delay: float = 0.0
+    ):
+        self.work_dir = Path(work_dir) if work_dir else get_batch_dir() / 'local'
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.responder = responder or self._offline_response
+        self.processing_delay = processing_delay
+        
+    def submit(self, jsonl_path: str) -> str:
+        job_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        job_dir = self.work_dir / job_id
+        job_dir.mkdir(parents=True)
+        
+        (job_dir / 'input.jsonl').write_bytes(Path(jsonl_path).read_bytes())
+        self._set_status(job_id, 'validating')
+        
+        thread = threading.Thread(target=self._process, args=(job_id,), daemon=True)
+        thread.start()
+        return job_id
+        
+    def get_status(self, job_id: str) -> str:
+        status_file = self.work_dir / job_id / 'status'
+        if not status_file.exists():
+            return 'failed'
+        return status_file.read_text(encoding='utf-8').strip()
+        
+    def fetch_results(self, job_id: str) -> List[Dict[str, Any]]:
+        output = self.work_dir / job_id / 'output.jsonl'
+        if not output.exists():
+            return []
+        with open(output, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+            
+    def _set_status(self, job_id: str, status: str):
+        (self.work_dir / job_id / 'status').write_text(status, encoding='utf-8')
+        
+    def _process(self, job_id: str):
+        """Answer every request of a job (runs in thread)"""
+        job_dir = self.work_dir / job_id
+        self._set_status(job_id, 'in_progress')
+        
+        try:
+            with open(job_dir / 'input.jsonl', 'r', encoding='utf-8') as src, \
+                 open(job_dir / 'output.jsonl', 'w', encoding='utf-8') as dst:
+                for line in src:
+                    if not line.strip():
+                        continue
+                    request = json.loads(line)
+                    
+                    if self.processing_delay:
+                        time.sleep(self.processing_delay)
+                        
+                    try:
+                        text = self.responder(request['body'])
+                        output = {
+                            'id': f"resp_{uuid.uuid4().hex[:12]}",
+                            'custom_id': request['custom_id'],
+                            'response': {
+                                'status_code': 200,
+                                'body': {
+                                    'model': request['body'].get('model'),
+                                    'choices': [{'message': {'role': 'assistant', 'content': text}}]
+                                }
+                            },
+                            'error': None
+                        }
+                    except Exception as e:
+                        output = {
+                            'id': f"resp_{uuid.uuid4().hex[:12]}",
+                            'custom_id': request['custom_id'],
+                            'response': None,
+                            'error': {'message': str(e)}
+                        }
+                    dst.write(json.dumps(output, ensure_ascii=False) + '\n')
+                    
+            self._set_status(job_id, 'completed')
+        except Exception:
+            self._set_status(job_id, 'failed')
+            
+    @staticmethod
+    def _offline_response(body: Dict[str, Any]) -> str:
+        """Canned response: one wait step per request"""
+        content = body['messages'][-1]['content']
+        image_count = sum(1 for part in content if part.get('type') == 'image_url')
+        data = {
+            'frame_info': {'scene': '大世界', 'confidence': 1.0},
+            'steps': [{
+                'step_number': 1,
+                'action_type': 'wait',
+                'description': f"离线测试步骤（{image_count} 张图片）",
+                'duration': 1.0
+            }]
+        }
+        return f"```json\n{json.dumps(data, ensure_ascii=False)}\n```"
+
+
+def get_batch_dir() -> Path:
+    """Get the directory for batch manifests and request files"""
+    batch_dir = Config.get_config_path().parent / 'batches'
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    return batch_dir
+
+
+def find_videos(paths: List[str]) -> List[str]:
+    """Expand directories into the video files they contain"""
+    videos = []
+    for path in paths:
+        p = Path(path)
+        if p.is_dir():
+            videos.extend(
+                str(f) for f in sorted(p.rglob('*'))
+                if f.suffix.lower() in VIDEO_EXTENSIONS
+            )
+        elif p.suffix.lower() in VIDEO_EXTENSIONS:
+            videos.append(str(p))
+    return videos
+
+
+class BatchAnalyzer:
+    """
+    Analyzes many guide videos through a batch-job endpoint
+
+    The state of a run is kept in a manifest file, so polling can be
+    resumed after the process exits.
+    """
+    
+    def __init__(
+        self,
+        backend: BatchBackend,
+        analyzer: Optional[VideoAnalyzer] = None,
+        work_dir: Optional[str] = None,
+        log_callback=None
+    ):
+        self.backend = backend
+        self.analyzer = analyzer or VideoAnalyzer()
+        self.work_dir = Path(work_dir) if work_dir else get_batch_dir()
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.log_callback = log_callback
+        
+    def _log(self, message: str):
+        """Log message via callback, falling back to stdout"""
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+            
+    # ================== Request Building ==================
+    
+    def prepare(
+        self,
+        video_paths: List[str],
+        frame_interval: Optional[float] = None,
+        model: Optional[str] = None
+    ) -> Path:
+        """
+        Extract frames of all videos and write the batch request files
+
+        Returns:
+            Path to the run manifest
+        """
+        config = get_config()
+        if frame_interval is None:
+            frame_interval = config.frame_sample_interval
+        if model is None:
+            # Start with the cheapest tier, low-confidence answers are escalated later
+            model = self.analyzer.router.get_tiers()[0].model
+            
+        run_id = time.strftime('%Y%m%d_%H%M%S') + f"_{uuid.uuid4().hex[:6]}"
+        run_dir = self.work_dir / run_id
+        run_dir.mkdir(parents=True)
+        
+        manifest = {
+            'run_id': run_id,
+            'model': model,
+            'videos': video_paths,
+            'requests': {},
+            'motion': {},
+            'routes': {},
+            'input_files': [],
+            'jobs': [],
+            'escalation': None
+        }
+        writer = _JsonlWriter(run_dir, 'requests')
+        max_frames = config.max_frames_per_analysis
+        
+        for video_idx, video_path in enumerate(video_paths):
+            self._log(f"📹 提取视频帧 ({video_idx + 1}/{len(video_paths)}): {video_path}")
+            
+            try:
+                with VideoExtractor(video_path, use_proxy=True) as extractor:
+                    segments = self.analyzer.analyze_motion(video_path)
+                    manifest['motion'][str(video_idx)] = [s.to_dict() for s in segments]
+                    manifest['routes'][str(video_idx)] = [
+                        p.to_dict() for p in self.analyzer.reconstruct_route(video_path)
+                    ]
+                    
+                    batch: List[VideoFrame] = []
+                    batch_idx = 0
+                    for frame in extractor.extract_frames_at_interval(frame_interval):
+                        batch.append(frame)
+                        if len(batch) == max_frames:
+                            self._add_request(
+                                manifest, writer, video_idx, batch_idx, batch, model,
+                                describe_segments(segments, batch[0].timestamp, frame.timestamp + frame_interval)
+                            )
+                            batch, batch_idx = [], batch_idx + 1
+                    if batch:
+                        self._add_request(
+                            manifest, writer, video_idx, batch_idx, batch, model,
+                            describe_segments(segments, batch[0].timestamp, batch[-1].timestamp + frame_interval)
+                        )
+            except ValueError as e:
+                self._log(f"⚠️ 跳过无法打开的视频: {e}")
+                
+        manifest['input_files'] = writer.close()
+        self._log(
+            f"📦 共 {len(manifest['requests'])} 个请求，"
+            f"{len(manifest['input_files'])} 个上传文件"
+        )
+        
+        manifest_path = run_dir / 'manifest.json'
+        self._save_manifest(manifest_path, manifest)
+        return manifest_path
+        
+    def _add_request(
+        self,
+        manifest: Dict[str, Any],
+        writer: '_JsonlWriter',
+        video_idx: int,
+        batch_idx: int,
+        frames: List[VideoFrame],
+        model: str,
+        motion: str = ""
+    ):
+        """Write one frame batch as a request line"""
+        custom_id = f"v{video_idx}-b{batch_idx}"
+        context = f"本地运动分析（精确时长）：{motion}" if motion else ""
+        content = self.analyzer.build_user_content(frames, context)
+        writer.write({
+            'custom_id': custom_id,
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': self.analyzer.build_request_body(content, model)
+        })
+        manifest['requests'][custom_id] = {
+            'video': video_idx,
+            'batch': batch_idx,
+            'frames': [[f.frame_number, f.timestamp] for f in frames]
+        }
+        
+    # ================== Job Control ==================
+    
+    def submit(self, manifest_path: Path) -> List[str]:
+        """Upload the request files and start the jobs"""
+        manifest = self._load_manifest(manifest_path)
+        
+        for input_file in manifest['input_files']:
+            job_id = self.backend.submit(input_file)
+            manifest['jobs'].append(job_id)
+            self._log(f"🚀 已提交批处理任务: {job_id}")
+            
+        self._save_manifest(manifest_path, manifest)
+        return manifest['jobs']
+        
+    def wait(
+        self,
+        job_ids: List[str],
+        poll_interval: float = 60.0,
+        timeout: Optional[float] = None
+    ) -> bool:
+        """
+        Poll jobs until all reach a terminal state
+
+        Returns:
+            True if every job completed successfully
+        """
+        start_time = time.time()
+        pending = list(job_ids)
+        
+        while pending:
+            for job_id in list(pending):
+                status = self.backend.get_status(job_id)
+                if status in TERMINAL_STATES:
+                    pending.remove(job_id)
+                    icon = "✅" if status == 'completed' else "❌"
+                    self._log(f"{icon} 批处理任务 {job_id}: {status}")
+                    
+            if not pending:
+                break
+            if timeout is not None and time.time() - start_time > timeout:
+                self._log(f"⏳ 等待超时，仍有 {len(pending)} 个任务未完成")
+                return False
+                
+            time.sleep(poll_interval)
+            
+        return all(self.backend.get_status(j) == 'completed' for j in job_ids)
+        
+    # ================== Result Assembly ==================
+    
+    def collect(self, manifest_path: Path, save: bool = True) -> Dict[str, AnalysisResult]:
+        """Reassemble job outputs into one AnalysisResult per video"""
+        manifest = self._load_manifest(manifest_path)
+        parsed = self._parse_outputs(manifest, manifest['jobs'])
+        
+        escalation = manifest.get('escalation')
+        if escalation and escalation.get('jobs'):
+            # Escalated answers replace the cheap ones when they are more confident
+            for custom_id, (steps, confidence) in self._parse_outputs(manifest, escalation['jobs']).items():
+                if custom_id not in parsed or confidence >= parsed[custom_id][1]:
+                    parsed[custom_id] = (steps, confidence)
+                    
+        results = {}
+        for video_idx, video_path in enumerate(manifest['videos']):
+            ids = sorted(
+                (cid for cid, info in manifest['requests'].items() if info['video'] == video_idx),
+                key=lambda cid: manifest['requests'][cid]['batch']
+            )
+            if not ids:
+                continue
+                
+            all_steps: List[GuideStep] = []
+            for custom_id in ids:
+                steps, _ = parsed.get(custom_id, ([], 0.0))
+                for step in steps:
+                    step.step_number = len(all_steps) + 1
+                    all_steps.append(step)
+                    
+            segments = [
+                MotionSegment.from_dict(s)
+                for s in manifest.get('motion', {}).get(str(video_idx), [])
+            ]
+            route = [
+                TrajectoryPoint.from_dict(p)
+                for p in manifest.get('routes', {}).get(str(video_idx), [])
+            ]
+            result = self.analyzer.build_result(video_path, all_steps, segments, route)
+            results[video_path] = result
+            
+            if save:
+                save_path = video_path + ".guide.json"
+                result.save(save_path)
+                self._log(f"💾 攻略已保存到: {save_path}")
+                
+        return results
+        
+    def _parse_outputs(self, manifest: Dict[str, Any], job_ids: List[str]) -> Dict[str, tuple]:
+        """Parse output lines of jobs into {custom_id: (steps, confidence)}"""
+        parsed = {}
+        for job_id in job_ids:
+            for line in self.backend.fetch_results(job_id):
+                custom_id = line.get('custom_id')
+                info = manifest['requests'].get(custom_id)
+                if info is None:
+                    continue
+                    
+                response = line.get('response') or {}
+                if line.get('error') or response.get('status_code') != 200:
+                    self._log(f"⚠️ 请求 {custom_id} 失败: {line.get('error')}")
+                    continue
+                    
+                text = response['body']['choices'][0]['message']['content']
+                frames = [VideoFrame(frame_number=n, timestamp=t, image=None) for n, t in info['frames']]
+                parsed[custom_id] = self.analyzer.parse_response(text, frames)
+        return parsed
+        
+    def escalate(self, manifest_path: Path, model: Optional[str] = None) -> List[str]:
+        """
+        Resubmit low-confidence or failed requests with the strong model
+
+        Returns:
+            Job ids of the escalation batch (empty if nothing to escalate)
+        """
+        manifest = self._load_manifest(manifest_path)
+        tiers = self.analyzer.router.get_tiers()
+        model = model or tiers[-1].model
+        if model == manifest['model']:
+            return []
+            
+        threshold = get_config().routing_confidence_threshold
+        parsed = self._parse_outputs(manifest, manifest['jobs'])
+        low = {
+            cid for cid in manifest['requests']
+            if cid not in parsed or parsed[cid][1] < threshold
+        }
+        if not low:
+            return []
+            
+        self._log(f"🔀 {len(low)} 个请求置信度过低，使用 {model} 重新提交")
+        writer = _JsonlWriter(Path(manifest_path).parent, 'escalation')
+        for input_file in manifest['input_files']:
+            with open(input_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    request = json.loads(line)
+                    if request['custom_id'] in low:
+                        request['body']['model'] = model
+                        writer.write(request)
+                        
+        manifest['escalation'] = {'model': model, 'input_files': writer.close(), 'jobs': []}
+        for input_file in manifest['escalation']['input_files']:
+            manifest['escalation']['jobs'].append(self.backend.submit(input_file))
+            
+        self._save_manifest(manifest_path, manifest)
+        return manifest['escalation']['jobs']
+        
+    def run(
+        self,
+        video_paths: List[str],
+        poll_interval: float = 60.0,
+        escalate: bool = True
+    ) -> Dict[str, AnalysisResult]:
+        """Prepare, submit, wait for and collect a whole batch run"""
+        manifest_path = self.prepare(video_paths)
+        return self.resume(manifest_path, poll_interval, escalate)
+        
+    def resume(
+        self,
+        manifest_path: Path,
+        poll_interval: float = 60.0,
+        escalate: bool = True
+    ) -> Dict[str, AnalysisResult]:
+        """Continue a run from its manifest (submitting if needed)"""
+        manifest = self._load_manifest(manifest_path)
+        jobs = manifest['jobs'] or self.submit(manifest_path)
+        self.wait(jobs, poll_interval)
+        
+        if escalate:
+            escalation = self._load_manifest(manifest_path).get('escalation')
+            escalation_jobs = escalation['jobs'] if escalation else self.escalate(manifest_path)
+            if escalation_jobs:
+                self.wait(escalation_jobs, poll_interval)
+                
+        return self.collect(manifest_path)
+        
+    @staticmethod
+    def _load_manifest(path: Path) -> Dict[str, Any]:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+            
+    @staticmethod
+    def _save_manifest(path: Path, manifest: Dict[str, Any]):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+class _JsonlWriter:
+    """Writes request lines, starting a new file before the size limit is hit"""
+    
+    def __init__(self, directory: Path, prefix: str, max_bytes: int = MAX_FILE_BYTES):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.paths: List[str] = []
+        self._file = None
+        self._size = 0
+        
+    def write(self, record: Dict[str, Any]):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        if self._file is None or (self._size and self._size + len(line) > self.max_bytes):
+            self._open_next()
+        self._file.write(line)
+        self._size += len(line)
+        
+    def _open_next(self):
+        if self._file:
+            self._file.close()
+        path = self.directory / f"{self.prefix}_{len(self.paths):03d}.jsonl"
+        self.paths.append(str(path))
+        self._file = open(path, 'wb')
+        self._size = 0
+        
+    def close(self) -> List[str]:
+        if self._file:
+            self._file.close()
+            self._file = None
+        return self.paths
+
+
+def main():
+    """Headless entry point"""
+    parser = argparse.ArgumentParser(description="批量离线分析攻略视频 / Batch-analyze guide videos")
+    parser.add_argument('videos', nargs='*', help="视频文件或目录")
+    parser.add_argument('--resume', help="继续已有的批处理 (manifest.json)")
+    parser.add_argument('--local', action='store_true', help="使用本地替身端点（离线测试）")
+    parser.add_argument('--poll-interval', type=float, default=60.0, help="轮询间隔（秒）")
+    parser.add_argument('--frame-interval', type=float, default=None, help="帧采样间隔（秒）")
+    parser.add_argument('--no-escalate', action='store_true', help="不对低置信度结果升级模型")
+    args = parser.parse_args()
+    
+    backend = LocalBatchBackend() if args.local else OpenAIBatchBackend()
+    batch = BatchAnalyzer(backend)
+    escalate = not args.no_escalate and not args.local
+    
+    if args.resume:
+        results = batch.resume(Path(args.resume), args.poll_interval, escalate)
+    else:
+        videos = find_videos(args.videos)
+        if not videos:
+            parser.error("没有找到视频文件")
+        manifest_path = batch.prepare(videos, frame_interval=args.frame_interval)
+        print(f"📄 Manifest: {manifest_path}")
+        results = batch.resume(manifest_path, args.poll_interval, escalate)
+        
+    for video_path, result in results.items():
+        print(f"✅ {video_path}: {result.summary}")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,8 @@ import base64
 from io import BytesIO
 from PIL import Image
 
+from .proxy import resolve_source
+
 
 @dataclass
 class VideoFrame:
@@ -67,18 +69,21 @@ class VideoInfo:
 class VideoExtractor:
     """Extracts and processes frames from video files"""
     
-    def __init__(self, video_path: str):
+    def __init__(self, video_path: str, use_proxy: bool = False):
         self.video_path = video_path
+        # Decode from the low-resolution proxy when one exists
+        self.source_path = resolve_source(video_path) if use_proxy else video_path
         self.capture: Optional[cv2.VideoCapture] = None
+        self._full_capture: Optional[cv2.VideoCapture] = None
         self.info: Optional[VideoInfo] = None
         self._load_video()
         
     def _load_video(self):
         """Load video and extract metadata"""
-        self.capture = cv2.VideoCapture(self.video_path)
+        self.capture = cv2.VideoCapture(self.source_path)
         
         if not self.capture.isOpened():
-            raise ValueError(f"Cannot open video file: {self.video_path}")
+            raise ValueError(f"Cannot open video file: {self.source_path}")
             
         width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
@@ -95,13 +100,14 @@ class VideoExtractor:
             duration=duration
         )
         
-    def get_frame(self, frame_number: int) -> Optional[VideoFrame]:
-        """Get a specific frame by number"""
+    def get_frame(self, frame_number: int, full_res: bool = False) -> Optional[VideoFrame]:
+        """Get a specific frame by number (full_res reads it from the original)"""
         if not self.capture or frame_number >= self.info.total_frames:
             return None
             
-        self.capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        ret, frame = self.capture.read()
+        capture = self._get_full_capture() if full_res else self.capture
+        capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        ret, frame = capture.read()
         
         if ret:
             # Convert BGR to RGB
@@ -114,6 +120,15 @@ class VideoExtractor:
             )
         return None
         
+    def _get_full_capture(self) -> cv2.VideoCapture:
+        """Get a capture of the original file (opened on first use)"""
+        if self.source_path == self.video_path:
+            return self.capture
+            
+        if self._full_capture is None:
+            self._full_capture = cv2.VideoCapture(self.video_path)
+        return self._full_capture
+        
     def get_frame_at_time(self, timestamp: float) -> Optional[VideoFrame]:
         """Get frame at specific timestamp (in seconds)"""
         frame_number = int(timestamp * self.info.fps)
@@ -232,6 +247,9 @@ class VideoExtractor:
         if self.capture:
             self.capture.release()
             self.capture = None
+        if self._full_capture:
+            self._full_capture.release()
+            self._full_capture = None
             
     def __enter__(self):
         return self
@@ -0,0 +1,305 @@
+"""
+Persistent job queue for video analysis
+
+Analysis jobs for many videos are kept in jobs.json in the app data
+directory and processed by a pool of worker threads, highest priority
+first. While one job decodes frames another waits on the API, so CPU
+and network are used at the same time. Jobs that were running when the
+app closed are queued again on the next start.
+"""
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict, replace
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .analyzer import VideoAnalyzer
+from config import Config, get_config
+
+
+class JobStatus(Enum):
+    """States of an analysis job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class AnalysisJob:
+    """A queued video analysis"""
+    job_id: str
+    video_path: str
+    priority: int = 0  # Higher runs first
+    status: JobStatus = JobStatus.QUEUED
+    progress: int = 0  # 0-100
+    message: str = ""
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result_path: str = ""
+    error: str = ""
+    
+    def to_dict(self) -> Dict:
+        """Convert to dictionary"""
+        d = asdict(self)
+        d['status'] = self.status.value
+        return d
+        
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AnalysisJob':
+        """Create from dictionary"""
+        data = dict(data)
+        data['status'] = JobStatus(data['status'])
+        return cls(**data)
+
+
+class JobQueue:
+    """
+    Priority queue of analysis jobs processed by a worker pool
+
+    Usage:
+        queue = JobQueue(on_update=print)
+        queue.start()
+        queue.add("a.mp4", priority=1)
+    """
+    
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        store_path: Optional[str] = None,
+        on_update: Optional[Callable[[AnalysisJob], None]] = None,
+        analyzer_factory: Callable[[], VideoAnalyzer] = VideoAnalyzer
+    ):
+        self.workers = workers or get_config().analysis_workers
+        self.store_path = Path(store_path) if store_path else Config.get_config_path().parent / 'jobs.json'
+        self.on_update = on_update
+        self.analyzer_factory = analyzer_factory
+        
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        
+        self.load()
+        
+    def set_update_callback(self, callback: Callable[[AnalysisJob], None]):
+        """Set the callback receiving job snapshots (called from worker threads)"""
+        self.on_update = callback
+        
+    # ================== Persistence ==================
+    
+    def load(self):
+        """Load jobs from disk; interrupted jobs are queued again"""
+        if not self.store_path.exists():
+            return
+            
+        try:
+            with open(self.store_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return
+            
+        with self._lock:
+            for item in data.get('jobs', []):
+                try:
+                    job = AnalysisJob.from_dict(item)
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if job.status == JobStatus.RUNNING:
+                    job.status = JobStatus.QUEUED
+                    job.progress = 0
+                    job.message = "应用重启后重新排队"
+                self._jobs[job.job_id] = job
+                
+    def _save_locked(self):
+        """Write all jobs to disk (caller holds the lock)"""
+        data = {'jobs': [job.to_dict() for job in self._jobs.values()]}
+        tmp = self.store_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        tmp.replace(self.store_path)
+        
+    # ================== Job Management ==================
+    
+    def add(self, video_path: str, priority: int = 0) -> AnalysisJob:
+        """Queue a video (an unfinished job for the same video is reused)"""
+        with self._condition:
+            for job in self._jobs.values():
+                if job.video_path == video_path and job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+                    job.priority = max(job.priority, priority)
+                    self._save_locked()
+                    snapshot = replace(job)
+                    break
+            else:
+                job = AnalysisJob(
+                    job_id=uuid.uuid4().hex[:12],
+                    video_path=video_path,
+                    priority=priority,
+                    created_at=time.time()
+                )
+                self._jobs[job.job_id] = job
+                self._save_locked()
+                snapshot = replace(job)
+                self._condition.notify()
+                
+        self._notify(snapshot)
+        return snapshot
+        
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job (running jobs finish normally)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.status != JobStatus.QUEUED:
+                return False
+            job.status = JobStatus.CANCELLED
+            job.finished_at = time.time()
+            self._save_locked()
+            snapshot = replace(job)
+            
+        self._notify(snapshot)
+        return True
+        
+    def retry(self, job_id: str) -> bool:
+        """Queue a failed or cancelled job again"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if not job or job.status not in (JobStatus.FAILED, JobStatus.CANCELLED):
+                return False
+            job.status = JobStatus.QUEUED
+            job.progress = 0
+            job.message = ""
+            job.error = ""
+            self._save_locked()
+            snapshot = replace(job)
+            self._condition.notify()
+            
+        self._notify(snapshot)
+        return True
+        
+    def set_priority(self, job_id: str, priority: int):
+        """Change the priority of a job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            job.priority = priority
+            self._save_locked()
+            snapshot = replace(job)
+            
+        self._notify(snapshot)
+        
+    def clear_finished(self) -> List[str]:
+        """Remove done, failed and cancelled jobs, returns their ids"""
+        finished = (JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED)
+        with self._lock:
+            removed = [jid for jid, job in self._jobs.items() if job.status in finished]
+            for jid in removed:
+                del self._jobs[jid]
+            self._save_locked()
+        return removed
+        
+    def get_jobs(self) -> List[AnalysisJob]:
+        """Get snapshots of all jobs in execution order"""
+        with self._lock:
+            jobs = [replace(job) for job in self._jobs.values()]
+        order = {JobStatus.RUNNING: 0, JobStatus.QUEUED: 1}
+        return sorted(jobs, key=lambda j: (order.get(j.status, 2), -j.priority, j.created_at))
+        
+    # ================== Workers ==================
+    
+    def start(self):
+        """Start the worker threads"""
+        if self._threads:
+            return
+            
+        self._stopping = False
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"AnalysisWorker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the workers after their current jobs"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        
+    def _next_job_locked(self) -> Optional[AnalysisJob]:
+        """Get the queued job with the highest priority, oldest first"""
+        queued = [job for job in self._jobs.values() if job.status == JobStatus.QUEUED]
+        if not queued:
+            return None
+        return min(queued, key=lambda j: (-j.priority, j.created_at))
+        
+    def _worker(self):
+        """Worker loop (runs in thread)"""
+        # Each worker has its own analyzer, so clients and routers are not shared
+        analyzer = self.analyzer_factory()
+        
+        while True:
+            with self._condition:
+                job = self._next_job_locked()
+                while job is None and not self._stopping:
+                    self._condition.wait()
+                    job = self._next_job_locked()
+                if self._stopping:
+                    return
+                    
+                job.status = JobStatus.RUNNING
+                job.started_at = time.time()
+                job.progress = 0
+                job.message = "开始分析..."
+                self._save_locked()
+                snapshot = replace(job)
+                
+            self._notify(snapshot)
+            self._run_job(analyzer, job)
+            
+    def _run_job(self, analyzer: VideoAnalyzer, job: AnalysisJob):
+        """Analyze one video and record the outcome"""
+        def progress_callback(current, total, message):
+            with self._lock:
+                job.progress = int(current * 100 / total) if total else 0
+                job.message = message
+                snapshot = replace(job)
+            self._notify(snapshot)
+            
+        try:
+            result = analyzer.analyze_video(job.video_path, progress_callback=progress_callback)
+            result_path = job.video_path + ".guide.json"
+            result.save(result_path)
+            
+            with self._lock:
+                job.status = JobStatus.DONE
+                job.progress = 100
+                job.result_path = result_path
+                job.message = result.summary
+        except Exception as e:
+            with self._lock:
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+                job.message = f"分析失败: {e}"
+                
+        with self._lock:
+            job.finished_at = time.time()
+            self._save_locked()
+            snapshot = replace(job)
+        self._notify(snapshot)
+        
+    def _notify(self, job: AnalysisJob):
+        """Send a job snapshot to the update callback"""
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                print(f"Job update callback failed: {e}")
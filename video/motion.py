@@ -0,0 +1,320 @@
+"""
+Local motion analysis for guide videos
+
+Runs dense optical flow on downscaled consecutive frames and classifies
+camera motion (turning, moving forward, jumping, gliding, idle) into
+segments with exact timestamps, so movement timings come from the video
+itself instead of being guessed by the vision model.
+"""
+from typing import List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass
+from enum import Enum
+
+import cv2
+import numpy as np
+
+
+class MotionType(Enum):
+    """Types of camera/character motion"""
+    IDLE = "idle"
+    FORWARD = "forward"
+    TURN_LEFT = "turn_left"
+    TURN_RIGHT = "turn_right"
+    JUMP = "jump"
+    GLIDE = "glide"
+
+
+MOTION_NAMES = {
+    MotionType.IDLE: "静止",
+    MotionType.FORWARD: "前进",
+    MotionType.TURN_LEFT: "左转视角",
+    MotionType.TURN_RIGHT: "右转视角",
+    MotionType.JUMP: "跳跃",
+    MotionType.GLIDE: "滑翔",
+}
+
+# Intermediate per-sample labels for vertical camera motion
+_RISE = "rise"
+_FALL = "fall"
+
+
+@dataclass
+class MotionSegment:
+    """A continuous stretch of one kind of motion"""
+    motion_type: MotionType
+    start_time: float  # in seconds
+    end_time: float  # in seconds
+    yaw_rate: float = 0.0  # Horizontal pan in frame widths/s, positive = turning right
+    speed: float = 0.0  # Mean flow magnitude in frame widths/s
+    
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+        
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'motion_type': self.motion_type.value,
+            'start_time': round(self.start_time, 3),
+            'end_time': round(self.end_time, 3),
+            'yaw_rate': round(self.yaw_rate, 4),
+            'speed': round(self.speed, 4)
+        }
+        
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MotionSegment':
+        """Create from dictionary"""
+        data = dict(data)
+        data['motion_type'] = MotionType(data['motion_type'])
+        return cls(**data)
+
+
+@dataclass
+class _FlowSample:
+    """Flow statistics between two sampled frames"""
+    start_time: float
+    end_time: float
+    dx: float  # Median horizontal flow, frame widths/s
+    dy: float  # Median vertical flow, frame heights/s
+    divergence: float  # Radial (zoom) flow, frame widths/s
+    magnitude: float  # Mean flow magnitude, frame widths/s
+
+
+class MotionAnalyzer:
+    """
+    Extracts motion segments from a video using dense optical flow
+
+    Usage:
+        analyzer = MotionAnalyzer()
+        segments = analyzer.analyze("guide.mp4")
+    """
+    
+    # Thresholds are in frame sizes per second, so they do not depend on
+    # video resolution or the sampling rate
+    IDLE_THRESHOLD = 0.03
+    YAW_THRESHOLD = 0.12
+    VERTICAL_THRESHOLD = 0.08
+    
+    JUMP_MAX_DURATION = 1.5  # A rise (and fall) shorter than this is a jump
+    GLIDE_MIN_DURATION = 1.0  # A sustained descent longer than this is gliding
+    MIN_SEGMENT_DURATION = 0.3  # Shorter segments are merged into neighbours
+    
+    def __init__(self, sample_fps: float = 10.0, analysis_width: int = 160):
+        self.sample_fps = sample_fps
+        self.analysis_width = analysis_width
+        self._mask: Optional[np.ndarray] = None
+        self._radial: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        
+    def analyze(self, video_path: str, progress_callback=None) -> List[MotionSegment]:
+        """
+        Analyze the motion of a whole video
+
+        Args:
+            video_path: Path to video file
+            progress_callback: Callback function(current, total, message)
+        """
+        samples = self._collect_samples(video_path, progress_callback)
+        return self.classify(samples)
+        
+    def _collect_samples(self, video_path: str, progress_callback=None) -> List[_FlowSample]:
+        """Compute flow statistics between consecutive sampled frames"""
+        capture = cv2.VideoCapture(video_path)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video: {video_path}")
+            
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 30
+            total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            stride = max(1, int(round(fps / self.sample_fps)))
+            
+            samples = []
+            prev_gray = None
+            prev_time = 0.0
+            frame_number = 0
+            
+            # Read sequentially and only decode sampled frames, seeking is much slower
+            while capture.grab():
+                if frame_number % stride == 0:
+                    ret, frame = capture.retrieve()
+                    if not ret:
+                        break
+                        
+                    gray = self._prepare(frame)
+                    timestamp = frame_number / fps
+                    
+                    if prev_gray is not None:
+                        samples.append(self._measure(prev_gray, gray, prev_time, timestamp))
+                        
+                    prev_gray, prev_time = gray, timestamp
+                    
+                    if progress_callback and total_frames and len(samples) % 50 == 0:
+                        progress_callback(frame_number, total_frames, "分析画面运动...")
+                        
+                frame_number += 1
+                
+            return samples
+        finally:
+            capture.release()
+            
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale a BGR frame to a small grayscale image"""
+        h, w = frame.shape[:2]
+        height = max(1, int(h * self.analysis_width / w))
+        small = cv2.resize(frame, (self.analysis_width, height), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        
+    def _get_mask(self, shape: Tuple[int, int]) -> np.ndarray:
+        """Mask of pixels used for flow statistics (excludes HUD and character)"""
+        if self._mask is None or self._mask.shape != shape:
+            h, w = shape
+            mask = np.ones(shape, dtype=bool)
+            mask[:int(h * 0.25), :int(w * 0.15)] = False  # Minimap
+            mask[int(h * 0.85):, :] = False  # Hotbar / subtitles
+            mask[int(h * 0.35):int(h * 0.85), int(w * 0.4):int(w * 0.6)] = False  # Character
+            self._mask = mask
+            
+            # Unit vectors pointing away from the image centre, for divergence
+            ys, xs = np.mgrid[0:h, 0:w].astype(np.float32)
+            rx, ry = xs - w / 2, ys - h / 2
+            norm = np.sqrt(rx ** 2 + ry ** 2) + 1e-6
+            self._radial = ((rx / norm)[mask], (ry / norm)[mask])
+        return self._mask
+        
+    def _measure(self, prev: np.ndarray, curr: np.ndarray, t0: float, t1: float) -> _FlowSample:
+        """Measure flow statistics between two grayscale frames"""
+        flow = cv2.calcOpticalFlowFarneback(prev, curr, None, 0.5, 3, 15, 3, 5, 1.2, 0)
+        mask = self._get_mask(prev.shape)
+        h, w = prev.shape
+        dt = max(t1 - t0, 1e-6)
+        
+        fx = flow[..., 0][mask]
+        fy = flow[..., 1][mask]
+        rx, ry = self._radial
+        
+        return _FlowSample(
+            start_time=t0,
+            end_time=t1,
+            dx=float(np.median(fx)) / w / dt,
+            dy=float(np.median(fy)) / h / dt,
+            divergence=float(np.mean(fx * rx + fy * ry)) / w / dt,
+            magnitude=float(np.mean(np.sqrt(fx ** 2 + fy ** 2))) / w / dt
+        )
+        
+    def _label(self, sample: _FlowSample) -> str:
+        """Classify a single flow sample"""
+        if sample.magnitude < self.IDLE_THRESHOLD:
+            return MotionType.IDLE.value
+            
+        # A uniform horizontal pan is the camera turning
+        if abs(sample.dx) > self.YAW_THRESHOLD and abs(sample.dx) > 2 * abs(sample.divergence):
+            # Scene moving right means the camera turns left
+            return MotionType.TURN_LEFT.value if sample.dx > 0 else MotionType.TURN_RIGHT.value
+            
+        # Scene moving down means the camera rises
+        if sample.dy > self.VERTICAL_THRESHOLD:
+            return _RISE
+        if sample.dy < -self.VERTICAL_THRESHOLD:
+            return _FALL
+            
+        return MotionType.FORWARD.value
+        
+    def classify(self, samples: List[_FlowSample]) -> List[MotionSegment]:
+        """Turn flow samples into merged motion segments"""
+        if not samples:
+            return []
+            
+        labels = [self._label(s) for s in samples]
+        
+        # Majority filter over 3 samples to remove single-sample flicker
+        smoothed = list(labels)
+        for i in range(1, len(labels) - 1):
+            if labels[i - 1] == labels[i + 1] != labels[i]:
+                smoothed[i] = labels[i - 1]
+                
+        # Group consecutive samples into runs: (label, first index, last index)
+        runs = []
+        for i, label in enumerate(smoothed):
+            if runs and runs[-1][0] == label:
+                runs[-1][2] = i
+            else:
+                runs.append([label, i, i])
+                
+        segments = []
+        i = 0
+        while i < len(runs):
+            label, first, last = runs[i]
+            start = samples[first].start_time
+            end = samples[last].end_time
+            
+            if label == _RISE:
+                # Rise followed by a fall is a jump
+                if i + 1 < len(runs) and runs[i + 1][0] == _FALL:
+                    fall_end = samples[runs[i + 1][2]].end_time
+                    if fall_end - start <= self.JUMP_MAX_DURATION:
+                        segments.append(self._make_segment(MotionType.JUMP, samples, first, runs[i + 1][2]))
+                        i += 2
+                        continue
+                motion_type = MotionType.JUMP if end - start <= self.JUMP_MAX_DURATION else MotionType.FORWARD
+            elif label == _FALL:
+                motion_type = MotionType.GLIDE if end - start >= self.GLIDE_MIN_DURATION else MotionType.FORWARD
+            else:
+                motion_type = MotionType(label)
+                
+            segments.append(self._make_segment(motion_type, samples, first, last))
+            i += 1
+            
+        return self._merge(segments)
+        
+    def _make_segment(
+        self,
+        motion_type: MotionType,
+        samples: List[_FlowSample],
+        first: int,
+        last: int
+    ) -> MotionSegment:
+        """Build a segment from a range of samples"""
+        chunk = samples[first:last + 1]
+        return MotionSegment(
+            motion_type=motion_type,
+            start_time=chunk[0].start_time,
+            end_time=chunk[-1].end_time,
+            yaw_rate=-float(np.mean([s.dx for s in chunk])),
+            speed=float(np.mean([s.magnitude for s in chunk]))
+        )
+        
+    def _merge(self, segments: List[MotionSegment]) -> List[MotionSegment]:
+        """Merge neighbours of the same type and absorb very short segments"""
+        merged: List[MotionSegment] = []
+        for segment in segments:
+            if merged and (
+                merged[-1].motion_type == segment.motion_type or
+                (segment.duration < self.MIN_SEGMENT_DURATION and segment.motion_type != MotionType.JUMP)
+            ):
+                prev = merged[-1]
+                total = prev.duration + segment.duration
+                if total > 0:
+                    prev.yaw_rate = (prev.yaw_rate * prev.duration + segment.yaw_rate * segment.duration) / total
+                    prev.speed = (prev.speed * prev.duration + segment.speed * segment.duration) / total
+                prev.end_time = segment.end_time
+            else:
+                merged.append(segment)
+        return merged
+
+
+def describe_segments(
+    segments: List[MotionSegment],
+    start_time: float = 0.0,
+    end_time: Optional[float] = None
+) -> str:
+    """Describe the segments overlapping a time window, for use in prompts"""
+    parts = []
+    for segment in segments:
+        if segment.end_time <= start_time or (end_time is not None and segment.start_time >= end_time):
+            continue
+        if segment.motion_type == MotionType.IDLE:
+            continue
+        parts.append(
+            f"{segment.start_time:.1f}-{segment.end_time:.1f}秒 "
+            f"{MOTION_NAMES[segment.motion_type]}({segment.duration:.1f}秒)"
+        )
+    return "; ".join(parts)
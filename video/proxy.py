@@ -0,0 +1,147 @@
+"""
+Low-resolution proxy videos
+
+Transcodes imported videos into small all-intra (MJPG) proxies in the app
+data directory. Every proxy frame is a keyframe, so seeking and
+scrubbing are cheap. Frame numbers and timestamps match the original,
+which is kept for frames that need full detail.
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import cv2
+
+from config import Config, get_config
+
+
+PROXY_SUFFIX = '.proxy.avi'
+
+
+def get_proxy_dir() -> Path:
+    """Get the directory for proxy videos"""
+    proxy_dir = Config.get_config_path().parent / 'proxies'
+    proxy_dir.mkdir(parents=True, exist_ok=True)
+    return proxy_dir
+
+
+def proxy_path_for(video_path: str) -> Path:
+    """Get the proxy path of a video (changes when the original is modified)"""
+    path = Path(video_path).resolve()
+    stat = path.stat()
+    key = f"{path}|{stat.st_size}|{int(stat.st_mtime)}|{get_config().proxy_width}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+    return get_proxy_dir() / f"{path.stem}_{digest}{PROXY_SUFFIX}"
+
+
+def find_proxy(video_path: str) -> Optional[str]:
+    """Get the finished proxy of a video, if there is one"""
+    try:
+        path = proxy_path_for(video_path)
+    except OSError:
+        return None
+    return str(path) if path.exists() else None
+
+
+def resolve_source(video_path: str, full_res: bool = False) -> str:
+    """Get the file to decode: the proxy when allowed and available, else the original"""
+    if full_res or not get_config().use_proxy:
+        return video_path
+    return find_proxy(video_path) or video_path
+
+
+class ProxyGenerator:
+    """
+    Generates proxy videos (cancellable, reports progress)
+
+    Usage:
+        generator = ProxyGenerator()
+        proxy_path = generator.generate("guide.mp4", progress_callback)
+        # From another thread: generator.cancel()
+    """
+    
+    JPEG_QUALITY = 80
+    
+    def __init__(self, width: Optional[int] = None):
+        self.width = width or get_config().proxy_width
+        self._cancel_event = threading.Event()
+        
+    def cancel(self):
+        """Request cancellation of a running generation"""
+        self._cancel_event.set()
+        
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+        
+    def generate(self, video_path: str, progress_callback=None) -> Optional[str]:
+        """
+        Transcode a video into its proxy
+
+        Args:
+            video_path: Path to the original video
+            progress_callback: Callback function(current, total, message)
+
+        Returns:
+            Path to the proxy, or None if cancelled
+        """
+        existing = find_proxy(video_path)
+        if existing:
+            return existing
+            
+        target = proxy_path_for(video_path)
+        # The container is picked from the extension, so keep .avi at the end
+        partial = target.with_name(f"{target.stem}.part.avi")
+        
+        capture = cv2.VideoCapture(video_path)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video file: {video_path}")
+            
+        writer = None
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+            total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            
+            # Never upscale; keep even dimensions for the encoder
+            scale = min(1.0, self.width / width) if width else 1.0
+            size = (int(width * scale) // 2 * 2, int(height * scale) // 2 * 2)
+            
+            writer = cv2.VideoWriter(str(partial), cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+            if not writer.isOpened():
+                raise RuntimeError(f"Cannot create proxy file: {partial}")
+            writer.set(cv2.VIDEOWRITER_PROP_QUALITY, self.JPEG_QUALITY)
+            
+            frame_number = 0
+            while not self.cancelled:
+                ret, frame = capture.read()
+                if not ret:
+                    break
+                    
+                if frame.shape[1] != size[0] or frame.shape[0] != size[1]:
+                    frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                writer.write(frame)
+                frame_number += 1
+                
+                if progress_callback and frame_number % 100 == 0:
+                    progress_callback(frame_number, total_frames, "生成代理视频...")
+                    
+            writer.release()
+            writer = None
+            
+            if self.cancelled:
+                partial.unlink(missing_ok=True)
+                return None
+                
+            os.replace(partial, target)
+            if progress_callback:
+                progress_callback(total_frames, total_frames, "代理视频已生成")
+            return str(target)
+        finally:
+            if writer is not None:
+                writer.release()
+                partial.unlink(missing_ok=True)
+            capture.release()
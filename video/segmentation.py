@@ -0,0 +1,265 @@
+"""
+Route leg segmentation for guide videos
+
+A fast pre-scan over downscaled luma thumbnails splits a video into
+independent legs at loading screens (teleports) and map-open events.
+Legs can then be analyzed in parallel and cached individually, so only
+legs whose content changed are analyzed again.
+"""
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import List, Optional, Dict, Any
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from config import Config
+from screen.detector import GameDetector
+
+
+@dataclass
+class RouteLeg:
+    """A part of the video between two teleports / map openings"""
+    index: int
+    start_time: float  # in seconds
+    end_time: float  # in seconds
+    boundary: str  # What starts the leg: "start", "loading" or "map"
+    content_hash: str = ""  # Hash of the leg's thumbnails, used as cache key
+    
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+
+@dataclass
+class _LumaSample:
+    """A downscaled luma thumbnail of one sampled frame"""
+    timestamp: float
+    thumb: np.ndarray  # uint8 grayscale thumbnail
+    mean: float
+    std: float
+    map_ratio: float = 0.0  # Fraction of map-coloured pixels in the centre
+
+
+class LegSegmenter:
+    """
+    Splits a video into route legs using only downscaled luma
+
+    Usage:
+        segmenter = LegSegmenter()
+        legs = segmenter.split("guide.mp4")
+    """
+    
+    # Same brightness limit as GameDetector._is_loading_screen, plus the
+    # bright loading screens used for domains and long teleports
+    DARK_THRESHOLD = 30
+    BRIGHT_THRESHOLD = 225
+    FLAT_STD = 20  # Loading screens are nearly uniform
+    MIN_LOADING_DURATION = 0.5
+    
+    CUT_THRESHOLD = 25.0  # Mean abs thumbnail difference of a hard cut
+    STATIC_THRESHOLD = 3.0  # Below this consecutive thumbnails are static
+    MIN_MAP_DURATION = 1.0  # A static screen after a cut this long is the map
+    MAP_COLOR_RATIO = 0.15  # Same limit as GameDetector._is_map_open
+    FADE_IN_DURATION = 1.5  # Cuts this soon after a loading screen are the game fading in
+    MIN_LEG_DURATION = 3.0  # Shorter legs are merged into the previous one
+    MAX_MAP_TO_LOADING = 30.0  # Loading this soon after a map opening is its teleport
+    
+    def __init__(self, scan_fps: float = 4.0, thumb_width: int = 64):
+        self.scan_fps = scan_fps
+        self.thumb_width = thumb_width
+        
+    def split(self, video_path: str, progress_callback=None) -> List[RouteLeg]:
+        """
+        Split a video into legs
+
+        Args:
+            video_path: Path to video file
+            progress_callback: Callback function(current, total, message)
+        """
+        samples, duration = self.scan(video_path, progress_callback)
+        return self.segment(samples, duration)
+        
+    def scan(self, video_path: str, progress_callback=None) -> tuple:
+        """Read luma thumbnails, returns (samples, video duration)"""
+        capture = cv2.VideoCapture(video_path)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video: {video_path}")
+            
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 30
+            total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            stride = max(1, int(round(fps / self.scan_fps)))
+            
+            samples = []
+            frame_number = 0
+            
+            # Read sequentially and only decode sampled frames, seeking is much slower
+            while capture.grab():
+                if frame_number % stride == 0:
+                    ret, frame = capture.retrieve()
+                    if not ret:
+                        break
+                        
+                    h, w = frame.shape[:2]
+                    size = (self.thumb_width, max(1, int(h * self.thumb_width / w)))
+                    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                    thumb = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+                    mean, std = cv2.meanStdDev(thumb)
+                    samples.append(_LumaSample(
+                        frame_number / fps, thumb, float(mean[0][0]), float(std[0][0]),
+                        self._map_ratio(small)
+                    ))
+                    
+                    if progress_callback and total_frames and len(samples) % 100 == 0:
+                        progress_callback(frame_number, total_frames, "预扫描视频...")
+                        
+                frame_number += 1
+                
+            return samples, frame_number / fps
+        finally:
+            capture.release()
+            
+    @staticmethod
+    def _map_ratio(small: np.ndarray) -> float:
+        """Fraction of map-coloured pixels in the middle third of a colour thumbnail"""
+        h, w = small.shape[:2]
+        center = small[h // 3:max(h // 3 + 1, 2 * h // 3), w // 3:max(w // 3 + 1, 2 * w // 3)]
+        hsv = cv2.cvtColor(center, cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, GameDetector.MAP_HSV_LOWER, GameDetector.MAP_HSV_UPPER)
+        return cv2.countNonZero(mask) / mask.size
+        
+    def segment(self, samples: List[_LumaSample], duration: float) -> List[RouteLeg]:
+        """Find leg boundaries in a list of thumbnails"""
+        if not samples:
+            return []
+            
+        thumbs = np.stack([s.thumb for s in samples]).astype(np.int16)
+        diffs = np.zeros(len(samples))
+        diffs[1:] = np.abs(np.diff(thumbs, axis=0)).mean(axis=(1, 2))
+        
+        means = np.array([s.mean for s in samples])
+        stds = np.array([s.std for s in samples])
+        map_ratios = np.array([s.map_ratio for s in samples])
+        times = np.array([s.timestamp for s in samples])
+        step = times[1] - times[0] if len(times) > 1 else 1.0
+        
+        loading = ((means < self.DARK_THRESHOLD) | (means > self.BRIGHT_THRESHOLD)) & (stds < self.FLAT_STD)
+        
+        # (start index, end index exclusive, kind)
+        events = []
+        for start, end in self._runs(loading):
+            if (end - start) * step >= self.MIN_LOADING_DURATION:
+                events.append((start, end, "loading"))
+                
+        # Map: a hard cut into a screen of map colours that then stays static
+        static = diffs < self.STATIC_THRESHOLD
+        fade_in = max(1, int(np.ceil(self.FADE_IN_DURATION / step)))
+        for i in np.nonzero(diffs > self.CUT_THRESHOLD)[0]:
+            if loading[max(0, i - fade_in):i + 1].any():
+                # The screen fading in after a loading screen, often onto a still scene
+                continue
+            end = i + 1
+            while end < len(samples) and static[end] and not loading[end]:
+                end += 1
+            if (end - i) * step >= self.MIN_MAP_DURATION and np.median(map_ratios[i:end]) > self.MAP_COLOR_RATIO:
+                events.append((int(i), end, "map"))
+                
+        events.sort()
+        
+        # Build legs; loading screens are cut out, map screens start a leg
+        legs: List[RouteLeg] = []
+        leg_start, boundary = 0.0, "start"
+        map_opened: Optional[float] = None
+        for start, end, kind in events:
+            event_start = float(times[start])
+            event_end = float(times[end]) if end < len(times) else duration
+            
+            if kind == "loading" and map_opened is not None and event_start - map_opened <= self.MAX_MAP_TO_LOADING:
+                # Teleport picked on the map: the map screens stay in the leg they lead to
+                map_opened = None
+                continue
+                
+            if event_start > leg_start:
+                legs.append(RouteLeg(len(legs), leg_start, event_start, boundary))
+            if kind == "map":
+                leg_start, boundary, map_opened = event_start, "map", event_start
+            else:
+                leg_start, boundary, map_opened = event_end, "loading", None
+        if duration > leg_start:
+            legs.append(RouteLeg(len(legs), leg_start, duration, boundary))
+            
+        legs = self._merge_short(legs)
+        for leg in legs:
+            leg.content_hash = self._hash_leg(samples, leg)
+        return legs
+        
+    @staticmethod
+    def _runs(mask: np.ndarray) -> List[tuple]:
+        """Get (start, end exclusive) index pairs of True runs"""
+        padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+        edges = np.diff(padded)
+        return list(zip(np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0]))
+        
+    def _merge_short(self, legs: List[RouteLeg]) -> List[RouteLeg]:
+        """Merge legs that are too short to be analyzed on their own"""
+        merged: List[RouteLeg] = []
+        for leg in legs:
+            if merged and leg.duration < self.MIN_LEG_DURATION:
+                merged[-1].end_time = leg.end_time
+            else:
+                merged.append(leg)
+                
+        for i, leg in enumerate(merged):
+            leg.index = i
+        return merged
+        
+    @staticmethod
+    def _hash_leg(samples: List[_LumaSample], leg: RouteLeg) -> str:
+        """Hash the coarse thumbnails of a leg (independent of its position)"""
+        digest = hashlib.sha256()
+        digest.update(f"{leg.duration:.1f}".encode())
+        for s in samples:
+            if leg.start_time <= s.timestamp < leg.end_time:
+                # Coarse quantization so re-encoding noise does not change the key
+                digest.update((s.thumb[::2, ::2] >> 4).tobytes())
+        return digest.hexdigest()[:32]
+
+
+class LegCache:
+    """On-disk cache of analyzed legs, keyed by content and analysis settings"""
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        if cache_dir:
+            self.cache_dir = Path(cache_dir)
+        else:
+            self.cache_dir = Config.get_config_path().parent / 'cache' / 'legs'
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+    @staticmethod
+    def make_key(leg: RouteLeg, settings: Dict[str, Any]) -> str:
+        """Combine the leg content hash with the settings that affect results"""
+        payload = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(f"{leg.content_hash}:{payload}".encode('utf-8')).hexdigest()[:32]
+        
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Get cached step dicts (timestamps relative to the leg start)"""
+        path = self.cache_dir / f"{key}.json"
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)['steps']
+        except (json.JSONDecodeError, KeyError, OSError):
+            return None
+            
+    def put(self, key: str, steps: List[Dict[str, Any]]):
+        """Store step dicts (timestamps relative to the leg start)"""
+        path = self.cache_dir / f"{key}.json"
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'steps': steps}, f, ensure_ascii=False)
+        tmp.replace(path)
@@ -0,0 +1,262 @@
+"""
+Minimap trajectory reconstruction for guide videos
+
+Crops the minimap from decoded frames and estimates how the map moves
+between them with phase correlation. Integrating those shifts gives the
+route the player took as a 2D polyline with timestamps.
+"""
+import time
+from typing import List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from screen.detector import GameDetector
+
+
+@dataclass
+class TrajectoryPoint:
+    """A point on the reconstructed route"""
+    timestamp: float  # in seconds
+    x: float  # Minimap pixels at 1920x1080, east is positive
+    y: float  # Minimap pixels at 1920x1080, south is positive
+    heading: float = 0.0  # Accumulated map rotation in degrees, clockwise positive
+    reliable: bool = True  # False if tracking was lost before this point
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'timestamp': round(self.timestamp, 3),
+            'x': round(self.x, 2),
+            'y': round(self.y, 2),
+            'heading': round(self.heading, 2),
+            'reliable': self.reliable
+        }
+        
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TrajectoryPoint':
+        """Create from dictionary"""
+        return cls(**data)
+
+
+class TrajectoryReconstructor:
+    """
+    Reconstructs the player's route from the minimap in a video
+
+    Each frame is compared against a keyframe instead of its predecessor,
+    which keeps drift low while the player stands still or moves slowly.
+
+    Usage:
+        reconstructor = TrajectoryReconstructor()
+        route = reconstructor.reconstruct("guide.mp4")
+    """
+    
+    PATCH_SIZE = 128  # Minimap is resampled to this size before correlation
+    MIN_RESPONSE = 0.08  # Lower phase-correlation peaks mean tracking is lost
+    KEYFRAME_RESPONSE = 0.3  # Refresh the keyframe when the match gets weaker
+    KEYFRAME_SHIFT = 0.15  # ...or when it has moved this fraction of the patch
+    MAX_SHIFT = 0.35  # Larger jumps are teleports or cuts, not movement
+    MIN_POINT_DISTANCE = 1.0  # Drop points closer than this to the previous one
+    MIN_ROTATION = 1.5  # Smaller rotation estimates (degrees) are treated as noise
+    
+    def __init__(self, sample_fps: float = 15.0, estimate_rotation: bool = False):
+        self.sample_fps = sample_fps
+        self.estimate_rotation = estimate_rotation
+        self.last_stats: Dict[str, float] = {}
+        
+        size = self.PATCH_SIZE
+        ys, xs = np.mgrid[0:size, 0:size].astype(np.float32)
+        r = np.sqrt((xs - size / 2) ** 2 + (ys - size / 2) ** 2) / (size / 2)
+        
+        # Circular minimap with a soft edge; the player arrow in the centre is
+        # masked because it never moves with the map
+        window = np.clip((0.95 - r) / 0.15, 0, 1) * np.clip((r - 0.15) / 0.05, 0, 1)
+        self._window = window.astype(np.float32)
+        self._hanning = cv2.createHanningWindow((size, size), cv2.CV_32F)
+        
+    def reconstruct(self, video_path: str, progress_callback=None) -> List[TrajectoryPoint]:
+        """
+        Reconstruct the route of a whole video
+
+        Args:
+            video_path: Path to video file
+            progress_callback: Callback function(current, total, message)
+        """
+        capture = cv2.VideoCapture(video_path)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video: {video_path}")
+            
+        start = time.perf_counter()
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 30
+            total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            stride = max(1, int(round(fps / self.sample_fps)))
+            
+            region = self._minimap_region(width, height)
+            # Converts patch pixels back to minimap pixels at 1080p
+            self._scale = np.array(GameDetector.MINIMAP_REGION[2:], dtype=np.float64) / self.PATCH_SIZE
+            
+            self._reset()
+            route: List[TrajectoryPoint] = []
+            frame_number = 0
+            
+            # Read sequentially and only decode sampled frames, seeking is much slower
+            while capture.grab():
+                if frame_number % stride == 0:
+                    ret, frame = capture.retrieve()
+                    if not ret:
+                        break
+                        
+                    point = self.update(self._prepare(frame, region), frame_number / fps)
+                    self._append(route, point)
+                    
+                    if progress_callback and total_frames and frame_number % (stride * 100) == 0:
+                        progress_callback(frame_number, total_frames, "重建小地图路线...")
+                        
+                frame_number += 1
+                
+            if self._pending:
+                route.append(self._pending)
+                
+            elapsed = time.perf_counter() - start
+            duration = frame_number / fps
+            self.last_stats = {
+                'frames': frame_number,
+                'elapsed': elapsed,
+                'video_duration': duration,
+                'realtime_factor': duration / elapsed if elapsed > 0 else 0.0
+            }
+            return route
+        finally:
+            capture.release()
+            
+    def _minimap_region(self, width: int, height: int) -> Tuple[int, int, int, int]:
+        """Scale the minimap region to the video resolution"""
+        x, y, w, h = GameDetector.MINIMAP_REGION
+        sx, sy = width / 1920, height / 1080
+        return int(x * sx), int(y * sy), int(w * sx), int(h * sy)
+        
+    def _prepare(self, frame: np.ndarray, region: Tuple[int, int, int, int]) -> np.ndarray:
+        """Crop the minimap and turn it into a normalized float patch"""
+        x, y, w, h = region
+        minimap = cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_BGR2GRAY)
+        patch = cv2.resize(
+            minimap, (self.PATCH_SIZE, self.PATCH_SIZE), interpolation=cv2.INTER_AREA
+        ).astype(np.float32)
+        
+        # Remove brightness differences so only structure is correlated
+        patch -= patch.mean()
+        patch /= patch.std() + 1e-6
+        return patch * self._window
+        
+    def _reset(self):
+        """Reset tracking state"""
+        self._keyframe: Optional[np.ndarray] = None
+        self._key_position = np.zeros(2, dtype=np.float64)
+        self._key_heading = 0.0
+        self._position = np.zeros(2, dtype=np.float64)
+        self._heading = 0.0
+        self._lost = False
+        self._pending: Optional[TrajectoryPoint] = None
+        
+    def update(self, patch: np.ndarray, timestamp: float) -> TrajectoryPoint:
+        """Feed one prepared minimap patch, returns the current route point"""
+        if self._keyframe is None:
+            self._set_keyframe(patch)
+            return TrajectoryPoint(timestamp, 0.0, 0.0, 0.0, True)
+            
+        rotation = 0.0
+        aligned = patch
+        if self.estimate_rotation:
+            rotation = self._estimate_rotation(self._keyframe, patch)
+            if rotation:
+                # Undo the rotation so only translation is left to measure
+                center = (self.PATCH_SIZE / 2, self.PATCH_SIZE / 2)
+                matrix = cv2.getRotationMatrix2D(center, rotation, 1.0)
+                aligned = cv2.warpAffine(patch, matrix, (self.PATCH_SIZE, self.PATCH_SIZE))
+                
+        (dx, dy), response = cv2.phaseCorrelate(self._keyframe, aligned, self._hanning)
+        shift = np.hypot(dx, dy) / self.PATCH_SIZE
+        
+        if response < self.MIN_RESPONSE or shift > self.MAX_SHIFT:
+            # Map hidden, menu open or teleported: hold position and restart
+            self._lost = True
+            self._set_keyframe(patch)
+            return TrajectoryPoint(timestamp, *self._position, self._heading, False)
+            
+        # The map moves opposite to the player; rotate the offset into the
+        # keyframe's orientation before accumulating
+        heading = self._key_heading + rotation
+        theta = np.radians(-self._key_heading)
+        cos, sin = np.cos(theta), np.sin(theta)
+        offset = -np.array([dx, dy]) * self._scale
+        offset = np.array([cos * offset[0] - sin * offset[1], sin * offset[0] + cos * offset[1]])
+        
+        self._position = self._key_position + offset
+        self._heading = heading
+        reliable = not self._lost
+        self._lost = False
+        
+        if response < self.KEYFRAME_RESPONSE or shift > self.KEYFRAME_SHIFT or abs(rotation) > 10:
+            self._set_keyframe(patch)
+            
+        return TrajectoryPoint(timestamp, *self._position, self._heading, reliable)
+        
+    def _set_keyframe(self, patch: np.ndarray):
+        """Make a patch the new reference at the current position"""
+        self._keyframe = patch
+        self._key_position = self._position.copy()
+        self._key_heading = self._heading
+        
+    def _estimate_rotation(self, reference: np.ndarray, patch: np.ndarray) -> float:
+        """Estimate rotation between two patches with log-polar phase correlation"""
+        size = self.PATCH_SIZE
+        center = (size / 2, size / 2)
+        
+        # Magnitude spectra are translation invariant, rotation becomes a shift in angle
+        spectra = []
+        for image in (reference, patch):
+            magnitude = np.abs(np.fft.fftshift(np.fft.fft2(image * self._hanning)))
+            polar = cv2.warpPolar(
+                np.log1p(magnitude).astype(np.float32), (size, 360), center, size / 2,
+                cv2.WARP_POLAR_LOG | cv2.INTER_LINEAR
+            )
+            spectra.append(polar)
+            
+        (_, angle_shift), response = cv2.phaseCorrelate(spectra[0], spectra[1])
+        if response < self.MIN_RESPONSE:
+            return 0.0
+            
+        # Spectra are symmetric, so the result is only defined modulo 180 degrees
+        angle = (angle_shift + 90) % 180 - 90  # One row per degree
+        
+        # Ignore sub-degree jitter, it would otherwise accumulate into drift
+        return angle if abs(angle) >= self.MIN_ROTATION else 0.0
+        
+    def _append(self, route: List[TrajectoryPoint], point: TrajectoryPoint):
+        """Add a point unless it is too close to the last one"""
+        if route and point.reliable == route[-1].reliable:
+            last = route[-1]
+            if np.hypot(point.x - last.x, point.y - last.y) < self.MIN_POINT_DISTANCE:
+                # Keep the latest dropped point so pauses keep their real length
+                self._pending = point
+                return
+                
+        if self._pending and point.timestamp > self._pending.timestamp:
+            route.append(self._pending)
+        self._pending = None
+        route.append(point)
+
+
+def position_at(route: List[TrajectoryPoint], timestamp: float) -> Optional[Tuple[float, float]]:
+    """Interpolate the route position at a timestamp"""
+    if not route:
+        return None
+        
+    times = np.array([p.timestamp for p in route])
+    xs = np.array([p.x for p in route])
+    ys = np.array([p.y for p in route])
+    return float(np.interp(timestamp, times, xs)), float(np.interp(timestamp, times, ys))